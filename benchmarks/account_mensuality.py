@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+"""
+Compare mensuality catch-up throughput between the per-row and batched paths.
+
+Run against a throwaway database, its content is wiped:
+```shell
+$ createdb loan_benchmark
+$ python benchmarks/account_mensuality.py -n 3000
+```
+"""
+import argparse
+import datetime
+import time
+
+import asyncio
+
+from utils import reset_database, start_database
+
+parser = argparse.ArgumentParser(description="Benchmark account_mensuality")
+parser.add_argument("-n", "--num", type=int, default=3000, help="number of due timeline rows")
+parser.add_argument("-d", "--database", default='loan_benchmark', help="throwaway database name")
+args = parser.parse_args()
+
+
+async def reset(database):
+    await reset_database(database)
+    start = datetime.date(2000, 1, 1)
+    for i in range(args.num):
+        date = start + datetime.timedelta(days=i % 3650)
+        await database.write_mensuality(10.5, 5.25, 5.25, date, i % 300 + 1, 'loan')
+
+
+async def main():
+    database = await start_database(args.database)
+    for batch in [False, True]:
+        await reset(database)
+        tic = time.perf_counter()
+        await database.account_mensuality(batch=batch)
+        toc = time.perf_counter() - tic
+        mode = 'batch' if batch else 'per-row'
+        print(f'{mode:>8}: {args.num} mensualities in {toc:.3f}s ({args.num / toc:.0f} rows/s)')
+
+asyncio.run(main())
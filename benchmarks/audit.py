@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Time the database audit on a synthetic ledger of filled mensualities.
+
+Run against a throwaway database, its content is wiped:
+```shell
+$ createdb loan_benchmark
+$ python benchmarks/audit.py -n 3000000
+```
+"""
+import argparse
+import time
+
+import asyncio
+
+from loan.audit import (
+    check_balance,
+    check_balance_history,
+    check_joint_split,
+    check_timeline_amounts,
+    check_timeline_wires,
+    load_tables
+)
+
+from utils import reset_database, start_database
+
+parser = argparse.ArgumentParser(description="Benchmark the database audit")
+parser.add_argument("-n", "--num", type=int, default=3_000_000, help="number of wire rows")
+parser.add_argument("-d", "--database", default='loan_benchmark', help="throwaway database name")
+args = parser.parse_args()
+
+
+async def main():
+    database = await start_database(args.database)
+    await reset_database(database)
+    # Each filled timeline row comes with its three wires.
+    await database.execute('''
+        WITH timeline_rows AS (
+            INSERT INTO timeline(household, amount, user_1, user_2, date, fill, month, request)
+            SELECT $2, 100 + i % 900, 50 + i % 450, 50 + i % 900 - i % 450, '2000-01-01'::date + i % 9000, true, i % 300, 'loan'
+            FROM generate_series(1, $1) AS i
+            RETURNING household, amount, user_1, user_2, date
+        )
+        INSERT INTO wire(household, account, date, object, operation, debit, credit)
+        SELECT household, account, date, 'bank', 'loan', debit, 0
+        FROM timeline_rows, LATERAL (VALUES (0, amount), (1, user_1), (2, user_2)) AS w(account, debit)
+    ''', args.num // 3, database.household_id)
+    await database.rebuild_balance()
+    await database.rebuild_balance_history()
+    print(f'{args.num // 3 * 3} wire rows, {args.num // 3} timeline rows')
+
+    tic = time.perf_counter()
+    tables = await load_tables(database)
+    print(f'{"load_tables":>24}: {time.perf_counter() - tic:.3f}s')
+    wire, timeline, household = tables['wire'], tables['timeline'], database.household
+    for check, inputs in [
+        (check_balance, (wire, tables['balance'], household)),
+        (check_balance_history, (wire, tables['balance_history'], household)),
+        (check_timeline_amounts, (timeline,)),
+        (check_joint_split, (wire, household)),
+        (check_timeline_wires, (wire, timeline, household)),
+    ]:
+        tic = time.perf_counter()
+        discrepancies = check(*inputs)
+        print(f'{check.__name__:>24}: {time.perf_counter() - tic:.3f}s, {len(discrepancies)} discrepancies')
+
+
+asyncio.run(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Hammer `DB.wire` and `DB.joint_purchase` from concurrent tasks, then check that
+`balance` and `balance_history` still agree with the `wire` ledger.
+With `-b`, writes are group committed through `DB.buffered`.
+
+Run against a throwaway database, its content is wiped:
+```shell
+$ createdb loan_benchmark
+$ python benchmarks/concurrent_wire.py -n 5000 -j 8
+$ python benchmarks/concurrent_wire.py -n 5000 -j 64 -b
+```
+"""
+import argparse
+import contextlib
+import datetime
+import random
+import time
+
+import asyncio
+
+from utils import reset_database, start_database
+
+parser = argparse.ArgumentParser(description="Stress concurrent balance updates")
+parser.add_argument("-n", "--num", type=int, default=5000, help="number of operations")
+parser.add_argument("-j", "--jobs", type=int, default=8, help="number of concurrent tasks")
+parser.add_argument("-b", "--buffered", action="store_true", help="group commit writes")
+parser.add_argument("-d", "--database", default='loan_benchmark', help="throwaway database name")
+args = parser.parse_args()
+
+START = datetime.date(2023, 1, 1)
+DAYS = 365
+WIRES = [
+    ('user_1', 'user_2'), ('user_2', 'user_1'),
+    ('user_1', 'joint'), ('user_2', 'joint'),
+    ('joint', 'user_1'), ('joint', 'user_2'),
+]
+
+
+async def worker(database, operations, seed):
+    rng = random.Random(seed)
+    for _ in range(operations):
+        date = START + datetime.timedelta(days=rng.randrange(DAYS))
+        amount = rng.randrange(1, 100_000) / 100
+        match rng.randrange(8):
+            case 0:
+                await database.joint_purchase(amount, 'furniture', rng.randrange(101), date)
+            case 1:
+                # Checkpoints are created while writers are running.
+                await database.checkpoint_balance_history(date)
+            case _:
+                await database.wire(*rng.choice(WIRES), amount, date)
+
+
+async def check(database):
+    errors = 0
+    for user in ['joint', 'user_1', 'user_2']:
+        *_, balance = await database.get_balance(user)
+        total = await database.wire_total(user, '1900-01-01', '2100-01-01')
+        if balance != total.cents:
+            errors += 1
+            print(f'{user}: balance {balance} != wire total {total.cents}')
+        for month in range(1, 13):
+            date = START.replace(month=month, day=15)
+            history = await database.get_date_balance(user, date)
+            total = await database.wire_total(user, '1900-01-01', date)
+            if history != total:
+                errors += 1
+                print(f'{user} on {date}: history {history} != wire total {total}')
+    return errors
+
+
+async def main():
+    database = await start_database(args.database)
+    await reset_database(database)
+    await database.checkpoint_balance_history(START)
+
+    tic = time.perf_counter()
+    async with contextlib.AsyncExitStack() as stack:
+        if args.buffered:
+            await stack.enter_async_context(database.buffered())
+        await asyncio.gather(*(
+            worker(database, args.num // args.jobs, seed) for seed in range(args.jobs)
+        ))
+    elapsed = time.perf_counter() - tic
+    print(f'{args.num} operations over {args.jobs} tasks: {elapsed:.3f}s, {args.num / elapsed:.0f} ops/s')
+
+    errors = await check(database)
+    print('consistent' if not errors else f'{errors} inconsistencies')
+
+
+asyncio.run(main())
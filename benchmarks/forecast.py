@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Time balance projections over the full loan term, from the database and in memory.
+
+Run against a throwaway database, its content is wiped:
+```shell
+$ createdb loan_benchmark
+$ python benchmarks/forecast.py -n 100
+```
+"""
+import argparse
+import datetime
+import random
+import time
+
+import asyncio
+import logging
+import numpy as np
+
+from loan import Rule, populate_timeline, project_forecast
+from loan.forecast import project
+
+from utils import reset_database, start_database
+
+parser = argparse.ArgumentParser(description="Benchmark the cash-flow forecast")
+parser.add_argument("-n", "--num", type=int, default=100, help="number of recurring rules")
+parser.add_argument("-r", "--repeat", type=int, default=20, help="number of projections")
+parser.add_argument("-d", "--database", default='loan_benchmark', help="throwaway database name")
+args = parser.parse_args()
+# Random rules drive accounts negative, do not log it on every projection.
+logging.getLogger('forecast').setLevel('ERROR')
+
+START = datetime.date(2022, 7, 1)
+WIRES = [('user_1', 'joint'), ('user_2', 'joint'), ('joint', 'user_1'), ('joint', 'user_2'), ('user_1', 'user_2')]
+
+
+def random_rules(num):
+    rng = random.Random(0)
+    rules = []
+    for _ in range(num):
+        start = START + datetime.timedelta(days=rng.randrange(3650))
+        if rng.random() < .5:
+            issuer, recipient = rng.choice(WIRES)
+            rules.append(Rule('wire', issuer, recipient, rng.randrange(1, 1000), start, months=rng.choice([1, 3, 12])))
+        else:
+            rules.append(Rule('purchase', 'joint', 'bank', rng.randrange(1, 100), start, months=rng.choice([1, 3, 12])))
+    return rules
+
+
+async def main():
+    database = await start_database(args.database)
+    await reset_database(database)
+    await populate_timeline(database)
+    rules = random_rules(args.num)
+
+    for frequency in ['monthly', 'daily']:
+        tic = time.perf_counter()
+        for _ in range(args.repeat):
+            projection = await project_forecast(database, rules, START, frequency=frequency)
+        elapsed = (time.perf_counter() - tic) / args.repeat
+        accounts, days = projection.balances.shape
+        print(f'{frequency:>8}: {elapsed * 1e3:6.1f}ms per forecast, {accounts} accounts x {days} dates, {args.num} rules')
+
+    # Projection alone, without the database round trips.
+    records = await database.fetch('''
+        SELECT date, amount, user_1, user_2 FROM timeline WHERE household = $1 AND fill = false
+    ''', database.household_id)
+    timeline = {
+        'date': np.array([record['date'] for record in records], dtype='datetime64[D]'),
+        **{column: np.array([record[column] for record in records]) for column in ['amount', 'user_1', 'user_2']},
+    }
+    tic = time.perf_counter()
+    for _ in range(args.repeat):
+        project(database.household, {}, timeline, rules, START, frequency='daily')
+    print(f'{"project":>8}: {(time.perf_counter() - tic) / args.repeat * 1e3:6.1f}ms per daily projection')
+
+
+asyncio.run(main())
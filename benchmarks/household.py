@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+Measure per-household latency as the number of households grows.
+
+Households are added in steps up to `-n`, each with `-w` synthetic wires,
+and one household is queried after each step:
+```shell
+$ createdb loan_benchmark
+$ python benchmarks/household.py -n 1000 -w 1000
+```
+"""
+import argparse
+import random
+import time
+
+import asyncio
+
+from loan import Household
+
+from utils import reset_database, start_database
+
+parser = argparse.ArgumentParser(description="Benchmark multi-household queries")
+parser.add_argument("-n", "--num", type=int, default=1000, help="number of households")
+parser.add_argument("-w", "--wires", type=int, default=1000, help="number of wire rows per household")
+parser.add_argument("-q", "--queries", type=int, default=200, help="number of queries per step")
+parser.add_argument("-d", "--database", default='loan_benchmark', help="throwaway database name")
+args = parser.parse_args()
+
+MEMBERS = ['alice', 'bob', 'carol', 'dave']
+
+
+async def add_households(database, start, stop):
+    """
+    Create households `start` to `stop` with their synthetic wires, and get databases bound to them.
+    """
+    households = []
+    for i in range(start, stop):
+        households.append(await Household.create(
+            database, f'household_{i}', MEMBERS, {'joint': dict.fromkeys(MEMBERS, 1), 'kids': {'alice': 1, 'bob': 1}}
+        ))
+    await database.execute('''
+        INSERT INTO wire(household, account, date, object, operation, debit, credit)
+        SELECT h, i % 6, '2015-01-01'::date + (i % 3000), 'bank', 'synthetic', i % 1000, (i * 7) % 1000
+        FROM unnest($1::int[]) AS h, generate_series(1, $2) AS i
+    ''', [household.id for household in households], args.wires)
+    await database.execute('''
+        UPDATE balance AS b
+            SET (date, debit, credit, balance) = (w.date, w.debit, w.credit, w.credit - w.debit)
+        FROM (
+            SELECT household, account, MAX(date) AS date, SUM(debit) AS debit, SUM(credit) AS credit
+            FROM wire
+            WHERE household = ANY($1::int[])
+            GROUP BY household, account
+        ) AS w
+        WHERE b.household = w.household AND b.account = w.account
+    ''', [household.id for household in households])
+    await database.execute('ANALYZE wire, balance')
+    return [await database.for_household(household.name) for household in households]
+
+
+async def timeit(name, coroutines):
+    tic = time.perf_counter()
+    for coroutine in coroutines:
+        await coroutine
+    elapsed = time.perf_counter() - tic
+    return f'{name} {elapsed / args.queries * 1e6:7.1f}us'
+
+
+async def main():
+    database = await start_database(args.database)
+    await reset_database(database)
+    rng = random.Random(0)
+    households = []
+    step = 10
+    while len(households) < args.num:
+        stop = min(step, args.num)
+        households += await add_households(database, len(households), stop)
+        picks = [rng.choice(households) for _ in range(args.queries)]
+        results = [
+            await timeit('wire', (bound.wire('alice', 'joint', 10, '2023-06-01') for bound in picks)),
+            await timeit('purchase', (bound.joint_purchase(10, 'bank', date='2023-06-01') for bound in picks)),
+            await timeit('date balance', (bound.get_date_balance('bob', '2022-06-01') for bound in picks)),
+        ]
+        print(f'{len(households):>6} households, {len(households) * args.wires:>9} wires: ' + ', '.join(results))
+        step *= 10
+
+
+asyncio.run(main())
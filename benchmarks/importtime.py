@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""
+Measure the startup cost of the `loan` entry points with `python -X importtime`.
+
+`eager` imports every public name, as `loan/__init__.py` did before names were resolved lazily:
+```shell
+$ python benchmarks/importtime.py -n 20
+```
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+parser = argparse.ArgumentParser(description="Benchmark the package import time")
+parser.add_argument("-n", "--num", type=int, default=20, help="number of interpreter starts per entry point")
+args = parser.parse_args()
+
+ENTRY_POINTS = {
+    'python': 'pass',
+    'eager': 'import loan; [getattr(loan, name) for name in loan.__all__]',
+    'import loan': 'import loan',
+    'loan --help': 'from loan.cli import build_parser; build_parser().format_help()',
+    'loan quote': 'from loan import Loan',
+    'loan timeline_update': 'from loan import DB',
+}
+# Top-level imports have no indentation before the module name, their cumulative times add up.
+IMPORTTIME = re.compile(r'^import time:\s+\d+ \|\s+(\d+) \| \S', re.MULTILINE)
+
+
+def run(code):
+    """
+    Start an interpreter, return its wall time and its total import time, in seconds.
+    """
+    tic = time.perf_counter()
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True, check=True)
+    elapsed = time.perf_counter() - tic
+    return elapsed, sum(map(int, IMPORTTIME.findall(process.stderr))) / 1e6
+
+
+for name, code in ENTRY_POINTS.items():
+    run(code)
+    wall, imports = zip(*(run(code) for _ in range(args.num)))
+    print(f'{name:>24}: {statistics.median(wall) * 1e3:6.1f}ms wall, {statistics.median(imports) * 1e3:6.1f}ms imports')
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Measure bank export import throughput on a synthetic csv export of the joint account.
+
+Run against a throwaway database, its content is wiped:
+```shell
+$ createdb loan_benchmark
+$ python benchmarks/ingest.py -n 1000000
+```
+"""
+import argparse
+import csv
+import datetime
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import asyncio
+
+from loan import import_file
+from loan.ingest import read_csv, to_wires
+from loan.utility import Config
+
+from utils import reset_database, start_database
+
+parser = argparse.ArgumentParser(description="Benchmark bank export import")
+parser.add_argument("-n", "--num", type=int, default=1_000_000, help="number of bank transactions")
+parser.add_argument("-d", "--database", default='loan_benchmark', help="throwaway database name")
+args = parser.parse_args()
+
+LABELS = ['CB IKEA', 'PRLV ASSURANCE HABITATION', 'CB MARKET', 'VIR USER_1', 'VIR USER_2', 'FRAIS TENUE DE COMPTE']
+Config.IMPORT_MAPPING = {
+    'ikea': 'furniture',
+    'assurance': 'insurance',
+    'vir user_1': 'user_1',
+    'vir user_2': 'user_2',
+}
+
+
+def write_export(path):
+    rng = random.Random(0)
+    start = datetime.date(2020, 1, 1)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(['date', 'label', 'amount'])
+        for i in range(args.num):
+            date = start + datetime.timedelta(days=i * 1460 // args.num)
+            label = rng.choice(LABELS)
+            # Small amounts, balances are INT columns.
+            cents = rng.randrange(1, 2000) * (1 if label.startswith('VIR') and i % 2 else -1)
+            writer.writerow([date.isoformat(), label, f'{cents / 100:.2f}'.replace('.', ',')])
+
+
+async def main():
+    database = await start_database(args.database)
+    await reset_database(database)
+    await database.checkpoint_balance_history('2021-01-01')
+    await database.checkpoint_balance_history('2022-01-01')
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = Path(folder) / 'export.csv'
+        write_export(path)
+
+        tic = time.perf_counter()
+        rows = sum(1 for _ in to_wires(read_csv(path, 'joint'), database.household, 'joint'))
+        elapsed = time.perf_counter() - tic
+        print(f'{"parse + split":>16}: {elapsed:.3f}s, {args.num / elapsed:,.0f} transactions/s, {rows} wire rows')
+
+        for name in ['import', 're-import']:
+            tic = time.perf_counter()
+            count = await import_file(database, path, 'joint')
+            elapsed = time.perf_counter() - tic
+            print(f'{name:>16}: {elapsed:.3f}s, {args.num / elapsed:,.0f} transactions/s, {count} rows inserted')
+
+    for user in database.household.names:
+        *_, balance = await database.get_balance(user)
+        total = await database.wire_total(user, '1900-01-01', '2100-01-01')
+        history = await database.get_date_balance(user, '2022-01-01')
+        expected = await database.wire_total(user, '1900-01-01', '2022-01-01')
+        assert balance == total.cents and history == expected, user
+
+
+asyncio.run(main())
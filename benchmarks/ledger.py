@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Compare balance and wire queries served by Postgres and by the local ledger.
+
+Run against a throwaway database, its content is wiped:
+```shell
+$ createdb loan_benchmark
+$ python benchmarks/ledger.py -n 1000000
+```
+"""
+import argparse
+import tempfile
+import time
+
+import asyncio
+
+from loan import Ledger
+
+from utils import reset_database, start_database
+
+parser = argparse.ArgumentParser(description="Benchmark the local ledger")
+parser.add_argument("-n", "--num", type=int, default=1_000_000, help="number of wire rows")
+parser.add_argument("-q", "--queries", type=int, default=1000, help="number of balance queries")
+parser.add_argument("-d", "--database", default='loan_benchmark', help="throwaway database name")
+args = parser.parse_args()
+
+
+async def insert_wires(database, num):
+    await database.execute('''
+        WITH wires AS (
+            INSERT INTO wire(household, account, date, object, operation, debit, credit)
+            SELECT
+                $2,
+                i % 3,
+                '2000-01-01'::date + (i % 9000),
+                (ARRAY['appliances', 'bank', 'furniture', 'insurance'])[1 + i % 4],
+                'synthetic',
+                (i::bigint * 7919) % 1000,
+                (i::bigint * 104729) % 1000
+            FROM generate_series(1, $1) AS i
+            RETURNING household, account, debit, credit
+        )
+        UPDATE balance AS b
+            SET (debit, credit, balance) = (b.debit + d.debit, b.credit + d.credit, b.balance + d.credit - d.debit)
+        FROM (
+            SELECT household, account, SUM(debit) AS debit, SUM(credit) AS credit FROM wires GROUP BY household, account
+        ) AS d
+        WHERE b.household = d.household AND b.account = d.account
+    ''', num, database.household_id)
+
+
+async def timeit(name, coroutine, num=1):
+    tic = time.perf_counter()
+    await coroutine
+    elapsed = time.perf_counter() - tic
+    print(f'{name:>32}: {elapsed:.3f}s' + (f', {elapsed / num * 1e6:.1f}us per query' if num > 1 else ''))
+
+
+async def main():
+    database = await start_database(args.database)
+    await reset_database(database)
+    await insert_wires(database, args.num)
+    await database.rebuild_balance_history()
+    dates = [f'{2000 + i % 24}-{1 + i % 12:02d}-15' for i in range(args.queries)]
+
+    async def database_queries():
+        for date in dates:
+            await database.get_date_balance('user_1', date)
+
+    async def ledger_queries():
+        for date in dates:
+            ledger.get_date_balance('user_1', date)
+
+    async def load(source):
+        async for _ in source.iter_wire('user_1', '2000-01-01', '2030-01-01'):
+            pass
+
+    with tempfile.TemporaryDirectory() as path:
+        ledger = Ledger(path)
+        print(f'{args.num} wire rows')
+        await timeit('full refresh', ledger.refresh(database))
+        await insert_wires(database, 1000)
+        await timeit('incremental refresh, 1000 wires', ledger.refresh(database))
+        await timeit('cold open', asyncio.to_thread(Ledger, path))
+        await timeit('user_1 index', asyncio.to_thread(ledger.index, 'user_1'))
+        await timeit('DB.get_date_balance', database_queries(), args.queries)
+        await timeit('Ledger.get_date_balance', ledger_queries(), args.queries)
+        await timeit('DB.iter_wire', load(database))
+        await timeit('Ledger.iter_wire', load(ledger))
+
+
+asyncio.run(main())
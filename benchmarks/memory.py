@@ -0,0 +1,108 @@
+"""
+In-memory stand-in of `DB`, for benchmark runs without PostgreSQL.
+
+Only the methods used by the benchmark suite are provided, with the same
+semantics, on NumPy columns laid out as in `synthetic.wire_columns`.
+"""
+import datetime
+
+import numpy as np
+
+from loan.utility import Config, Money, parse_date
+
+import synthetic
+
+
+class MemoryDB:
+    """
+    Wire and timeline tables kept in memory, without balance checkpoints.
+    """
+    def __init__(self):
+        self.columns = synthetic.wire_columns(0)
+        self.operations = list(synthetic.OPERATIONS)
+        self.timeline = []
+
+    async def load_wires(self, num: int, years: int = 10):
+        """
+        Replace the wire table by the rows of `synthetic.wire_columns`.
+        """
+        self.columns = synthetic.wire_columns(num, years)
+
+    def append(self, columns):
+        self.columns = {name: np.concatenate((self.columns[name], columns[name])) for name in self.columns}
+
+    async def write_timeline(self, rows, reset: bool = True):
+        """
+        Populate the timeline with (amount, user_1, user_2, date, month, requester) rows, see `DB.write_timeline`.
+        """
+        if reset:
+            self.timeline = []
+        for amount, user_1, user_2, date, month, requester in rows:
+            if user_1 + user_2 != amount:
+                raise ValueError(f'Amounts {user_1} and {user_2} do not sum to {amount}.')
+            self.timeline.append({
+                'id': len(self.timeline) + 1, 'amount': amount, 'user_1': user_1, 'user_2': user_2,
+                'date': parse_date(date), 'fill': False, 'month': month, 'request': requester,
+            })
+
+    async def account_mensuality(self, batch: bool = True):
+        """
+        Record due mensualities, see `DB.account_mensuality`.
+        """
+        today = datetime.date.today()
+        records = [record for record in self.timeline if record['date'] < today and not record['fill']]
+        if not records:
+            return
+        operations = self.operations
+        wires = {name: [] for name in self.columns}
+        for record in records:
+            record['fill'] = True
+            if record['request'] not in operations:
+                operations.append(record['request'])
+            for account, column in enumerate(['amount', 'user_1', 'user_2']):
+                wires['account'].append(account)
+                wires['date'].append(record['date'])
+                wires['object'].append(Config.STACKHOLDERS.index('bank'))
+                wires['operation'].append(operations.index(record['request']))
+                wires['debit'].append(record[column])
+                wires['credit'].append(0)
+        self.append({
+            name: np.array(values, dtype='datetime64[D]' if name == 'date' else np.int64)
+            for name, values in wires.items()
+        })
+
+    def rows(self, user: str, start_date, stop_date):
+        rows = (
+            (self.columns['account'] == Config.DB_USERS.index(user))
+            & (self.columns['date'] >= np.datetime64(parse_date(start_date), 'D'))
+            & (self.columns['date'] < np.datetime64(parse_date(stop_date), 'D'))
+        )
+        rows = np.flatnonzero(rows)
+        return rows[np.argsort(self.columns['date'][rows], kind='stable')]
+
+    async def get_date_balance(self, user: str, date):
+        """
+        Get balance for `user` at specified date, see `DB.get_date_balance`.
+        """
+        rows = self.rows(user, datetime.date.min, date)
+        return Money(int(self.columns['credit'][rows].sum() - self.columns['debit'][rows].sum()))
+
+    async def load_wire(self, user: str, start_date='2022-07-01', stop_date='2050-01-01'):
+        """
+        Get `user` wire history as a list of records, see `DB.load_wire`.
+        """
+        rows = self.rows(user, start_date, stop_date)
+        columns = {name: self.columns[name][rows].tolist() for name in self.columns}
+        return [
+            {
+                'account': user,
+                'date': date,
+                'object': Config.STACKHOLDERS[object],
+                'operation': self.operations[operation],
+                'debit': debit,
+                'credit': credit,
+            }
+            for date, object, operation, debit, credit in zip(
+                columns['date'], columns['object'], columns['operation'], columns['debit'], columns['credit']
+            )
+        ]
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+"""
+Time the main code paths on synthetic ledgers of growing size, and compare runs between commits.
+
+Runs against a throwaway PostgreSQL database, its content is wiped, or in memory
+with `--memory` or when PostgreSQL is not reachable. Results are written as JSON:
+```shell
+$ createdb loan_benchmark
+$ python benchmarks/suite.py -n 1000 100000 10000000 -o main.json
+$ git checkout feature
+$ python benchmarks/suite.py -n 1000 100000 10000000 -o feature.json --compare main.json
+```
+"""
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import asyncio
+
+from loan import Loan, TexHandler, build_timeline, populate_timeline
+
+import synthetic
+from memory import MemoryDB
+from utils import reset_database, start_database
+
+parser = argparse.ArgumentParser(description="Run the benchmark suite")
+parser.add_argument("-n", "--num", type=int, nargs="+", default=[1000, 100_000, 10_000_000], help="numbers of wire rows")
+parser.add_argument("-y", "--years", type=int, default=10, help="years of wire history")
+parser.add_argument("-r", "--repeat", type=int, default=5, help="runs per measure, the fastest is kept")
+parser.add_argument("-q", "--queries", type=int, default=100, help="number of balance queries")
+parser.add_argument("-m", "--memory", action="store_true", help="use the in-memory stand-in instead of PostgreSQL")
+parser.add_argument("-o", "--output", help="JSON file to write results to")
+parser.add_argument("-c", "--compare", help="JSON results of a previous run to compare with")
+parser.add_argument("-t", "--threshold", type=float, default=1.2, help="slowdown ratio reported as a regression")
+parser.add_argument("-d", "--database", default='loan_benchmark', help="throwaway database name")
+args = parser.parse_args()
+
+
+async def measure(function, repeat: int = None):
+    """
+    Get the fastest of `repeat` runs of the coroutine function, in seconds.
+    """
+    timings = []
+    for _ in range(repeat or args.repeat):
+        tic = time.perf_counter()
+        await function()
+        timings.append(time.perf_counter() - tic)
+    return min(timings)
+
+
+async def run_size(database, num: int, memory: bool):
+    """
+    Load `num` synthetic wire rows and time the database and statement code paths.
+    """
+    results = {}
+    tic = time.perf_counter()
+    if memory:
+        await database.load_wires(num, args.years)
+    else:
+        await reset_database(database)
+        await synthetic.load_wires(database, num, args.years)
+    results['load'] = time.perf_counter() - tic
+
+    results['populate_timeline'] = await measure(lambda: populate_timeline(database))
+    timings = []
+    for _ in range(args.repeat):
+        await populate_timeline(database)
+        tic = time.perf_counter()
+        await database.account_mensuality()
+        timings.append(time.perf_counter() - tic)
+    results['account_mensuality'] = min(timings)
+
+    start = synthetic.START
+    days = args.years * 365
+    dates = [start + datetime.timedelta(days=i * days // args.queries) for i in range(args.queries)]
+    timings = []
+    for date in dates:
+        tic = time.perf_counter()
+        await database.get_date_balance('user_1', date)
+        timings.append(time.perf_counter() - tic)
+    results['get_date_balance'] = statistics.median(timings)
+
+    # Last year of history.
+    stop_date = start + datetime.timedelta(days=days)
+    start_date = stop_date - datetime.timedelta(days=365)
+    results['load_wire'] = await measure(lambda: database.load_wire('user_1', start_date, stop_date))
+    records = await database.load_wire('user_1', start_date, stop_date)
+    handler = TexHandler('user_1', start_date, stop_date)
+
+    async def record_to_latex():
+        handler.record_to_latex(records)
+
+    results['record_to_latex'] = await measure(record_to_latex)
+    results['record_to_latex_rows'] = len(records)
+    return results
+
+
+async def run_loan():
+    """
+    Time loan computations, independent of the ledger size.
+    """
+    results = {}
+
+    async def schedule():
+        Loan(100000, 1000, 60).schedule()
+
+    async def timeline():
+        build_timeline(Loan(100000, 1000, 60), Loan(60000, 600, 30), Loan(40000, 400, 30))
+
+    results['Loan.schedule'] = await measure(schedule, 10 * args.repeat)
+    results['build_timeline'] = await measure(timeline, 10 * args.repeat)
+    return results
+
+
+def commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """
+    Print the ratio of each timing to the baseline, and return the number of regressions.
+    """
+    regressions = 0
+    print(f'compared with {baseline["commit"]} ({baseline["backend"]})')
+    for size, timings in results['results'].items():
+        for name, value in timings.items():
+            old = baseline['results'].get(size, {}).get(name)
+            if old is None or name.endswith('_rows') or not old:
+                continue
+            ratio = value / old
+            flag = ''
+            if ratio > args.threshold:
+                flag = ' REGRESSION'
+                regressions += 1
+            print(f'{size:>10} {name:>24}: {old:.6f}s -> {value:.6f}s ({ratio:.2f}x){flag}')
+    return regressions
+
+
+async def main():
+    memory = args.memory
+    if not memory:
+        try:
+            database = await start_database(args.database)
+        except Exception as error:
+            print(f'PostgreSQL not available ({error!r}), running in memory.', file=sys.stderr)
+            memory = True
+    results = {
+        'commit': commit(),
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'backend': 'memory' if memory else 'postgres',
+        'python': platform.python_version(),
+        'config': {'years': args.years, 'repeat': args.repeat, 'queries': args.queries},
+        'results': {},
+    }
+    results['results']['loan'] = await run_loan()
+    for num in args.num:
+        if memory:
+            database = MemoryDB()
+        results['results'][str(num)] = await run_size(database, num, memory)
+        timings = results['results'][str(num)]
+        print(f'{num:>10} rows: ' + ', '.join(
+            f'{name} {value:.4f}s' for name, value in timings.items() if not name.endswith('_rows')
+        ))
+    print('loan: ' + ', '.join(f'{name} {value * 1e3:.3f}ms' for name, value in results['results']['loan'].items()))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            return compare(results, json.load(f))
+    return 0
+
+
+sys.exit(1 if asyncio.run(main()) else 0)
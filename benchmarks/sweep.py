@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+"""
+Measure loan scenario sweep throughput.
+
+```shell
+$ python benchmarks/sweep.py -w 4
+```
+"""
+import argparse
+import time
+
+import numpy as np
+
+from loan import run_sweep
+
+parser = argparse.ArgumentParser(description="Benchmark loan scenario sweep")
+parser.add_argument("-w", "--workers", type=int, default=None, help="number of processes")
+args = parser.parse_args()
+
+
+amounts = np.linspace(50000, 500000, 100)
+annual_rates = np.linspace(0.5, 5, 50) / 100
+lengths = np.arange(5 * 12, 30 * 12 + 1, 12)
+monthly_costs = np.linspace(0, 100, 10)
+percentages = np.linspace(30, 70, 8)
+
+tic = time.perf_counter()
+result = run_sweep(amounts, annual_rates, lengths, monthly_costs, percentages, processing_cost=1000, workers=args.workers)
+toc = time.perf_counter() - tic
+print(f'{result.total_cost.size} scenarios in {toc:.3f}s ({result.total_cost.size / toc:.0f} scenarios/s)')
@@ -0,0 +1,83 @@
+"""
+Deterministic synthetic ledger, generated identically in PostgreSQL and in NumPy.
+
+Rows come in groups of three, one per account of the `default` household. Three groups
+out of four are joint purchases to an external stackholder, split between the users,
+the fourth is a refill of the joint account by both users, so that balances stay
+bounded whatever the number of rows. Amounts are small, balances fit in the BIGINT
+columns of `balance` with a wide margin.
+"""
+import datetime
+
+import numpy as np
+
+from loan.utility import Config
+
+START = datetime.date(2000, 1, 1)
+EXTERNAL = ['appliances', 'bank', 'dosmetic', 'furniture', 'insurance']
+OPERATIONS = ['synthetic', 'wire']
+
+
+def wire_columns(num: int, years: int = 10):
+    """
+    Generate `num` wire rows over `years` years from `START`, rounded down to whole groups.
+
+    Returns
+    -------
+    Dict of arrays: `account`, `object` and `operation` as indices in `Config.DB_USERS`,
+    `Config.STACKHOLDERS` and `OPERATIONS`, `date` as datetime64[D], `debit` and `credit` in cents.
+    """
+    groups = num // 3
+    g = np.repeat(np.arange(groups, dtype=np.int64), 3)
+    k = np.tile(np.arange(3), groups)
+    refill = g % 4 == 0
+    amount = (1 + g * 7919 % 500) * np.where(refill, 3, 1)
+    share = amount * (30 + g % 41) // 100
+    part = np.choose(k, [amount, share, amount - share])
+    external = np.array([Config.STACKHOLDERS.index(object) for object in EXTERNAL])[g % 5]
+    joint_object = np.where(k == 0, Config.STACKHOLDERS.index('user_1'), Config.STACKHOLDERS.index('joint'))
+    return {
+        'account': k,
+        'date': np.datetime64(START, 'D') + g * (years * 365) // max(groups, 1),
+        'object': np.where(refill, joint_object, external),
+        'operation': refill.astype(np.int64),
+        'debit': np.where(refill, 0, part),
+        'credit': np.where(refill, part, 0),
+    }
+
+
+async def load_wires(database, num: int, years: int = 10):
+    """
+    Insert the rows of `wire_columns` into the `wire` table, for the household of `database`,
+    then rebuild balances and checkpoints.
+    """
+    await database.execute('''
+        INSERT INTO wire(household, account, date, object, operation, debit, credit)
+        SELECT
+            $4,
+            k,
+            $3::date + (g * $2 / $1)::int,
+            CASE
+                WHEN refill AND k = 0 THEN 'user_1'
+                WHEN refill THEN 'joint'
+                ELSE (ARRAY['appliances', 'bank', 'dosmetic', 'furniture', 'insurance'])[g % 5 + 1]
+            END,
+            CASE WHEN refill THEN 'wire' ELSE 'synthetic' END,
+            CASE WHEN refill THEN 0 ELSE part END,
+            CASE WHEN refill THEN part ELSE 0 END
+        FROM (
+            SELECT g, k, refill, CASE k
+                WHEN 0 THEN amount
+                WHEN 1 THEN amount * (30 + g % 41) / 100
+                ELSE amount - amount * (30 + g % 41) / 100
+            END AS part
+            FROM (
+                SELECT g, g % 4 = 0 AS refill, (1 + g * 7919 % 500) * CASE WHEN g % 4 = 0 THEN 3 ELSE 1 END AS amount
+                FROM generate_series(0::bigint, $1 - 1) AS g
+            ) AS groups, generate_series(0, 2) AS k
+        ) AS rows
+        ORDER BY g, k
+    ''', num // 3, years * 365, START, database.household_id)
+    await database.execute('ANALYZE wire')
+    await database.rebuild_balance()
+    await database.rebuild_balance_history()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+Time due mensuality lookups on a long, mostly recorded timeline, with and without
+the partial index on unfilled rows, and the delay between a timeline rewrite and
+its due mensualities being recorded by `DB.serve_mensualities`.
+
+Run against a throwaway database, its content is wiped:
+```shell
+$ createdb loan_benchmark
+$ python benchmarks/timeline_daemon.py -n 1000000
+```
+"""
+import argparse
+import datetime
+import statistics
+import time
+
+import asyncio
+
+from utils import reset_database, start_database
+
+parser = argparse.ArgumentParser(description="Benchmark the timeline_update daemon")
+parser.add_argument("-n", "--num", type=int, default=1_000_000, help="number of timeline rows")
+parser.add_argument("-r", "--repeat", type=int, default=20, help="number of lookups and rewrites")
+parser.add_argument("-d", "--database", default='loan_benchmark', help="throwaway database name")
+args = parser.parse_args()
+
+TODAY = datetime.date.today()
+
+
+async def measure(function):
+    timings = []
+    for _ in range(args.repeat):
+        tic = time.perf_counter()
+        await function()
+        timings.append(time.perf_counter() - tic)
+    return statistics.median(timings)
+
+
+async def lookups(database):
+    for name, function in [
+        ('account_mensuality', database.account_mensuality),
+        ('next_mensuality', database.next_mensuality),
+    ]:
+        print(f'{name:>20}: {await measure(function) * 1e3:.3f}ms')
+
+
+async def main():
+    database = await start_database(args.database)
+    await reset_database(database)
+
+    # Half of the schedule is in the past, and recorded before timing.
+    start = TODAY - datetime.timedelta(days=args.num // 2)
+    await database.write_timeline([
+        (1000, 500, 500, start + datetime.timedelta(days=i), i % 30000 + 1, 'loan') for i in range(args.num)
+    ])
+    await database.account_mensuality()
+    await database.execute('ANALYZE timeline')
+
+    print(f'{args.num} timeline rows, {args.num // 2} recorded')
+    print('with timeline_due_idx')
+    await lookups(database)
+    await database.execute('DROP INDEX timeline_due_idx')
+    print('without index')
+    await lookups(database)
+    await database.execute('CREATE INDEX timeline_due_idx ON timeline (household, date, id) WHERE NOT fill')
+
+    # Each rewrite adds a mensuality already due, the daemon is woken by NOTIFY.
+    daemon = asyncio.create_task(database.serve_mensualities())
+    await asyncio.sleep(0.1)
+    timings = []
+    for i in range(args.repeat):
+        *_, balance = await database.get_balance('joint')
+        tic = time.perf_counter()
+        await database.write_timeline([(100, 50, 50, TODAY - datetime.timedelta(days=1), i + 1, 'fee')], reset=False)
+        while (await database.get_balance('joint'))[-1] == balance:
+            await asyncio.sleep(0.001)
+        timings.append(time.perf_counter() - tic)
+    daemon.cancel()
+    print(f'rewrite to recorded: {statistics.median(timings) * 1e3:.3f}ms median, {max(timings) * 1e3:.3f}ms max')
+
+
+asyncio.run(main())
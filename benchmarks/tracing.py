@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""
+Measure the cost of instrumentation, with tracing disabled and enabled.
+
+A no-op instrumented method isolates the Python overhead, `DB.get_balance` shows it
+next to a database round trip:
+```shell
+$ createdb loan_benchmark
+$ python benchmarks/tracing.py -n 10000
+```
+"""
+import argparse
+import time
+
+import asyncio
+
+from loan import trace
+
+from utils import reset_database, start_database
+
+parser = argparse.ArgumentParser(description="Benchmark the instrumentation overhead")
+parser.add_argument("-n", "--num", type=int, default=10_000, help="number of calls")
+parser.add_argument("-d", "--database", default='loan_benchmark', help="throwaway database name")
+args = parser.parse_args()
+
+
+class Plain:
+    async def noop(self):
+        pass
+
+
+@trace.instrument
+class Instrumented(Plain):
+    async def noop(self):
+        pass
+
+
+async def timeit(name, function):
+    tic = time.perf_counter()
+    for _ in range(args.num):
+        await function()
+    elapsed = time.perf_counter() - tic
+    print(f'{name:>36}: {elapsed / args.num * 1e6:7.2f}us per call')
+
+
+async def main():
+    database = await start_database(args.database)
+    await reset_database(database)
+    await timeit('no-op', Plain().noop)
+    await timeit('instrumented no-op, disabled', Instrumented().noop)
+    await timeit('DB.get_balance, disabled', lambda: database.get_balance('joint'))
+    with trace.tracing() as tracer:
+        await timeit('instrumented no-op, tracing', Instrumented().noop)
+        await timeit('DB.get_balance, tracing', lambda: database.get_balance('joint'))
+    stat = tracer.summary()['DB.get_balance']
+    print(f'DB.get_balance: {stat["round_trips"] / stat["calls"]:.0f} round trips per call, '
+          f'p50 {stat["p50"] * 1e6:.0f}us, p99 {stat["p99"] * 1e6:.0f}us')
+
+
+asyncio.run(main())
@@ -0,0 +1,36 @@
+import logging
+
+from loan import DB
+from loan.utility import Config
+
+logging.basicConfig(
+    format="{asctime} {levelname} [{name}:{lineno}] {message}",
+    style='{',
+    datefmt='%H:%M:%S',
+    level='WARNING',
+    handlers=[
+        logging.StreamHandler(),
+    ],
+)
+for name in ['db', 'household', 'latex', 'statement']:
+    logging.getLogger(name).setLevel('WARNING')
+
+
+async def start_database(name='loan_benchmark'):
+    """
+    Connect to the throwaway benchmark database `name`.
+    """
+    Config.DB_NAME = name
+    database = DB()
+    await database.start()
+    return database
+
+
+async def reset_database(database):
+    """
+    Wipe the benchmark database and initialize an empty schema.
+    """
+    await database.execute('DROP SCHEMA public CASCADE; CREATE SCHEMA public;')
+    await database.init()
+    # Types are recreated, drop connections holding statements prepared on the old ones.
+    await database.pool.expire_connections()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Compare Python-side and SQL-side wire aggregation on a synthetic ledger.
+
+Run against a throwaway database, its content is wiped:
+```shell
+$ createdb loan_benchmark
+$ python benchmarks/wire_queries.py -n 10000000
+```
+"""
+import argparse
+import time
+
+import asyncio
+
+from utils import reset_database, start_database
+
+parser = argparse.ArgumentParser(description="Benchmark wire queries")
+parser.add_argument("-n", "--num", type=int, default=10_000_000, help="number of wire rows")
+parser.add_argument("-d", "--database", default='loan_benchmark', help="throwaway database name")
+args = parser.parse_args()
+
+
+async def timeit(name, coroutine):
+    tic = time.perf_counter()
+    await coroutine
+    print(f'{name:>24}: {time.perf_counter() - tic:.3f}s')
+
+
+async def python_total(database, user, start_date, stop_date):
+    records = await database.load_wire(user, start_date, stop_date)
+    return sum(record['credit'] - record['debit'] for record in records)
+
+
+async def run(database, start_date, stop_date):
+    await timeit('load_wire + python sum', python_total(database, 'user_1', start_date, stop_date))
+    await timeit('wire_total', database.wire_total('user_1', start_date, stop_date))
+    await timeit('wire_monthly_totals', database.wire_monthly_totals('user_1', start_date, stop_date))
+    await timeit('wire_object_totals', database.wire_object_totals('user_1', start_date, stop_date))
+
+
+async def main():
+    database = await start_database(args.database)
+    await reset_database(database)
+    await database.execute('''
+        INSERT INTO wire(household, account, date, object, operation, debit, credit)
+        SELECT
+            $2,
+            i % 3,
+            '2000-01-01'::date + (i % 18250),
+            (ARRAY['appliances', 'bank', 'furniture', 'insurance'])[1 + i % 4],
+            'synthetic',
+            (i::bigint * 7919) % 10000,
+            (i::bigint * 104729) % 10000
+        FROM generate_series(1, $1) AS i
+    ''', args.num, database.household_id)
+    await database.execute('ANALYZE wire')
+    print(f'{args.num} wire rows, one year of user_1 history')
+
+    print('without index')
+    await database.execute('DROP INDEX wire_account_date_idx')
+    await run(database, '2020-01-01', '2021-01-01')
+
+    print('with index')
+    await database.execute('CREATE INDEX wire_account_date_idx ON wire (household, account, date, id)')
+    await database.execute('ANALYZE wire')
+    await run(database, '2020-01-01', '2021-01-01')
+
+asyncio.run(main())
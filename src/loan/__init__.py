@@ -1,11 +1,49 @@
+"""
+Submodules are imported on first attribute access, e.g. `from loan import Loan`
+does not import asyncpg, and `from loan import DB` does not import numpy.
+"""
+import importlib
 
-from .db import DB
-from .latex import (
-    compile_latex,
-    parse_latex_date
-)
-from .loan import (
-    Loan, 
-    populate_timeline
-)
-from .statement import TexHandler
+# Public name to the submodule defining it.
+EXPORTS = {
+    'Discrepancy': 'audit',
+    'run_audit': 'audit',
+    'WriteBuffer': 'buffer',
+    'DB': 'db',
+    'Forecast': 'forecast',
+    'Rule': 'forecast',
+    'project_forecast': 'forecast',
+    'Household': 'household',
+    'import_file': 'ingest',
+    'Ledger': 'ledger',
+    'compile_latex': 'latex',
+    'compile_latex_async': 'latex',
+    'parse_latex_date': 'latex',
+    'statement_path': 'latex',
+    'Loan': 'loan',
+    'Schedule': 'loan',
+    'build_timeline': 'loan',
+    'populate_timeline': 'loan',
+    'TexHandler': 'statement',
+    'stream_tex_periods': 'statement',
+    'SweepResult': 'sweep',
+    'run_sweep': 'sweep',
+    'Money': 'utility',
+}
+
+__all__ = list(EXPORTS)
+
+
+def __getattr__(name):
+    if name not in EXPORTS:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    module = importlib.import_module(f'.{EXPORTS[name]}', __name__)
+    # Bind every name of the submodule.
+    for export, source in EXPORTS.items():
+        if source == EXPORTS[name]:
+            globals()[export] = getattr(module, export)
+    return globals()[name]
+
+
+def __dir__():
+    return sorted(set(globals()) | set(EXPORTS))
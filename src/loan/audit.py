@@ -0,0 +1,334 @@
+import datetime
+import io
+import logging
+from typing import NamedTuple
+
+import numpy as np
+
+from .utility import (
+    Config,
+    Money
+)
+
+log = logging.getLogger('audit')
+log.setLevel('INFO')
+
+EPOCH = datetime.date(1970, 1, 1)
+
+
+class Discrepancy(NamedTuple):
+    """
+    Broken invariant, with the ids of the offending rows if any.
+    """
+    check: str
+    message: str
+    ids: list = ()
+
+    def __str__(self):
+        ids = ''
+        if self.ids:
+            ids = ', '.join(map(str, self.ids[:10])) + (', ...' if len(self.ids) > 10 else '')
+            ids = f' (ids {ids})'
+        return f'[{self.check}] {self.message}{ids}'
+
+
+async def copy_columns(connection, sql, *args, columns):
+    """
+    Read query results as numpy columns, through a binary COPY.
+
+    Parameters
+    ----------
+    columns: dict
+        Column name to integer dtype, e.g. 'i4' or 'i8', in query order.
+        Values should not be NULL, a NULL or a value of another width raises ValueError.
+    """
+    buffer = io.BytesIO()
+    await connection.copy_from_query(sql, *args, output=buffer, format='binary')
+    data = buffer.getvalue()
+    # Rows are a field count, then a length and a big-endian value per field.
+    dtype = np.dtype([('count', '>i2')] + [
+        field for name, type in columns.items() for field in [(f'{name}_length', '>i4'), (name, f'>{type}')]
+    ])
+    # Skip the 19 bytes header and the 2 bytes trailer.
+    if (len(data) - 21) % dtype.itemsize:
+        log.error(f'Query rows do not have the widths of columns {list(columns)}.')
+        raise ValueError
+    rows = np.frombuffer(data, dtype=dtype, offset=19, count=(len(data) - 21) // dtype.itemsize)
+    # A NULL has length -1 and no value, it would shift every later row.
+    if (rows['count'] != len(columns)).any():
+        log.error(f'Query rows do not have {len(columns)} columns.')
+        raise ValueError
+    for name in columns:
+        if (rows[f'{name}_length'] != dtype[name].itemsize).any():
+            log.error(f'Column {name} holds NULL values or values of another width.')
+            raise ValueError
+    return {name: rows[name].astype(np.int64) for name in columns}
+
+
+async def load_tables(database):
+    """
+    Load the `wire`, `balance`, `balance_history` and `timeline` rows of the database household as columnar arrays.
+
+    Dates are days since 1970-01-01, accounts are ids, indices in `Household.names`,
+    objects are indices in `Household.objects` followed by the other wire objects,
+    requesters indices in `Config.REQUESTERS`, -1 if missing.
+    Wire operations are codes in the distinct operations, 0 if missing, and `request`
+    is the index of the operation in `Config.REQUESTERS`, -1 if it is not a requester.
+    NULL timeline values are read as 0, and counted per row in the `nulls` column,
+    other tables have NOT NULL columns.
+    """
+    household = database.loaded_household()
+    # Labels are encoded by hash joins with the lists of their values.
+    queries = {
+        'wire': ('''
+            SELECT
+                w.id,
+                w.account::int,
+                w.date - DATE '1970-01-01',
+                COALESCE(s.code - 1, -1)::int,
+                COALESCE(o.code, 0)::int,
+                w.debit,
+                w.credit
+            FROM wire AS w
+            LEFT JOIN unnest($2::text[]) WITH ORDINALITY AS s(object, code) ON s.object = w.object
+            LEFT JOIN unnest($3::text[]) WITH ORDINALITY AS o(operation, code) ON o.operation = w.operation
+            WHERE w.household = $1
+        ''', dict(id='i8', account='i4', date='i4', object='i4', operation='i4', debit='i8', credit='i8')),
+        'balance': ('''
+            SELECT account::int, debit, credit, balance
+            FROM balance
+            WHERE household = $1
+        ''', dict(account='i4', debit='i8', credit='i8', balance='i8')),
+        'balance_history': ('''
+            SELECT account::int, date - DATE '1970-01-01', balance
+            FROM balance_history
+            WHERE household = $1
+        ''', dict(account='i4', date='i4', balance='i8')),
+        'timeline': ('''
+            SELECT
+                t.id,
+                COALESCE(t.amount, 0),
+                COALESCE(t.user_1, 0),
+                COALESCE(t.user_2, 0),
+                COALESCE(t.date - DATE '1970-01-01', 0),
+                COALESCE(t.fill, false)::int,
+                COALESCE(r.code - 1, -1)::int,
+                num_nulls(t.amount, t.user_1, t.user_2, t.date, t.fill)
+            FROM timeline AS t
+            LEFT JOIN unnest($2::requester[]) WITH ORDINALITY AS r(request, code) ON r.request = t.request
+            WHERE t.household = $1
+        ''', dict(id='i4', amount='i4', user_1='i4', user_2='i4', date='i4', fill='i4', request='i4', nulls='i4')),
+    }
+    tables = {}
+    # All tables are read from the same snapshot.
+    async with database.transaction(isolation='repeatable_read') as connection:
+        operations = [record['operation'] for record in await connection.fetch('''
+            SELECT DISTINCT operation FROM wire WHERE household = $1 AND operation IS NOT NULL
+        ''', household.id)]
+        objects = household.objects + sorted(set(record['object'] for record in await connection.fetch('''
+            SELECT DISTINCT object FROM wire WHERE household = $1 AND object IS NOT NULL
+        ''', household.id)) - set(household.objects))
+        args = {
+            'wire': [household.id, objects, operations],
+            'balance': [household.id],
+            'balance_history': [household.id],
+            'timeline': [household.id, Config.REQUESTERS],
+        }
+        for name, (sql, columns) in queries.items():
+            tables[name] = await copy_columns(connection, sql, *args[name], columns=columns)
+    requests = np.array([-1] + [
+        Config.REQUESTERS.index(operation) if operation in Config.REQUESTERS else -1 for operation in operations
+    ])
+    tables['wire']['request'] = requests[tables['wire']['operation']]
+    tables['timeline']['fill'] = tables['timeline']['fill'].astype(bool)
+    log.info(f'Loaded {len(tables["wire"]["id"])} wires and {len(tables["timeline"]["id"])} timeline rows.')
+    return tables
+
+
+def sum_by(keys, values, size):
+    """
+    Sum `values` per integer key in [0, size).
+    """
+    # Float sums are exact below 2**53 cents.
+    return np.bincount(keys, weights=values, minlength=size).astype(np.int64)
+
+
+def pack(*columns):
+    """
+    Combine integer columns into one int64 key per row, equal keys meaning equal rows.
+    """
+    key = np.zeros(len(columns[0]), dtype=np.int64)
+    radix = 1
+    for column in columns:
+        low = column.min()
+        size = int(column.max() - low + 1)
+        radix *= size
+        if radix >= 2 ** 62:
+            # Too many distinct values to pack, fall back to a slower row-wise unique.
+            return np.unique(np.stack(columns, axis=1), axis=0, return_inverse=True)[1].ravel()
+        key = key * size + (column - low)
+    return key
+
+
+def check_nulls(tables):
+    """
+    Check that `timeline` values are not NULL.
+    """
+    rows = tables['timeline']['nulls'] > 0
+    if not rows.any():
+        return []
+    return [Discrepancy(
+        'null', f'{rows.sum()} timeline rows with NULL values, read as 0.', tables['timeline']['id'][rows].tolist()
+    )]
+
+
+def check_balance(wire, balance, household):
+    """
+    Check that the `balance` table is the sum of `wire` per account.
+    """
+    size = len(household.names)
+    debit = sum_by(wire['account'], wire['debit'], size)
+    credit = sum_by(wire['account'], wire['credit'], size)
+    discrepancies = []
+    for account, table_debit, table_credit, table_balance in zip(
+        balance['account'], balance['debit'], balance['credit'], balance['balance']
+    ):
+        user = household.names[account]
+        if table_balance != table_credit - table_debit:
+            discrepancies.append(Discrepancy(
+                'balance', f'{user} balance {Money(table_balance)} is not credit {Money(table_credit)} minus debit {Money(table_debit)}.'
+            ))
+        if (table_debit, table_credit) != (debit[account], credit[account]):
+            discrepancies.append(Discrepancy(
+                'balance', f'{user} debit {Money(table_debit)} and credit {Money(table_credit)} '
+                f'differ from wire totals {Money(debit[account])} and {Money(credit[account])}.'
+            ))
+    return discrepancies
+
+
+def check_balance_history(wire, history, household):
+    """
+    Check that `balance_history` checkpoints are the sum of the earlier wires.
+    """
+    discrepancies = []
+    for account, user in enumerate(household.names):
+        rows = wire['account'] == account
+        order = np.argsort(wire['date'][rows], kind='stable')
+        dates = wire['date'][rows][order]
+        balances = np.concatenate(([0], np.cumsum((wire['credit'] - wire['debit'])[rows][order])))
+        checkpoints = history['account'] == account
+        expected = balances[np.searchsorted(dates, history['date'][checkpoints])]
+        for date, balance, value in zip(history['date'][checkpoints], history['balance'][checkpoints], expected):
+            if balance != value:
+                date = EPOCH + datetime.timedelta(days=int(date))
+                discrepancies.append(Discrepancy(
+                    'balance_history', f'{user} checkpoint on {date} is {Money(balance)} instead of {Money(value)}.'
+                ))
+    return discrepancies
+
+
+def check_timeline_amounts(timeline):
+    """
+    Check that each `timeline` row is split between the two users.
+    """
+    rows = timeline['user_1'] + timeline['user_2'] != timeline['amount']
+    if not rows.any():
+        return []
+    return [Discrepancy(
+        'timeline', f'{rows.sum()} timeline rows where user_1 + user_2 differs from amount.', timeline['id'][rows].tolist()
+    )]
+
+
+def check_joint_split(wire, household):
+    """
+    Check that joint account payments are split between the individual accounts.
+
+    Wires to external stackholders are grouped by date, object and operation,
+    in groups with a joint account wire, the joint amounts should equal the sum
+    of the individual amounts.
+    """
+    users = [household.objects.index(user) for user in household.names]
+    rows = ~np.isin(wire['object'], users)
+    if not rows.any():
+        return []
+    keys = pack(wire['date'][rows], wire['object'][rows], wire['operation'][rows])
+    keys, first, groups = np.unique(keys, return_index=True, return_inverse=True)
+    joint = np.isin(wire['account'][rows], [account.id for account in household.accounts.values() if account.joint])
+    amounts = (wire['credit'] - wire['debit'])[rows]
+    joint_amounts = sum_by(groups, np.where(joint, amounts, 0), len(keys))
+    individual_amounts = sum_by(groups, np.where(joint, 0, amounts), len(keys))
+    has_joint = np.bincount(groups, weights=joint, minlength=len(keys)) > 0
+
+    discrepancies = []
+    order = np.argsort(groups, kind='stable')
+    bounds = np.searchsorted(groups[order], np.arange(len(keys) + 1))
+    ids = wire['id'][rows][order]
+    for group in np.flatnonzero(has_joint & (joint_amounts != individual_amounts)):
+        date = EPOCH + datetime.timedelta(days=int(wire['date'][rows][first[group]]))
+        discrepancies.append(Discrepancy(
+            'joint_split', f'joint amount {Money(joint_amounts[group])} on {date} '
+            f'differs from individual amounts {Money(individual_amounts[group])}.',
+            sorted(ids[bounds[group]:bounds[group + 1]].tolist())
+        ))
+    return discrepancies
+
+
+def check_timeline_wires(wire, timeline, household):
+    """
+    Check that each filled `timeline` row has its three `bank` wires, see `Household.loan_accounts`.
+
+    Timeline rows and wires are matched as multisets on (date, requester, account, amount).
+    """
+    filled = timeline['fill']
+    if not filled.any():
+        return []
+    accounts = household.loan_accounts()
+    expected = np.concatenate([
+        np.stack([
+            timeline['date'][filled],
+            timeline['request'][filled],
+            np.full(filled.sum(), account),
+            -timeline[column][filled],
+        ], axis=1)
+        for account, column in zip(accounts, ['amount', 'user_1', 'user_2'])
+    ])
+    rows = (wire['request'] >= 0) & (wire['object'] == household.objects.index('bank'))
+    recorded = np.stack([
+        wire['date'][rows],
+        wire['request'][rows],
+        wire['account'][rows],
+        (wire['credit'] - wire['debit'])[rows],
+    ], axis=1)
+
+    keys, inverse = np.unique(pack(*np.concatenate([expected, recorded]).T), return_inverse=True)
+    counts = np.bincount(inverse, weights=np.r_[np.ones(len(expected)), -np.ones(len(recorded))], minlength=len(keys))
+    missing = counts[inverse[:len(expected)]] > 0
+    if not missing.any():
+        return []
+    ids = np.tile(timeline['id'][filled], len(accounts))[missing]
+    return [Discrepancy(
+        'timeline_wire', f'{int(counts[counts > 0].sum())} wires missing for filled timeline rows.', np.unique(ids).tolist()
+    )]
+
+
+async def run_audit(database):
+    """
+    Check the database invariants.
+
+    Returns
+    -------
+    List of Discrepancy, empty if the database is consistent.
+    """
+    household = database.loaded_household()
+    tables = await load_tables(database)
+    wire = tables['wire']
+    discrepancies = [
+        *check_nulls(tables),
+        *check_balance(wire, tables['balance'], household),
+        *check_balance_history(wire, tables['balance_history'], household),
+        *check_timeline_amounts(tables['timeline']),
+        *check_joint_split(wire, household),
+        *check_timeline_wires(wire, tables['timeline'], household),
+    ]
+    log.info(f'Audit found {len(discrepancies)} discrepancies.')
+    return discrepancies
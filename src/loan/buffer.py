@@ -0,0 +1,126 @@
+import asyncio
+import logging
+
+from . import trace
+from .utility import Config
+
+log = logging.getLogger('buffer')
+log.setLevel('INFO')
+
+
+class WriteBuffer:
+    """
+    Write-behind buffer group committing wires submitted by concurrent callers, see `DB.buffered`.
+
+    A single task flushes pending submissions in one transaction with `DB.write_wires`,
+    once `size` wire rows are pending or `delay` seconds after the first one. Each submission
+    is committed atomically, and its caller resumes once the transaction is committed.
+    Callers wait while `capacity` submissions are pending. Submissions left
+    when the buffer stops, e.g. when its task is cancelled, raise RuntimeError.
+    """
+    def __init__(self, database, size: int = None, delay: float = None, capacity: int = None):
+        self.database = database
+        self.size = Config.WRITE_BUFFER_SIZE if size is None else size
+        self.delay = Config.WRITE_BUFFER_DELAY if delay is None else delay
+        self.queue = asyncio.Queue(Config.WRITE_BUFFER_CAPACITY if capacity is None else capacity)
+        self.closed = False
+        self.task = asyncio.create_task(self.run())
+
+    async def submit(self, wires):
+        """
+        Queue wire rows and wait until they are committed.
+
+        Parameters
+        ----------
+        wires: list of tuples
+            (household, account, date, object, operation, debit, credit) with amounts in cents,
+            committed together, see `DB.wire_rows`.
+        """
+        if self.closed:
+            raise RuntimeError('Write buffer is closed.')
+        if not wires:
+            return
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((wires, future))
+        # The buffer may have stopped while waiting for room in the queue, nothing reads it anymore.
+        if self.closed and self.task.done() and not future.done():
+            future.set_exception(RuntimeError('Write buffer is closed.'))
+        await future
+
+    async def close(self):
+        """
+        Flush pending submissions and stop the flushing task.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        await self.queue.put(None)
+        await self.task
+
+    async def run(self):
+        # Flushes use their own connection, even if the buffer was started within a unit of work.
+        self.database.connection.set(None)
+        loop = asyncio.get_running_loop()
+        closing = False
+        batch = []
+        try:
+            while not closing:
+                item = await self.queue.get()
+                if item is None:
+                    break
+                batch, rows = [item], len(item[0])
+                deadline = loop.time() + self.delay
+                while rows < self.size:
+                    try:
+                        item = self.queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        try:
+                            item = await asyncio.wait_for(self.queue.get(), timeout)
+                        except asyncio.TimeoutError:
+                            break
+                    if item is None:
+                        closing = True
+                        break
+                    batch.append(item)
+                    rows += len(item[0])
+                await self.flush(batch)
+        finally:
+            # Submissions of a cancelled flush, or queued after `close`, are never committed.
+            self.closed = True
+            while not self.queue.empty():
+                item = self.queue.get_nowait()
+                if item is not None:
+                    batch.append(item)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError('Write buffer is closed.'))
+
+    async def flush(self, batch):
+        """
+        Commit a batch of submissions in one transaction, and resolve their callers.
+
+        If the transaction fails, submissions are retried one by one, so that
+        only the failing ones are reported to their callers.
+        """
+        try:
+            with trace.span('WriteBuffer.flush'):
+                async with self.database.transaction() as connection:
+                    await self.database.write_wires(connection, [wire for wires, _ in batch for wire in wires])
+        except Exception as error:
+            if len(batch) > 1:
+                log.warning(f'Group commit of {len(batch)} submissions failed, retrying them one by one.')
+                for item in batch:
+                    await self.flush([item])
+                return
+            _, future = batch[0]
+            if not future.done():
+                future.set_exception(error)
+            return
+        for _, future in batch:
+            # Callers may have been cancelled while waiting.
+            if not future.done():
+                future.set_result(None)
+        log.debug(f'Committed {len(batch)} submissions.')
@@ -0,0 +1,95 @@
+import hashlib
+import logging
+import os
+from pathlib import Path
+import shutil
+import time
+
+from .utility import Config
+
+log = logging.getLogger('cache')
+log.setLevel('INFO')
+
+
+class StatementCache:
+    """
+    Content-addressed store of compiled pdf statements.
+
+    Statements are keyed by the hash of their tex sources, so that an unchanged
+    statement is copied from the cache instead of being compiled again. Entries
+    are copies, never links, so that editing a delivered statement leaves the cache intact.
+    """
+    def __init__(self, path=None, max_size: int = None, max_age: float = None):
+        """
+        Parameters
+        ----------
+        path: Path
+            Cache folder, default to `Config.CACHE_PATH`, or `.cache` inside `Config.TARGET_PATH`.
+        max_size: int
+            Maximal cache size in bytes, default to `Config.CACHE_MAX_SIZE`.
+        max_age: float
+            Maximal number of days since last use, default to `Config.CACHE_MAX_AGE`.
+        """
+        self.path = Path(path or Config.CACHE_PATH or Config.TARGET_PATH / '.cache')
+        self.max_size = Config.CACHE_MAX_SIZE if max_size is None else max_size
+        self.max_age = Config.CACHE_MAX_AGE if max_age is None else max_age
+
+    @staticmethod
+    def key(*paths):
+        """
+        Hash the content of the tex source files.
+        """
+        digest = hashlib.sha256()
+        for path in paths:
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, key: str, dest):
+        """
+        Place the cached statement `key` at `dest`, return False if it is not cached.
+        """
+        cached = self.path / f'{key}.pdf'
+        if not cached.exists():
+            return False
+        self.copy(cached, Path(dest))
+        # Record the use for eviction.
+        os.utime(cached)
+        log.info(f'Reused cached statement for {dest}.')
+        return True
+
+    def put(self, key: str, pdf):
+        """
+        Store the statement `pdf` under `key`, then evict old entries.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.copy(Path(pdf), self.path / f'{key}.pdf')
+        self.evict()
+
+    @staticmethod
+    def copy(source: Path, dest: Path):
+        """
+        Copy `source` to `dest`, through a temporary file so that `dest` is never partially written.
+        """
+        temporary = dest.with_name(f'.{dest.name}.{os.getpid()}.tmp')
+        shutil.copyfile(source, temporary)
+        os.replace(temporary, dest)
+
+    def evict(self):
+        """
+        Remove entries unused for `max_age` days, then least recently used ones above `max_size`.
+        """
+        entries = []
+        for path in self.path.glob('*.pdf'):
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        deadline = time.time() - self.max_age * 24 * 3600
+        size = sum(entry[1] for entry in entries)
+        for mtime, file_size, path in entries:
+            if mtime >= deadline and size <= self.max_size:
+                break
+            path.unlink()
+            size -= file_size
+            log.debug(f'Evicted {path.name} from statement cache.')
@@ -0,0 +1,308 @@
+"""
+Consolidated `loan` command line, one subcommand per script.
+
+Subcommands import what they need when they run, so that a cron-driven
+`loan timeline_update` does not pay for numpy, and `loan quote` for asyncpg.
+"""
+import argparse
+import contextlib
+import os
+import sys
+import types
+
+from .utility import Config, Money
+
+
+async def start_database(args):
+    from .db import DB
+
+    database = DB(args.household)
+    await database.start()
+    return database
+
+
+async def init_db(args):
+    database = await start_database(args)
+    await database.init()
+
+
+async def migrate_db(args):
+    database = await start_database(args)
+    await database.migrate()
+
+
+async def init_timeline(args):
+    from .loan import populate_timeline
+
+    database = await start_database(args)
+    await populate_timeline(database)
+
+
+async def timeline_update(args):
+    database = await start_database(args)
+    if not args.daemon:
+        await database.account_mensuality()
+        return
+
+    import asyncio
+    import signal
+
+    # Stop cleanly on SIGTERM, e.g. from systemd, as on Ctrl-C.
+    task = asyncio.create_task(database.serve_mensualities())
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+
+
+async def import_wires(args):
+    from .ingest import import_file
+
+    database = await start_database(args)
+    for path in args.paths:
+        await import_file(database, path, args.account, args.percentage, args.date_format, args.batch)
+
+
+async def audit_db(args):
+    from .audit import run_audit
+
+    database = await start_database(args)
+    discrepancies = await run_audit(database)
+    for discrepancy in discrepancies:
+        print(discrepancy)
+    if args.rebuild:
+        await database.rebuild_balance()
+        await database.rebuild_balance_history()
+        discrepancies = await run_audit(database)
+    return bool(discrepancies)
+
+
+async def forecast(args):
+    from .forecast import project_forecast
+
+    database = await start_database(args)
+    projection = await project_forecast(database, stop=args.stop, frequency=args.frequency)
+    print('date', *projection.accounts, sep='\t')
+    for date, balances in zip(projection.dates.tolist(), projection.balances.T.tolist()):
+        print(date, *(Money.format(balance) for balance in balances), sep='\t')
+    return any(projection.negative.values())
+
+
+def quote(args):
+    from .loan import Loan
+
+    loan = Loan(
+        args.amount, args.processing_cost, args.monthly_cost,
+        annual_rate=None if args.rate is None else args.rate / 100,
+        length=args.length, deferral=args.deferral, capitalize=args.capitalize,
+    )
+    print(f'monthly repay: {loan.monthly_repay:.2f}')
+    print(f'total cost: {loan.total_cost:.2f}')
+
+
+async def get_date_balance(database, user, date):
+    from .ledger import Ledger
+
+    if isinstance(database, Ledger):
+        return database.get_date_balance(user, date)
+    return await database.get_date_balance(user, date)
+
+
+async def user_statement(database, user, start_date, stop_date, semaphore, args):
+    import tempfile
+
+    from . import trace
+    from .latex import compile_latex_async, statement_path
+    from .statement import TexHandler
+
+    handler = TexHandler(user, start_date, stop_date)
+    with trace.span('statement.balance'):
+        balance = await get_date_balance(database, user, start_date)
+    if args.format != 'tex':
+        records = database.iter_wire(user, start_date, stop_date)
+        with trace.span('statement.render'), open(statement_path(user, stop_date, args.format), 'w', newline='') as f:
+            await handler.render_async(records, f, balance, args.format)
+        return
+    build_path = tempfile.TemporaryDirectory(prefix=f'loan_{user}_')
+    try:
+        records = database.iter_wire(user, start_date, stop_date)
+        with trace.span('statement.tex'):
+            await handler.stream_tex_file(records, balance, build_path.name)
+        await compile_latex_async(user, stop_date, build_path.name, semaphore)
+    finally:
+        with trace.span('statement.clean'):
+            build_path.cleanup()
+
+
+async def user_backfill(database, user, periods, semaphore, args):
+    import asyncio
+    import shutil
+    import tempfile
+
+    from . import trace
+    from .latex import compile_latex_async, statement_path
+    from .statement import stream_tex_periods
+
+    start_date, stop_date = periods[0][0], periods[-1][1]
+    with trace.span('statement.balance'):
+        balance = await get_date_balance(database, user, start_date)
+    path = tempfile.TemporaryDirectory(prefix=f'loan_{user}_')
+    try:
+        records = database.iter_wire(user, start_date, stop_date)
+        tasks = []
+        periods = stream_tex_periods(user, records, balance, periods, path.name, args.format)
+        async for date, build_path in trace.iterate('statement.tex', periods):
+            if args.format != 'tex':
+                with trace.span('statement.move'):
+                    shutil.move(build_path / f'statement.{args.format}', statement_path(user, date, args.format))
+                continue
+            tasks.append(asyncio.create_task(compile_latex_async(user, date, build_path, semaphore)))
+        await asyncio.gather(*tasks)
+    finally:
+        with trace.span('statement.clean'):
+            path.cleanup()
+
+
+async def loan_statement(args):
+    import asyncio
+
+    from .latex import parse_latex_date
+    from .ledger import Ledger
+    from .utility import split_periods
+
+    start_date, stop_date = parse_latex_date(args.start, args.stop)
+    if args.period:
+        periods = split_periods(start_date, stop_date, args.period)
+        if not periods:
+            import logging
+
+            logging.getLogger('cli').error(f'No period to backfill, start date {start_date} is not before stop date {stop_date}.')
+            return True
+    database = await start_database(args)
+    accounts = database.loaded_household().names
+    if args.ledger:
+        ledger = Ledger()
+        await ledger.refresh(database)
+        database = ledger
+    semaphore = asyncio.Semaphore(args.jobs)
+    if args.period:
+        await asyncio.gather(*(
+            user_backfill(database, user, periods, semaphore, args)
+            for user in accounts
+        ))
+        return
+    await asyncio.gather(*(
+        user_statement(database, user, start_date, stop_date, semaphore, args)
+        for user in accounts
+    ))
+
+
+def build_parser():
+    """
+    Build the `loan` parser, each subcommand sets its function and default log level.
+    """
+    # Options shared by all subcommands, so that wrapper scripts accept them too.
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--log-level", help="logging level, default depends on the subcommand")
+    common.add_argument("--household", help="household the subcommand runs on, default to `Config.HOUSEHOLD`")
+    common.add_argument("--trace", metavar="PATH", help="write call counts, round trips and latencies, as Prometheus text if PATH ends with .prom, JSON otherwise")
+    common.add_argument("--profile", metavar="PATH", help="write cProfile statistics, to be read with pstats")
+
+    parser = argparse.ArgumentParser(prog='loan', description="Get loan payment right")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparser = subparsers.add_parser('init', parents=[common], help="create the database tables")
+    subparser.set_defaults(run=init_db, level='ERROR')
+
+    subparser = subparsers.add_parser('migrate', parents=[common], help="apply the pending schema migrations")
+    subparser.set_defaults(run=migrate_db, level='ERROR')
+
+    subparser = subparsers.add_parser('init_timeline', parents=[common], help="populate the loan repayment timeline")
+    subparser.set_defaults(run=init_timeline, level='DEBUG')
+
+    subparser = subparsers.add_parser('timeline_update', parents=[common], help="account for due loan repayments")
+    subparser.add_argument("-d", "--daemon", action="store_true", help="keep running, and account for repayments as they fall due")
+    subparser.set_defaults(run=timeline_update, level='INFO')
+
+    subparser = subparsers.add_parser('statement', parents=[common], help="generate loan statements")
+    subparser.add_argument("-s", "--start", nargs="?", help="start date for statement")
+    subparser.add_argument("-e", "--stop", nargs="?", help="stop date for statement")
+    subparser.add_argument("-p", "--period", choices=Config.PERIODS, help="backfill one statement per period from start to stop")
+    # Keys of `render.BACKENDS`, listed here so that parsing does not import the backends.
+    subparser.add_argument("-f", "--format", choices=['tex', 'csv', 'html', 'pdf'], default='tex', help="tex compiles with pdflatex, other formats are rendered in-process")
+    subparser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="number of concurrent pdflatex")
+    subparser.add_argument("-l", "--ledger", action="store_true", help="serve wires from the local ledger, refreshed first")
+    subparser.set_defaults(run=loan_statement, level='INFO')
+
+    subparser = subparsers.add_parser('import', parents=[common], help="import bank exports into the wire table")
+    subparser.add_argument("paths", nargs="+", help="csv or ofx bank exports")
+    subparser.add_argument("-a", "--account", required=True, help="account of the household the exports belong to")
+    subparser.add_argument("-p", "--percentage", type=float, help="percentage of joint purchases taken care of by the first member, default to the account shares")
+    subparser.add_argument("-d", "--date-format", help="strptime format of csv dates, ISO dates by default")
+    subparser.add_argument("-b", "--batch", type=int, default=Config.IMPORT_BATCH_SIZE, help="number of bank transactions per database transaction")
+    subparser.set_defaults(run=import_wires, level='INFO')
+
+    subparser = subparsers.add_parser('audit', parents=[common], help="check the database invariants")
+    subparser.add_argument("-r", "--rebuild", action="store_true", help="rebuild balance and balance_history from wire")
+    subparser.set_defaults(run=audit_db, level='INFO')
+
+    subparser = subparsers.add_parser('forecast', parents=[common], help="project balances over the remaining loan term")
+    subparser.add_argument("-e", "--stop", help="day after the last projected day, default to the day after the last timeline row")
+    subparser.add_argument("-f", "--frequency", choices=['daily', 'monthly'], default='monthly', help="projected balances per day or at the end of each month")
+    subparser.set_defaults(run=forecast, level='WARNING')
+
+    subparser = subparsers.add_parser('quote', parents=[common], help="compute loan payments, without database")
+    subparser.add_argument("amount", type=float, help="amount borrowed, in euros")
+    subparser.add_argument("-r", "--rate", type=float, help="annual interest rate in percent, default to `Loan.annual_rate`")
+    subparser.add_argument("-l", "--length", type=int, help="number of months to repay the credit, default to `Loan.length`")
+    subparser.add_argument("-c", "--processing-cost", type=float, default=0, help="processing cost, in euros")
+    subparser.add_argument("-m", "--monthly-cost", type=float, default=0, help="monthly insurance, in euros")
+    subparser.add_argument("--deferral", type=int, default=0, help="number of months without capital repayment")
+    subparser.add_argument("--capitalize", action="store_true", help="add deferred interest to the capital")
+    subparser.set_defaults(run=quote, level='WARNING')
+    return parser
+
+
+def main(argv=None):
+    """
+    Run the `loan` command line, `argv` default to `sys.argv[1:]`.
+
+    Returns
+    -------
+    Exit status.
+    """
+    import logging
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'statement' and args.period and args.start is None:
+        parser.error('--period requires a start date.')
+    logging.basicConfig(
+        format="{asctime} {levelname} [{name}:{lineno}] {message}",
+        style='{',
+        datefmt='%H:%M:%S',
+        level=args.log_level or args.level,
+        handlers=[
+            logging.StreamHandler(),
+        ],
+    )
+    with contextlib.ExitStack() as stack:
+        if args.trace:
+            from . import trace
+
+            tracer = stack.enter_context(trace.tracing())
+            stack.callback(tracer.dump, args.trace)
+        if args.profile:
+            import cProfile
+
+            profile = stack.enter_context(cProfile.Profile())
+            stack.callback(profile.dump_stats, args.profile)
+        result = args.run(args)
+        if isinstance(result, types.CoroutineType):
+            import asyncio
+
+            result = asyncio.run(result)
+    return int(bool(result))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,19 @@
 
+import asyncio
+import contextlib
+import contextvars
+import copy
 import datetime
 import logging
 
 import asyncpg
 
+from . import trace
+from .buffer import WriteBuffer
+from .household import Household
 from .utility import (
-    AmountConverter,
     Config,
+    Money,
     parse_date
 )
 
@@ -14,24 +21,82 @@ log = logging.getLogger('db')
 log.setLevel('INFO')
 
 
+class Connection(asyncpg.Connection):
+    """
+    Connection reporting its round trips and the rows it returns to the active tracer.
+
+    Transaction statements and the reset on release to the pool are round trips too.
+    """
+    async def execute(self, *args, **kwargs):
+        trace.record()
+        return await super().execute(*args, **kwargs)
+
+    async def executemany(self, *args, **kwargs):
+        trace.record()
+        return await super().executemany(*args, **kwargs)
+
+    async def fetch(self, *args, **kwargs):
+        records = await super().fetch(*args, **kwargs)
+        trace.record(rows=len(records))
+        return records
+
+    async def fetchval(self, *args, **kwargs):
+        trace.record(rows=1)
+        return await super().fetchval(*args, **kwargs)
+
+    async def fetchrow(self, *args, **kwargs):
+        trace.record(rows=1)
+        return await super().fetchrow(*args, **kwargs)
+
+    async def copy_records_to_table(self, *args, **kwargs):
+        trace.record()
+        return await super().copy_records_to_table(*args, **kwargs)
+
+    async def copy_from_query(self, *args, **kwargs):
+        trace.record()
+        return await super().copy_from_query(*args, **kwargs)
+
+
+@trace.instrument
 class DB:
     """
     Module to interact with the postgreSQL database.
+
+    Accounts are named within the household the database is bound to, see `for_household`.
+    Public coroutine methods are recorded as `DB.<method>` spans when tracing, see `trace.tracing`.
     """
-    def __init__(self):
-        pass
+    def __init__(self, household: str = None):
+        """
+        Parameters
+        ----------
+        household: Name of the household, default to `Config.HOUSEHOLD`.
+        """
+        self.connection = contextvars.ContextVar('connection', default=None)
+        self.buffer = None
+        self.household_name = household or Config.HOUSEHOLD
+        self.household = None
 
     async def start(self):
         """
         Start connection to the database.
         """
         try:
-            self.pool = await asyncpg.create_pool(database=Config.DB_NAME)
+            self.pool = await asyncpg.create_pool(
+                database=Config.DB_NAME,
+                min_size=Config.POOL_MIN_SIZE,
+                max_size=Config.POOL_MAX_SIZE,
+                statement_cache_size=Config.STATEMENT_CACHE_SIZE,
+                server_settings={'plan_cache_mode': Config.PLAN_CACHE_MODE},
+                connection_class=Connection,
+            )
         except ConnectionRefusedError:
             log.error('Could not connect to database.')
             raise
         else:
             log.info(f'Connected to database {Config.DB_NAME}.')
+        # The household is loaded by `migrate` on a database not initialized or migrated yet.
+        with contextlib.suppress(asyncpg.UndefinedTableError):
+            self.household = await Household.find(self, self.household_name)
 
     async def init(self):
         """
@@ -40,18 +105,167 @@ class DB:
         with open(Config.PATH / 'src' / 'sql' / 'init_db.sql') as f:
             schema_sql = f.read()
         await self.execute(schema_sql)
+        await self.migrate()
         log.info('Database initialized.')
 
-    async def fetch(self, sql, *args):
+    async def migrate(self):
+        """
+        Apply the schema migrations in `sql/migrations` not applied yet, in order, and load the household.
+
+        Applied migrations are recorded in the `migration` table. Migrations
+        up to `005_timeline_due.sql` are idempotent, they were applied on
+        every run before the table existed.
+        """
+        async with self.transaction() as connection:
+            await connection.execute('''
+                CREATE TABLE IF NOT EXISTS migration (
+                    name VARCHAR PRIMARY KEY,
+                    date TIMESTAMP NOT NULL DEFAULT now()
+                );
+                LOCK TABLE migration IN EXCLUSIVE MODE;
+            ''')
+            applied = {record['name'] for record in await connection.fetch('''SELECT name FROM migration''')}
+            for path in sorted((Config.PATH / 'src' / 'sql' / 'migrations').glob('*.sql')):
+                if path.name in applied:
+                    continue
+                log.info(f'Applying migration {path.name}.')
+                with open(path) as f:
+                    await connection.execute(f.read())
+                await connection.execute('''INSERT INTO migration(name) VALUES ($1)''', path.name)
+        self.household = await Household.load(self, self.household_name)
+
+    async def for_household(self, name: str):
+        """
+        Get a `DB` bound to household `name`, sharing the connection pool and the units of work.
+        """
+        database = copy.copy(self)
+        database.household_name = name
+        database.household = await Household.load(self, name)
+        return database
+
+    def loaded_household(self):
+        """
+        Get the household, raise ValueError if it is not loaded.
+        """
+        if self.household is None:
+            log.error(f'Household {self.household_name} not loaded, the database should be initialized or migrated.')
+            raise ValueError
+        return self.household
+
+    @property
+    def household_id(self):
+        return self.loaded_household().id
+
+    def account(self, name: str):
+        """
+        Get account `name` of the household, see `Household.account`.
+        """
+        return self.loaded_household().account(name)
+
+    @contextlib.asynccontextmanager
+    async def transaction(self, isolation: str = None):
+        """
+        Unit of work pinning one connection and one transaction.
+
+        Every `DB` call awaited within the context runs on the pinned connection,
+        and is committed or rolled back together. Calls within a unit of work
+        should not be run concurrently, e.g. with `asyncio.gather`.
+
+        Parameters
+        ----------
+        isolation: Isolation level of the transaction, e.g. 'repeatable_read',
+            ignored when nested in another unit of work.
+        """
+        connection = self.connection.get()
+        if connection is not None and connection.is_in_transaction():
+            yield connection
+            return
+        if connection is not None:
+            # Connection pinned outside of a unit of work, see `serve_mensualities`.
+            async with connection.transaction(isolation=isolation):
+                yield connection
+            return
         async with self.pool.acquire() as connection:
-            async with connection.transaction():
-                return await connection.fetch(sql, *args)
+            async with connection.transaction(isolation=isolation):
+                token = self.connection.set(connection)
+                try:
+                    yield connection
+                finally:
+                    self.connection.reset(token)
+
+    @contextlib.asynccontextmanager
+    async def buffered(self, size: int = None, delay: float = None, capacity: int = None):
+        """
+        Group commit `record_transaction`, `wire` and `joint_purchase` calls made within the context.
+
+        Calls from concurrent tasks are written together by a `WriteBuffer`, each
+        call returns once its rows are committed. Calls within a unit of work are
+        written directly. Pending calls are flushed on exit.
+
+        Parameters
+        ----------
+        size: Wire rows triggering a flush, default to `Config.WRITE_BUFFER_SIZE`.
+        delay: Seconds a call waits for others before a flush, default to `Config.WRITE_BUFFER_DELAY`.
+        capacity: Pending calls before callers wait, default to `Config.WRITE_BUFFER_CAPACITY`.
+        """
+        if self.buffer is not None:
+            yield self.buffer
+            return
+        self.buffer = WriteBuffer(self, size, delay, capacity)
+        try:
+            yield self.buffer
+        finally:
+            buffer, self.buffer = self.buffer, None
+            await buffer.close()
+
+    @property
+    def buffering(self):
+        """
+        Whether writes go through the write buffer, see `buffered`.
+        """
+        return self.buffer is not None and self.connection.get() is None
+
+    @contextlib.asynccontextmanager
+    async def acquire(self):
+        """
+        Get the pinned connection if any, otherwise a connection from the pool.
+        """
+        connection = self.connection.get()
+        if connection is not None:
+            yield connection
+            return
+        async with self.pool.acquire() as connection:
+            yield connection
+
+    async def fetch(self, sql, *args):
+        async with self.acquire() as connection:
+            return await connection.fetch(sql, *args)
         
     async def execute(self, sql, *args):
-        async with self.pool.acquire() as connection:
-            async with connection.transaction():
-                return await connection.execute(sql, *args)
+        async with self.acquire() as connection:
+            return await connection.execute(sql, *args)
         
+    async def cursor(self, sql, *args, prefetch: int = None):
+        """
+        Iterate over query results with a server-side cursor.
+
+        Parameters
+        ----------
+        prefetch: Number of rows fetched per round trip, default to `Config.CURSOR_PREFETCH`.
+        """
+        if prefetch is None:
+            prefetch = Config.CURSOR_PREFETCH
+        # The connection is not pinned: an async generator may be closed in another context,
+        # and calls made while iterating would join the cursor transaction.
+        async with contextlib.AsyncExitStack() as stack:
+            connection = self.connection.get()
+            if connection is None:
+                connection = await stack.enter_async_context(self.pool.acquire())
+            if not connection.is_in_transaction():
+                await stack.enter_async_context(connection.transaction())
+            async for record in trace.iterate('DB.cursor', connection.cursor(sql, *args, prefetch=prefetch), prefetch):
+                yield record
+
     async def reset_table(self, name):
         """
         Delete all values in a table.
@@ -59,13 +273,13 @@ class DB:
         log.info(f'Reseting table {name}')
         await self.execute(f'''TRUNCATE TABLE {name}''')
 
-    async def write_mensuality(self, amount: float, user_1: str, user_2: str, date, month: int, requester: str):
+    async def write_mensuality(self, amount, user_1, user_2, date, month: int, requester: str):
         """
         Populate `timeline` table with due mensualities.
         """
-        amount = AmountConverter.to_db(amount)
-        user_1  = AmountConverter.to_db(user_1)
-        user_2 = AmountConverter.to_db(user_2)
+        amount = Money.of(amount).cents
+        user_1 = Money.of(user_1).cents
+        user_2 = Money.of(user_2).cents
         date = parse_date(date)
         if requester not in Config.REQUESTERS:
             log.error(f'Requester {requester} not recognized.')
@@ -79,24 +293,65 @@ class DB:
         log.debug(f'Writing {requester} mensuality {month} to timeline table.')
         await self.execute('''
             INSERT INTO timeline(
-                amount, user_1, user_2, date, fill, month, request
+                household, amount, user_1, user_2, date, fill, month, request
             ) 
             VALUES(
-                $1, $2, $3, $4, $5, $6, $7
+                $1, $2, $3, $4, $5, $6, $7, $8
             )''',
-            amount, user_1, user_2, date, False, month, requester
+            self.household_id, amount, user_1, user_2, date, False, month, requester
         )
 
-    async def account_mensuality(self):
+    async def write_timeline(self, rows, reset: bool = True):
+        """
+        Populate `timeline` table with a full schedule of the household in one transaction.
+
+        Parameters
+        ----------
+        rows: list of tuples
+            (amount, user_1, user_2, date, month, requester) with amounts in cents.
+        reset: If True, empty the household timeline within the same transaction.
+        """
+        household = self.household_id
+        records = []
+        for amount, user_1, user_2, date, month, requester in rows:
+            if requester not in Config.REQUESTERS:
+                log.error(f'Requester {requester} not recognized.')
+                raise ValueError
+            if user_1 + user_2 != amount:
+                log.error(f'Amounts {user_1} and {user_2} do not sum to {amount}.')
+                raise ValueError
+            records.append((household, amount, user_1, user_2, parse_date(date), False, month, requester))
+
+        log.debug(f'Writing {len(records)} mensualities to timeline table.')
+        async with self.transaction() as connection:
+            if reset:
+                log.info(f'Reseting timeline of household {self.household_name}')
+                await connection.execute('''DELETE FROM timeline WHERE household = $1''', household)
+            await connection.copy_records_to_table(
+                'timeline',
+                records=records,
+                columns=['household', 'amount', 'user_1', 'user_2', 'date', 'fill', 'month', 'request']
+            )
+
+    async def account_mensuality(self, batch: bool = True):
         """
         Record all past requests from the bank according to the `timeline` table. 
+
+        Parameters
+        ----------
+        batch: If True, write all due mensualities in bulk, see `account_mensuality_batch`,
+            otherwise claim and record them one by one, with one round trip per row,
+            within a single transaction.
         """
         date = datetime.date.today()
+        await self.checkpoint_balance_history(date)
 
+        # `fill = false` is spelled out for the partial index on unfilled rows to be used.
         records = await self.fetch('''
             SELECT * FROM timeline
-            WHERE date < $1 AND fill = $2
-        ''', date, False)
+            WHERE household = $1 AND date < $2 AND fill = false
+            ORDER BY date, id
+        ''', self.household_id, date)
         
         if not len(records):
             log.debug(f'All mensualities have been paid so far.')
@@ -106,85 +361,434 @@ class DB:
         else:
             log.info(f'Loading due {len(records)} mensualities.')
 
-        for record in records:
-            id = record['id']
-            user_1 = AmountConverter.from_db(record['user_1'])
-            user_2 = AmountConverter.from_db(record['user_2'])
-            amount = AmountConverter.from_db(record['amount'])
-            date = record['date']
-            operation = record['request']
-
-            if amount != user_2 + user_1:
-                log.error(f'Amounts {user_2} and {user_1} do not sum up to {amount}.')
-
-            await self.record_transaction('user_1', -user_1, date, 'bank', operation)
-            await self.record_transaction('user_2', -user_2, date, 'bank', operation)
-            await self.record_transaction('joint', -amount, date, 'bank', operation)
-            log.info(f'Balance updated according to due mensuality {record["month"]}.')
-
-            # Update the timeline record.
-            await self.execute('''
-                UPDATE timeline 
+        if batch:
+            await self.account_mensuality_batch(records)
+            return
+
+        async with self.transaction():
+            for record in records:
+                id = record['id']
+                # Claim the timeline record, it may have been recorded concurrently.
+                if not await self.fetch('''
+                    UPDATE timeline
+                        SET fill=$1
+                    WHERE id=$2 AND fill = false
+                    RETURNING id
+                ''', True, id):
+                    continue
+                user_1 = Money(record['user_1'])
+                user_2 = Money(record['user_2'])
+                amount = Money(record['amount'])
+
+                if amount != user_2 + user_1:
+                    log.error(f'Amounts {user_2} and {user_1} do not sum up to {amount}.')
+
+                await self.record(self.mensuality_transactions(record), record['date'], record['request'])
+                log.info(f'Balance updated according to due mensuality {record["month"]}.')
+
+    def mensuality_transactions(self, record):
+        """
+        Split a `timeline` record into (account id, amount, object) transactions, see `Household.loan_accounts`.
+        """
+        joint, user_1, user_2 = self.loaded_household().loan_accounts()
+        return [
+            (joint, -Money(record['amount']), 'bank'),
+            (user_1, -Money(record['user_1']), 'bank'),
+            (user_2, -Money(record['user_2']), 'bank'),
+        ]
+
+    async def next_mensuality(self):
+        """
+        Get the date of the earliest mensuality not recorded yet, None if all are.
+        """
+        records = await self.fetch('''
+            SELECT MIN(date) AS date FROM timeline
+            WHERE household = $1 AND fill = false
+        ''', self.household_id)
+        return records[0]['date']
+
+    async def serve_mensualities(self):
+        """
+        Record mensualities as they fall due, until cancelled.
+
+        A single connection is kept: it listens to the `timeline` channel, notified when
+        the timeline is rewritten, and records due mensualities with `account_mensuality`.
+        Mensualities fall due the day after their date, in between the daemon sleeps,
+        at most `Config.TIMELINE_MAX_SLEEP` seconds.
+        """
+        wake = asyncio.Event()
+
+        def listener(connection, pid, channel, payload):
+            log.debug(f'Timeline rewritten ({payload}).')
+            wake.set()
+
+        async with self.pool.acquire() as connection:
+            await connection.add_listener('timeline', listener)
+            token = self.connection.set(connection)
+            try:
+                while True:
+                    wake.clear()
+                    await self.account_mensuality()
+                    date = await self.next_mensuality()
+                    timeout = Config.TIMELINE_MAX_SLEEP
+                    if date is not None:
+                        due = datetime.datetime.combine(date + datetime.timedelta(days=1), datetime.time())
+                        log.info(f'Next mensuality due on {due.date()}.')
+                        timeout = min(max((due - datetime.datetime.now()).total_seconds(), 0), timeout)
+                    with contextlib.suppress(asyncio.TimeoutError):
+                        await asyncio.wait_for(wake.wait(), timeout)
+            finally:
+                self.connection.reset(token)
+                await connection.remove_listener('timeline', listener)
+
+    async def account_mensuality_batch(self, records):
+        """
+        Record due mensualities from `timeline` records in one transaction.
+
+        Timeline rows are claimed first, so that concurrent runs never record
+        a mensuality twice. Wire rows are copied in bulk, balance deltas are
+        aggregated in memory and written once per account.
+        """
+        async with self.transaction() as connection:
+            claimed = await connection.fetch('''
+                UPDATE timeline
                     SET fill=$1
-                WHERE id=$2
-            ''', True, id)
+                WHERE id = ANY($2::int[]) AND fill = false
+                RETURNING id
+            ''', True, [record['id'] for record in records])
+            claimed = {record['id'] for record in claimed}
+            records = [record for record in records if record['id'] in claimed]
+            if not records:
+                log.info('Due mensualities already recorded.')
+                return
+
+            wires = []
+            for record in records:
+                if record['user_1'] + record['user_2'] != record['amount']:
+                    log.error(f'Amounts {record["user_2"]} and {record["user_1"]} do not sum up to {record["amount"]}.')
+                wires += self.wire_rows(self.mensuality_transactions(record), record['date'], record['request'])
+            await self.write_wires(connection, wires)
+        log.info(f'Balance updated according to {len(records)} due mensualities.')
+
+    async def import_wires(self, wires):
+        """
+        Record a batch of imported wires in one transaction, skipping bank transactions already imported.
 
-    async def record_transaction(self, user: str, amount: float, date=None, recipient: str=None, operation: str = None):
+        Parameters
+        ----------
+        wires: list of tuples
+            (household, account, date, object, operation, debit, credit, key) with amounts in cents,
+            `key` identifying the bank transaction of the household the wire comes from.
+
+        Returns
+        -------
+        Number of wire rows inserted.
         """
-        Write transactions to the `wire` table in the database.
+        async with self.transaction() as connection:
+            keys = await connection.fetch('''
+                INSERT INTO wire_import(household, key)
+                SELECT $1, unnest($2::bigint[])
+                ON CONFLICT DO NOTHING
+                RETURNING key
+            ''', self.household_id, list({wire[-1] for wire in wires}))
+            keys = {record['key'] for record in keys}
+            count = len(wires)
+            wires = [wire[:-1] for wire in wires if wire[-1] in keys]
+            if wires:
+                await self.write_wires(connection, wires)
+        log.info(f'Imported {len(wires)} wires, {count - len(wires)} already recorded.')
+        return len(wires)
+
+    @classmethod
+    async def write_wires(cls, connection, wires):
+        """
+        Copy wires in bulk, and report them into `balance_history` and `balance`.
 
-        A negative `amount` means that we debit money to `user`.
+        Balance deltas are aggregated in memory and written once per account.
+
+        Parameters
+        ----------
+        connection: asyncpg connection, within a transaction.
+        wires: list of tuples
+            (household, account, date, object, operation, debit, credit) with amounts in cents,
+            wires of several households may be written together.
+        """
+        if not wires:
+            return
+        deltas = {}
+        for household, account, date, _, _, debit, credit in wires:
+            old_debit, old_credit, old_date = deltas.get((household, account), (0, 0, date))
+            deltas[household, account] = (old_debit + debit, old_credit + credit, max(old_date, date))
+        keys = sorted(deltas)
+        households = [household for household, _ in keys]
+        accounts = [account for _, account in keys]
+
+        # Lock balances in the same order as single transactions to avoid deadlocks.
+        await connection.execute('''
+            SELECT b.account FROM balance AS b
+            JOIN unnest($1::int[], $2::smallint[]) AS k(household, account)
+                ON b.household = k.household AND b.account = k.account
+            WHERE b.household = ANY($1::int[])
+            ORDER BY b.household, b.account
+            FOR UPDATE OF b
+        ''', households, accounts)
+        # Wires are written before checkpoints, as `checkpoint_balance_history` locks them in this order.
+        await connection.copy_records_to_table(
+            'wire',
+            records=wires,
+            columns=['household', 'account', 'date', 'object', 'operation', 'debit', 'credit']
+        )
+        await cls.update_balance_history(connection, [
+            (household, account, date, credit - debit) for household, account, date, _, _, debit, credit in wires
+        ])
+        await connection.execute('''
+            UPDATE balance AS b
+                SET (date, debit, credit, balance) = (
+                    GREATEST(b.date, d.date),
+                    b.debit + d.debit,
+                    b.credit + d.credit,
+                    b.balance + d.credit - d.debit
+                )
+            FROM unnest($1::int[], $2::smallint[], $3::date[], $4::bigint[], $5::bigint[])
+                AS d(household, account, date, debit, credit)
+            WHERE b.household = d.household AND b.account = d.account
+        ''',
+            households,
+            accounts,
+            [deltas[key][2] for key in keys],
+            [deltas[key][0] for key in keys],
+            [deltas[key][1] for key in keys]
+        )
+
+    def wire_rows(self, transactions, date=None, operation: str = None):
+        """
+        Get the `wire` rows of household transactions, see `write_wires`.
+
+        Parameters
+        ----------
+        transactions: list of tuples
+            (account id, amount, object), amounts Money or euros, negative when money flows out.
+            Objects are None or among `Household.objects`.
         """
         log.debug('Parsing wire arguments.')
-        if user not in Config.DB_USERS:
-            log.error(f'Users {user} not recognized')
-            raise ValueError 
-        db_amount = AmountConverter.to_db(amount)
-        if db_amount > 0:
-            credit = db_amount
-            debit = 0
-        else:
-            credit = 0
-            debit = -db_amount
+        household = self.loaded_household()
+        objects = set(household.objects)
         date = parse_date(date)
+        wires = []
+        for account, amount, object in transactions:
+            if object is not None and object not in objects:
+                log.error(f'Stackholder {object} not recognized in household {household.name}.')
+                raise ValueError
+            amount = Money.of(amount).cents
+            wires.append((household.id, account, date, object, operation, max(-amount, 0), max(amount, 0)))
+        return wires
+
+    async def record(self, transactions, date=None, operation: str = None):
+        """
+        Write household transactions to the `wire` table, through the write buffer when `buffering`.
 
-        log.debug('Writing transaction to `wire` table.')
+        The wire rows, the balance history and the balances are written in one round trip.
+        All updates are increments, balance rows are locked in account order,
+        which serializes concurrent writers without deadlocks.
+
+        Parameters
+        ----------
+        transactions: list of tuples
+            (account id, amount, object), amounts Money or euros, negative when money flows out.
+        """
+        wires = self.wire_rows(transactions, date, operation)
+        if self.buffering:
+            await self.buffer.submit(wires)
+            return
+
+        _, accounts, _, objects, _, debits, credits = map(list, zip(*wires))
+        # Unreferenced data-modifying statements run after the main query, once balances are locked.
         await self.execute('''
-            INSERT INTO wire(
-                account, date, object, operation, debit, credit
-            ) VALUES(
-                $1, $2, $3, $4, $5, $6
-            )''',
-            user, date, recipient, operation, debit, credit
-        )
-        await self.update_balance(user, amount, date)
+            WITH wires AS (
+                INSERT INTO wire(household, account, date, object, operation, debit, credit)
+                SELECT $1, account, $3, object, $4, debit, credit
+                FROM unnest($2::smallint[], $5::varchar[], $6::bigint[], $7::bigint[]) AS t(account, object, debit, credit)
+            ), deltas AS (
+                SELECT account, SUM(debit) AS debit, SUM(credit) AS credit
+                FROM unnest($2::smallint[], $6::bigint[], $7::bigint[]) AS t(account, debit, credit)
+                GROUP BY account
+            ), history AS (
+                UPDATE balance_history AS h
+                    SET balance = h.balance + d.credit - d.debit
+                FROM deltas AS d
+                WHERE h.household = $1 AND h.account = d.account AND h.date > $3
+            ), locked AS (
+                SELECT account FROM balance
+                WHERE household = $1 AND account = ANY($2::smallint[])
+                ORDER BY account
+                FOR UPDATE
+            )
+            UPDATE balance AS b
+                SET (date, debit, credit, balance) = (
+                    GREATEST(b.date, $3), b.debit + d.debit, b.credit + d.credit, b.balance + d.credit - d.debit
+                )
+            FROM deltas AS d
+            JOIN locked USING (account)
+            WHERE b.household = $1 AND b.account = d.account
+        ''', self.household_id, accounts, parse_date(date), operation, objects, debits, credits)
+
+    async def record_transaction(self, user: str, amount, date=None, recipient: str=None, operation: str = None):
+        """
+        Write transactions to the `wire` table in the database.
 
-    async def update_balance(self, user: str, amount: float, date: datetime.date):
+        A negative `amount` means that we debit money to `user`.
+        `amount` is either Money or a number of euros.
         """
-        Update balance based on wire amount.
+        log.debug('Writing transaction to `wire` table.')
+        await self.record([(self.account(user).id, amount, recipient)], date, operation)
+        log.info(f'Updated {user} balance.')
+
+    @staticmethod
+    async def update_balance_history(connection, wires):
+        """
+        Report wires into the monthly `balance_history` checkpoints.
 
         Parameters
         ----------
-        user: Account identifier.
-        amount: Positive in money flows in, negative it it flows out.
+        connection: asyncpg connection, within the transaction writing the wires.
+        wires: list of tuples
+            (household, account, date, amount) with amounts in cents.
         """
-        old_date, debit, credit, balance = await self.get_balance(user)
+        deltas = {}
+        for household, account, date, amount in wires:
+            deltas[household, account, date] = deltas.get((household, account, date), 0) + amount
+        if not deltas:
+            return
 
-        log.debug('Parsing balance arguments.')
-        amount = AmountConverter.to_db(amount)
-        balance += amount
-        if amount > 0:
-            credit += amount
-        else:
-            debit -= amount
-        date = max(date, old_date)
+        # Each checkpoint is updated once, with the sum of the earlier wires.
+        await connection.execute('''
+            UPDATE balance_history AS h
+                SET balance = h.balance + d.amount
+            FROM (
+                SELECT c.household, c.account, c.date, SUM(w.amount) AS amount
+                FROM balance_history AS c
+                JOIN unnest($1::int[], $2::smallint[], $3::date[], $4::bigint[]) AS w(household, account, date, amount)
+                    ON c.household = w.household AND c.account = w.account AND c.date > w.date
+                WHERE c.household = ANY($1::int[])
+                GROUP BY c.household, c.account, c.date
+            ) AS d
+            WHERE h.household = d.household AND h.account = d.account AND h.date = d.date
+        ''', *map(list, zip(*((*key, amount) for key, amount in deltas.items()))))
+
+    async def checkpoint_balance_history(self, date=None):
+        """
+        Add a `balance_history` checkpoint for every household account on the first day of the month of `date`.
 
-        await self.execute('''
+        Writers only increment existing checkpoints, new checkpoints are created
+        here while `wire` is locked against concurrent writes.
+        """
+        household = self.household_id
+        date = parse_date(date).replace(day=1)
+        # Checkpoints are added once a month, other calls do not lock `wire`.
+        records = await self.fetch('''
+            SELECT
+                (SELECT COUNT(*) FROM balance WHERE household = $1) AS accounts,
+                (SELECT COUNT(*) FROM balance_history WHERE household = $1 AND date = $2) AS checkpoints
+        ''', household, date)
+        if records[0]['accounts'] == records[0]['checkpoints']:
+            return
+        log.debug(f'Checkpointing balances on {date}.')
+        async with self.transaction() as connection:
+            await connection.execute('''LOCK TABLE wire IN SHARE MODE''')
+            await connection.execute('''
+                INSERT INTO balance_history(household, account, date, balance)
+                SELECT b.household, b.account, $2, COALESCE(c.balance, 0) + COALESCE((
+                    SELECT SUM(credit - debit) FROM wire
+                    WHERE wire.household = $1
+                        AND wire.account = b.account
+                        AND wire.date >= COALESCE(c.date, '-infinity'::date)
+                        AND wire.date < $2
+                ), 0)
+                FROM balance AS b
+                LEFT JOIN LATERAL (
+                    SELECT date, balance FROM balance_history
+                    WHERE household = $1 AND account = b.account AND date <= $2
+                    ORDER BY date DESC
+                    LIMIT 1
+                ) AS c ON true
+                WHERE b.household = $1
+                ON CONFLICT (household, account, date) DO NOTHING
+            ''', household, date)
+
+    async def rebuild_balance_history(self):
+        """
+        Recompute the household `balance_history` checkpoints from the `wire` table.
+        """
+        log.info('Rebuilding balance history.')
+        household = self.household_id
+        async with self.transaction() as connection:
+            await connection.execute('''LOCK TABLE wire IN SHARE MODE''')
+            await connection.execute('''DELETE FROM balance_history WHERE household = $1''', household)
+            await connection.execute('''
+                INSERT INTO balance_history(household, account, date, balance)
+                SELECT $1, account, month, COALESCE(SUM(total) OVER (
+                    PARTITION BY account ORDER BY month
+                    ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                ), 0)
+                FROM (
+                    SELECT account, date_trunc('month', date)::date AS month, SUM(credit - debit) AS total
+                    FROM wire
+                    WHERE household = $1
+                    GROUP BY account, month
+                ) AS monthly
+            ''', household)
+
+    async def rebuild_balance(self):
+        """
+        Recompute the household `balance` rows from the `wire` table.
+        """
+        log.info('Rebuilding balance.')
+        household = self.household_id
+        async with self.transaction() as connection:
+            await connection.execute('''LOCK TABLE wire IN SHARE MODE''')
+            await connection.execute('''
+                UPDATE balance AS b
+                    SET (date, debit, credit, balance) = (
+                        GREATEST(b.date, w.date),
+                        COALESCE(w.debit, 0),
+                        COALESCE(w.credit, 0),
+                        COALESCE(w.credit - w.debit, 0)
+                    )
+                FROM balance AS a
+                LEFT JOIN (
+                    SELECT account, MAX(date) AS date, SUM(debit) AS debit, SUM(credit) AS credit
+                    FROM wire
+                    WHERE household = $1
+                    GROUP BY account
+                ) AS w ON a.account = w.account
+                WHERE a.household = $1 AND b.household = $1 AND b.account = a.account
+            ''', household)
+
+    async def update_balance(self, user: str, amount, date: datetime.date):
+        """
+        Update balance based on wire amount.
+
+        Parameters
+        ----------
+        user: Account name.
+        amount: Money, or euros, positive in money flows in, negative it it flows out.
+
+        Returns
+        -------
+        date, debit, credit, balance: updated balance information.
+        """
+        log.debug('Parsing balance arguments.')
+        amount = Money.of(amount).cents
+        # Atomic increment, safe against concurrent writers.
+        records = await self.fetch('''
             UPDATE balance 
-                SET (date, debit, credit, balance) = ($1, $2, $3, $4)
-            WHERE account=$5
-        ''', date, debit, credit, balance, user)
+                SET (date, debit, credit, balance) = (GREATEST(date, $3), debit + $4, credit + $5, balance + $5 - $4)
+            WHERE household = $1 AND account = $2
+            RETURNING date, debit, credit, balance
+        ''', self.household_id, self.account(user).id, parse_date(date), max(-amount, 0), max(amount, 0))
         log.info(f'Updated {user} balance.')
+        record = records[0]
+        return record['date'], record['debit'], record['credit'], record['balance']
 
     async def get_balance(self, user: str):
         """
@@ -192,54 +796,60 @@ class DB:
         """
         log.debug(f'Loading {user} balance.')
         records = await self.fetch('''
-            SELECT * FROM balance WHERE account=$1
-        ''', user)
+            SELECT * FROM balance WHERE household = $1 AND account = $2
+        ''', self.household_id, self.account(user).id)
         record = records[0]
         return record['date'], record['debit'], record['credit'], record['balance']
 
     async def get_date_balance(self, user, date):
         """
         Get balance for `user` at specified date.
+
+        The balance is read from the closest `balance_history` checkpoint,
+        plus the wires recorded between that checkpoint and `date`.
         """
         date = parse_date(date)
         log.info(f'Retriving {user} balance on {date}.')
-        records = await self.load_wire(user=user, stop_date=date)
-        balance = 0
-        for record in records:
-            balance += record['credit'] - record['debit']
-        return AmountConverter.from_db(balance)
+        records = await self.fetch('''
+            WITH checkpoint AS (
+                SELECT date, balance FROM balance_history
+                WHERE household = $1 AND account = $2 AND date <= $3
+                ORDER BY date DESC
+                LIMIT 1
+            )
+            SELECT COALESCE((SELECT balance FROM checkpoint), 0) + COALESCE((
+                SELECT SUM(credit - debit) FROM wire
+                WHERE household = $1
+                    AND account = $2
+                    AND date >= COALESCE((SELECT date FROM checkpoint), '-infinity'::date)
+                    AND date < $3
+            ), 0) AS balance
+        ''', self.household_id, self.account(user).id, date)
+        return Money(records[0]['balance'])
 
-    async def wire(self, issuer: str, recipient: str, amount: float, date: str=None):
+    async def wire(self, issuer: str, recipient: str, amount, date: str=None):
         """
-        Record wire issued by `issuer` to `recipient` for `amount` euros.
+        Record wire issued by `issuer` to `recipient` for `amount`, Money or euros.
 
         If money is wired between individuals, we credit and debit accordingly.
-        If money is wired to joint account, we credit both the individual and the joint account.
-        If money is wire from joint account, we debit both the individual and the joint account.
+        If money is wired to a joint account by one of its members, we credit both accounts.
+        If money is wired from a joint account to one of its members, we debit both accounts.
         """
         log.debug(f'{issuer}, {recipient}')
-        match (issuer, recipient):
-            case ('user_1' | 'user_2', 'user_1' | 'user_2'):
-                log.debug(f'Money is wired between individual')
-                await self.record_transaction(issuer, amount, date, recipient, 'wire')
-                await self.record_transaction(recipient, -amount, date, issuer, 'wire')
-            case ('user_1' | 'user_2', 'joint'):
-                log.debug(f'Money is wired to joint account')
-                await self.record_transaction(issuer, amount, date, recipient, 'wire')
-                await self.record_transaction(recipient, amount, date, issuer, 'wire')
-            case ('joint', 'user_1' | 'user_2'):
-                log.debug(f'Money is wired from joint account')
-                await self.record_transaction(issuer, -amount, date, recipient, 'wire')
-                await self.record_transaction(recipient, -amount, date, issuer, 'wire')
+        transactions = self.loaded_household().split_wire(issuer, recipient, amount)
+        if not transactions:
+            log.error(f'Wire from {issuer} to {recipient} not recognized.')
+            raise ValueError
+        await self.record(transactions, date, 'wire')
         
     async def load_table(self, name: str):
         """
-        Get table `name` history.
+        Get table `name` history of the household.
         """
         log.debug(f'Loading {name} table.')
         records = await self.fetch(f'''
-            SELECT * FROM {name} ORDER BY date
-        ''')
+            SELECT * FROM {name} WHERE household = $1 ORDER BY date
+        ''', self.household_id)
         return records
 
     async def load_wire(self, user: str, start_date='2022-07-01', stop_date='2050-01-01'):
@@ -248,27 +858,101 @@ class DB:
         stop = parse_date(stop_date)
         records = await self.fetch(f'''
             SELECT * FROM wire 
-                WHERE account= $1
-                    AND date >= $2
-                    AND date < $3
+                WHERE household = $1
+                    AND account = $2
+                    AND date >= $3
+                    AND date < $4
             ORDER BY date
-        ''', user, start, stop)
+        ''', self.household_id, self.account(user).id, start, stop)
         return records
 
-    async def joint_purchase(self, amount: float, recipient: str, percentage: int = 50, date=None, information: str = None):
+    def iter_table(self, name: str, prefetch: int = None):
+        """
+        Iterate over table `name` history of the household without loading it in memory.
+        """
+        log.debug(f'Streaming {name} table.')
+        return self.cursor(f'''
+            SELECT * FROM {name} WHERE household = $1 ORDER BY date
+        ''', self.household_id, prefetch=prefetch)
+
+    def iter_wire(self, user: str, start_date='2022-07-01', stop_date='2050-01-01', prefetch: int = None):
         """
-        Account for joint purchase
+        Iterate over `user` wire history without loading it in memory.
+        """
+        log.debug(f'Streaming {user} wire history')
+        start = parse_date(start_date)
+        stop = parse_date(stop_date)
+        return self.cursor('''
+            SELECT * FROM wire 
+                WHERE household = $1
+                    AND account = $2
+                    AND date >= $3
+                    AND date < $4
+            ORDER BY date
+        ''', self.household_id, self.account(user).id, start, stop, prefetch=prefetch)
+
+    async def wire_total(self, user: str, start_date='2022-07-01', stop_date='2050-01-01'):
+        """
+        Get the sum of `credit - debit` over `user` wires between two dates.
+        """
+        log.debug(f'Summing {user} wire history')
+        records = await self.fetch('''
+            SELECT COALESCE(SUM(credit - debit), 0) AS total FROM wire
+                WHERE household = $1
+                    AND account = $2
+                    AND date >= $3
+                    AND date < $4
+        ''', self.household_id, self.account(user).id, parse_date(start_date), parse_date(stop_date))
+        return Money(records[0]['total'])
+
+    async def wire_monthly_totals(self, user: str, start_date='2022-07-01', stop_date='2050-01-01'):
+        """
+        Get `user` debit and credit totals per month, amounts in cents.
+        """
+        log.debug(f'Summing {user} wire history per month')
+        return await self.fetch('''
+            SELECT date_trunc('month', date)::date AS month,
+                SUM(debit) AS debit,
+                SUM(credit) AS credit
+            FROM wire
+                WHERE household = $1
+                    AND account = $2
+                    AND date >= $3
+                    AND date < $4
+            GROUP BY month
+            ORDER BY month
+        ''', self.household_id, self.account(user).id, parse_date(start_date), parse_date(stop_date))
+
+    async def wire_object_totals(self, user: str, start_date='2022-07-01', stop_date='2050-01-01'):
+        """
+        Get `user` debit and credit totals per wire object, amounts in cents.
+        """
+        log.debug(f'Summing {user} wire history per object')
+        return await self.fetch('''
+            SELECT object,
+                SUM(debit) AS debit,
+                SUM(credit) AS credit
+            FROM wire
+                WHERE household = $1
+                    AND account = $2
+                    AND date >= $3
+                    AND date < $4
+            GROUP BY object
+            ORDER BY object
+        ''', self.household_id, self.account(user).id, parse_date(start_date), parse_date(stop_date))
+
+    async def joint_purchase(self, amount, recipient: str, percentage: float = None, date=None, information: str = None, account: str = 'joint', shares=None):
+        """
+        Account for joint purchase, split between the joint account members.
 
         Parameters
         ----------
-        amount: Price of the purchase.
+        amount: Price of the purchase, Money or euros.
         recipient: Recipient of the purchase.
-        percentage: Percentage of the purchase taken care of by user_1.
+        percentage: Percentage of the purchase taken care of by the first member, for accounts of two members.
+        account: Joint account paying the purchase.
+        shares: Member name to share, default to the account shares, see `Household.split_purchase`.
         """
-        user_1 = amount * percentage / 100
-        user_2 = amount - user_1
-
-        await self.record_transaction('user_1', -user_1, date, recipient, information)
-        await self.record_transaction('user_2', -user_2, date, recipient, information)
-        await self.record_transaction('joint', -amount, date, recipient, information)
+        transactions = self.loaded_household().split_purchase(account, amount, recipient, shares, percentage)
+        await self.record(transactions, date, information)
         log.debug(f'Writing {recipient} wire according to joint payment.')
@@ -0,0 +1,174 @@
+import datetime
+import logging
+from typing import NamedTuple
+
+import numpy as np
+
+from .utility import (
+    Config,
+    Money,
+    parse_date
+)
+
+log = logging.getLogger('forecast')
+log.setLevel('INFO')
+
+
+class Rule(NamedTuple):
+    """
+    Recurring transaction, repeated every `months` months from `start` until `stop` excluded.
+
+    `kind` is 'wire', from `issuer` to `recipient` following `DB.wire` rules, or 'purchase',
+    a purchase paid by joint account `issuer` to `recipient` following `DB.joint_purchase` rules.
+    `amount` is Money or euros, `percentage` the share of the first member in purchases,
+    default to the account shares.
+    """
+    kind: str
+    issuer: str
+    recipient: str
+    amount: object
+    start: datetime.date
+    stop: datetime.date = None
+    months: int = 1
+    percentage: float = None
+
+
+class Forecast(NamedTuple):
+    """
+    Projected balances in cents, `balances[i, j]` being the balance of `accounts[i]` at the end of `dates[j]`.
+
+    `negative` maps each account to the first date its balance goes negative, None if it never does.
+    """
+    accounts: list
+    dates: np.ndarray
+    balances: np.ndarray
+    negative: dict
+
+
+def monthly_dates(start, stop, months: int = 1):
+    """
+    Get dates every `months` months from `start` until `stop` excluded, as datetime64[D].
+
+    Days past the end of shorter months fall on their last day, as in `split_periods`, `start` included.
+    """
+    start = np.datetime64(parse_date(start), 'D')
+    stop = np.datetime64(parse_date(stop), 'D')
+    first = start.astype('datetime64[M]')
+    day = (start - first).astype(int)
+    count = (stop.astype('datetime64[M]') - first).astype(int) + 1
+    starts = first + np.arange(0, count, months)
+    lengths = ((starts + 1).astype('datetime64[D]') - starts.astype('datetime64[D]')).astype(int)
+    dates = starts.astype('datetime64[D]') + np.minimum(day, lengths - 1)
+    return dates[dates < stop]
+
+
+def rule_events(rule: Rule, household, start, stop):
+    """
+    Expand a recurring rule into per-account (account id, dates, amount) events within [start, stop).
+    """
+    if rule.kind == 'wire':
+        transactions = household.split_wire(rule.issuer, rule.recipient, rule.amount)
+        if not transactions:
+            log.error(f'Wire from {rule.issuer} to {rule.recipient} not recognized.')
+            raise ValueError
+    elif rule.kind == 'purchase':
+        transactions = household.split_purchase(rule.issuer, rule.amount, rule.recipient, percentage=rule.percentage)
+    else:
+        log.error(f'Rule kind {rule.kind} not recognized.')
+        raise ValueError
+    start = max(parse_date(start), parse_date(rule.start))
+    stop = min(parse_date(stop), parse_date(rule.stop)) if rule.stop is not None else parse_date(stop)
+    # Occurrences keep the rule start day of month, even when the projection starts later.
+    dates = monthly_dates(rule.start, stop, rule.months)
+    dates = dates[dates >= np.datetime64(start, 'D')]
+    return [(account, dates, Money.of(value).cents) for account, value, _ in transactions]
+
+
+def project(household, balances, timeline, rules=(), start=None, stop=None, frequency: str = 'monthly'):
+    """
+    Project household account balances from their current value, due `timeline` rows and recurring rules.
+
+    Parameters
+    ----------
+    household: Household
+        Household of the accounts, the timeline is paid from its `Household.loan_accounts`.
+    balances: dict
+        Account name to current balance in cents.
+    timeline: dict
+        Unfilled `timeline` columns as arrays, `date` as datetime64[D], `amount`, `user_1`
+        and `user_2` in cents. Rows due before `start` are projected on `start`.
+    rules: list of Rule.
+    start: First projected day, default to today.
+    stop: Day after the last projected day, default to the day after the last timeline row.
+    frequency: 'daily', or 'monthly' for the balances at the end of each month.
+
+    Returns
+    -------
+    Forecast
+    """
+    if frequency not in ['daily', 'monthly']:
+        raise ValueError(f'Frequency {frequency} not recognized.')
+    start = np.datetime64(parse_date(start), 'D')
+    if stop is None:
+        stop = timeline['date'].max() + 1 if len(timeline['date']) else start + 25 * 365
+    else:
+        stop = np.datetime64(parse_date(stop), 'D')
+    days = max(int((stop - start).astype(int)), 1)
+    # Account ids are their index in the account names.
+    accounts = household.names
+
+    # Flows are summed per account and day, then accumulated over days.
+    flows = np.zeros((len(accounts), days), dtype=np.int64)
+    offsets = np.clip((timeline['date'] - start).astype(np.int64), 0, None)
+    rows = offsets < days
+    if len(timeline['date']):
+        for account, column in zip(household.loan_accounts(), ['amount', 'user_1', 'user_2']):
+            flows[account] += np.bincount(
+                offsets[rows], weights=-timeline[column][rows], minlength=days
+            ).astype(np.int64)
+    for rule in rules:
+        for account, dates, amount in rule_events(rule, household, start.item(), stop.item()):
+            np.add.at(flows[account], (dates - start).astype(np.int64), amount)
+    projection = np.cumsum(flows, axis=1) + np.array([balances.get(account, 0) for account in accounts])[:, None]
+    dates = start + np.arange(days)
+
+    negative = {}
+    for account, values in zip(accounts, projection):
+        below = np.flatnonzero(values < 0)
+        negative[account] = dates[below[0]].item() if len(below) else None
+        if len(below):
+            log.warning(f'{account} balance goes negative on {negative[account]}.')
+
+    if frequency == 'monthly':
+        # Last projected day of each month.
+        months = dates.astype('datetime64[M]')
+        last = np.flatnonzero(np.r_[months[1:] != months[:-1], True])
+        dates, projection = dates[last], projection[:, last]
+    return Forecast(accounts, dates, projection, negative)
+
+
+async def project_forecast(database, rules=None, start=None, stop=None, frequency: str = 'monthly'):
+    """
+    Project the database household balances from the `balance` table, unfilled `timeline` rows and `Config.FORECAST_RULES`.
+
+    See `project` for the parameters.
+    """
+    household = database.loaded_household()
+    balances = {household.names[record['account']]: record['balance'] for record in await database.fetch('''
+        SELECT account, balance FROM balance
+        WHERE household = $1
+    ''', household.id)}
+    records = await database.fetch('''
+        SELECT date, amount, user_1, user_2 FROM timeline
+        WHERE household = $1 AND fill = false
+        ORDER BY date
+    ''', household.id)
+    timeline = {
+        'date': np.array([record['date'] for record in records], dtype='datetime64[D]'),
+        **{
+            column: np.array([record[column] for record in records], dtype=np.int64)
+            for column in ['amount', 'user_1', 'user_2']
+        },
+    }
+    rules = Config.FORECAST_RULES if rules is None else rules
+    return project(household, balances, timeline, [Rule(*rule) for rule in rules], start, stop, frequency)
@@ -0,0 +1,221 @@
+import logging
+from typing import NamedTuple
+
+from .utility import (
+    Config,
+    Money
+)
+
+log = logging.getLogger('household')
+log.setLevel('INFO')
+
+
+class Account(NamedTuple):
+    """
+    Household account, joint accounts list their member account ids and shares.
+    """
+    id: int
+    name: str
+    members: tuple = ()
+    shares: tuple = ()
+
+    @property
+    def joint(self):
+        return bool(self.members)
+
+
+class Household:
+    """
+    Household of N members and any number of joint accounts, whose ledger is stored in `wire` and `balance`.
+
+    Member accounts record what each member put into the household: wires to a joint
+    account credit both accounts, wires from a joint account and joint purchases debit
+    the joint account and its members according to their shares. `DB` is bound to
+    a household, and every query filters on its id, so that only its partitions of
+    `wire`, `balance` and `balance_history` are scanned, whatever the number of households.
+    """
+    def __init__(self, database, id: int, name: str, accounts):
+        """
+        Parameters
+        ----------
+        database: DB
+            Started database.
+        id: Household id.
+        name: Household name.
+        accounts: list of Account.
+        """
+        self.database = database
+        self.id = id
+        self.name = name
+        self.accounts = {account.name: account for account in accounts}
+
+    @property
+    def names(self):
+        """
+        Account names, in account id order.
+        """
+        return [account.name for account in sorted(self.accounts.values())]
+
+    @property
+    def objects(self):
+        """
+        Wire objects: `Config.STACKHOLDERS`, then the account names not among them.
+        """
+        return Config.STACKHOLDERS + [name for name in self.names if name not in Config.STACKHOLDERS]
+
+    @classmethod
+    async def create(cls, database, name: str, members, joint_accounts=None):
+        """
+        Create a household with one account per member and its joint accounts.
+
+        Parameters
+        ----------
+        members: list of member names.
+        joint_accounts: dict
+            Joint account name to a dict of member name to share, e.g.
+            `{'joint': {'alice': 60, 'bob': 40}}`. Default to one `joint` account
+            shared equally between all members.
+        """
+        if joint_accounts is None:
+            joint_accounts = {'joint': {member: 1 for member in members}}
+        accounts = [Account(id, member) for id, member in enumerate(members)]
+        ids = {account.name: account.id for account in accounts}
+        for account_name, shares in joint_accounts.items():
+            if unknown := set(shares) - set(members):
+                log.error(f'Members {unknown} of {account_name} not recognized.')
+                raise ValueError
+            accounts.append(Account(
+                len(accounts), account_name, tuple(ids[member] for member in shares), tuple(shares.values())
+            ))
+        if len({account.name for account in accounts}) != len(accounts):
+            log.error(f'Account names of household {name} should be unique.')
+            raise ValueError
+
+        async with database.transaction() as connection:
+            id = await connection.fetchval('''
+                INSERT INTO household(name) VALUES ($1) RETURNING id
+            ''', name)
+            await connection.executemany('''
+                INSERT INTO household_account(household, id, name, members, shares)
+                VALUES ($1, $2, $3, $4, $5)
+            ''', [
+                (id, account.id, account.name, list(account.members) or None, list(account.shares) or None)
+                for account in accounts
+            ])
+            await connection.execute('''
+                INSERT INTO balance(household, account)
+                SELECT $1, unnest($2::smallint[])
+            ''', id, [account.id for account in accounts])
+        log.info(f'Created household {name} with {len(members)} members and {len(joint_accounts)} joint accounts.')
+        return cls(database, id, name, accounts)
+
+    @classmethod
+    async def find(cls, database, name: str):
+        """
+        Load household `name` and its accounts, None if it does not exist.
+        """
+        records = await database.fetch('''
+            SELECT h.id AS household, a.id, a.name, a.members, a.shares
+            FROM household AS h
+            JOIN household_account AS a ON a.household = h.id
+            WHERE h.name = $1
+            ORDER BY a.id
+        ''', name)
+        if not records:
+            return None
+        accounts = [
+            Account(record['id'], record['name'], tuple(record['members'] or ()), tuple(record['shares'] or ()))
+            for record in records
+        ]
+        return cls(database, records[0]['household'], name, accounts)
+
+    @classmethod
+    async def load(cls, database, name: str):
+        """
+        Load household `name` and its accounts, raise ValueError if it does not exist.
+        """
+        household = await cls.find(database, name)
+        if household is None:
+            log.error(f'Household {name} not recognized.')
+            raise ValueError
+        return household
+
+    def account(self, name: str):
+        """
+        Get account `name`, raise ValueError if it is not in the household.
+        """
+        if name not in self.accounts:
+            log.error(f'Account {name} not recognized in household {self.name}.')
+            raise ValueError
+        return self.accounts[name]
+
+    def split_wire(self, issuer: str, recipient: str, amount):
+        """
+        Split a wire from `issuer` to `recipient` into per-account transactions.
+
+        Returns
+        -------
+        List of (account id, amount, object) in account id order, empty if the wire is not recognized.
+        """
+        issuer = self.account(issuer)
+        recipient = self.account(recipient)
+        amount = Money.of(amount)
+        if not issuer.joint and not recipient.joint:
+            transactions = [(issuer.id, amount, recipient.name), (recipient.id, -amount, issuer.name)]
+        elif not issuer.joint and issuer.id in recipient.members:
+            transactions = [(issuer.id, amount, recipient.name), (recipient.id, amount, issuer.name)]
+        elif not recipient.joint and recipient.id in issuer.members:
+            transactions = [(issuer.id, -amount, recipient.name), (recipient.id, -amount, issuer.name)]
+        else:
+            return []
+        # Accounts are always written in id order to avoid deadlocks.
+        transactions.sort(key=lambda transaction: transaction[0])
+        return transactions
+
+    def split_purchase(self, account: str, amount, recipient: str, shares=None, percentage: float = None):
+        """
+        Split a purchase paid from joint `account` between the account and its members.
+
+        Parameters
+        ----------
+        shares: dict
+            Member name to share, default to the account shares.
+        percentage: Percentage taken care of by the first member, for accounts of two members.
+
+        Returns
+        -------
+        List of (account id, amount, object) in account id order, amounts negative.
+        """
+        account = self.account(account)
+        if not account.joint:
+            log.error(f'Account {account.name} is not a joint account.')
+            raise ValueError
+        amount = Money.of(amount)
+        if percentage is not None:
+            if len(account.members) != 2:
+                log.error(f'Account {account.name} has {len(account.members)} members, a percentage splits between two.')
+                raise ValueError
+            members, weights = account.members, (percentage, 100 - percentage)
+        elif shares is None:
+            members, weights = account.members, account.shares
+        else:
+            members = [self.account(member).id for member in shares]
+            weights = list(shares.values())
+        parts = amount.allocate(weights)
+        transactions = [(account.id, -amount, recipient)] + [
+            (member, -part, recipient) for member, part in zip(members, parts)
+        ]
+        transactions.sort(key=lambda transaction: transaction[0])
+        return transactions
+
+    def loan_accounts(self):
+        """
+        Get the ids of the accounts paying the `amount`, `user_1` and `user_2` columns of `timeline`.
+
+        The loan is paid from joint account `Config.LOAN_ACCOUNT`, and split between its two members.
+        """
+        account = self.account(Config.LOAN_ACCOUNT)
+        if len(account.members) != 2:
+            log.error(f'Loan account {account.name} has {len(account.members)} members, the timeline splits between two.')
+            raise ValueError
+        return [account.id, *account.members]
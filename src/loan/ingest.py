@@ -0,0 +1,230 @@
+import asyncio
+import csv
+import datetime
+import functools
+import hashlib
+import itertools
+import logging
+from pathlib import Path
+import re
+from typing import NamedTuple
+
+from .utility import (
+    Config,
+    Money,
+    parse_date
+)
+
+log = logging.getLogger('ingest')
+log.setLevel('INFO')
+
+
+def import_key(text: str):
+    """
+    Hash a transaction identifier into a signed 64 bits integer.
+    """
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'big', signed=True)
+
+
+class BankRecord(NamedTuple):
+    """
+    Transaction read from a bank export, `amount` in cents, negative when money flows out.
+    """
+    date: datetime.date
+    amount: int
+    label: str
+    object: str
+    key: int
+
+
+@functools.lru_cache(maxsize=4096)
+def read_date(text: str, date_format: str = None):
+    """
+    Parse export dates, ISO format by default, cached as exports repeat dates.
+    """
+    if date_format is not None:
+        return datetime.datetime.strptime(text, date_format).date()
+    try:
+        return datetime.date.fromisoformat(text)
+    except ValueError:
+        return parse_date(text)
+
+
+def map_object(label: str, object: str = None):
+    """
+    Map a transaction to one of `Config.STACKHOLDERS`, or to an account of the household.
+
+    An explicit `object` is kept, otherwise the first keyword of `Config.IMPORT_MAPPING`
+    found in `label` is used, and `Config.IMPORT_DEFAULT` if none matches.
+    """
+    if object:
+        return object
+    label = label.lower()
+    for keyword, stackholder in Config.IMPORT_MAPPING.items():
+        if keyword in label:
+            return stackholder
+    return Config.IMPORT_DEFAULT
+
+
+def read_csv(path, account: str, date_format: str = None):
+    """
+    Stream transactions from a csv bank export.
+
+    Columns are read by name according to `Config.IMPORT_COLUMNS`, the `object` column is optional.
+    Exports carry no transaction identifier, rows are keyed by their content and their rank
+    among identical rows, so that overlapping exports are only imported once.
+    """
+    columns = Config.IMPORT_COLUMNS
+    with open(path, newline='') as f:
+        dialect = csv.Sniffer().sniff(f.readline(), delimiters=',;\t')
+        f.seek(0)
+        reader = csv.reader(f, dialect)
+        header = next(reader)
+        date_index = header.index(columns['date'])
+        amount_index = header.index(columns['amount'])
+        label_index = header.index(columns['label'])
+        object_index = header.index(columns['object']) if columns['object'] in header else None
+
+        seen = {}
+        for row in reader:
+            if not row:
+                continue
+            date = row[date_index]
+            amount = row[amount_index]
+            label = row[label_index]
+            rank = seen.get((date, amount, label), 0)
+            seen[date, amount, label] = rank + 1
+            key = import_key(f'{account}|{date}|{amount}|{label}|{rank}')
+            yield BankRecord(
+                read_date(date, date_format),
+                Money.parse(amount).cents,
+                label,
+                map_object(label, row[object_index] if object_index is not None else None),
+                key,
+            )
+
+
+OFX_TRANSACTION = re.compile(r'<STMTTRN>(.*?)</STMTTRN>', re.DOTALL)
+OFX_FIELD = re.compile(r'<(\w+)>([^<\r\n]*)')
+
+
+def read_ofx(path, account: str, date_format: str = None):
+    """
+    Stream transactions from an ofx bank export, keyed by their `FITID`.
+    """
+    with open(path, errors='replace') as f:
+        text = f.read()
+    for match in OFX_TRANSACTION.finditer(text):
+        fields = dict(OFX_FIELD.findall(match.group(1)))
+        label = fields.get('NAME') or fields.get('MEMO', '')
+        yield BankRecord(
+            datetime.datetime.strptime(fields['DTPOSTED'][:8], '%Y%m%d').date(),
+            Money.parse(fields['TRNAMT']).cents,
+            label,
+            map_object(label),
+            import_key(f'{account}|{fields["FITID"]}'),
+        )
+
+
+READERS = {
+    'csv': read_csv,
+    'ofx': read_ofx,
+}
+
+
+def to_wires(records, household, account: str, percentage: float = None):
+    """
+    Apply `DB.wire` and `DB.joint_purchase` rules to bank records.
+
+    Transfers between the household accounts appear in both exports, they are recorded
+    from the issuer export only, when money flows out. Other joint account transactions
+    are joint purchases split between its members, according to `percentage`, the share
+    of the first member, or to the account shares. Other individual account transactions
+    are personal spending, which individual balances do not track, they are skipped.
+
+    Parameters
+    ----------
+    household: Household
+        Household the account belongs to.
+
+    Yields
+    ------
+    (household, account, date, object, operation, debit, credit, import_key) tuples, amounts in cents.
+    """
+    joint = household.account(account).joint
+    objects = set(household.objects)
+    mirrored = 0
+    personal = 0
+    for date, amount, label, object, key in records:
+        if object in household.accounts:
+            if amount >= 0:
+                mirrored += 1
+                continue
+            transactions = household.split_wire(account, object, Money(-amount))
+            if not transactions:
+                log.warning(f'Wire from {account} to {object} not recognized, skipping {label}.')
+        elif object not in objects:
+            log.error(f'Stackholder {object} not recognized, skipping {label}.')
+            continue
+        elif joint:
+            transactions = household.split_purchase(account, Money(-amount), object, percentage=percentage)
+        else:
+            personal += 1
+            continue
+        for user, value, other in transactions:
+            yield household.id, user, date, other, label, max(-value.cents, 0), max(value.cents, 0), key
+    if mirrored:
+        log.debug(f'Skipped {mirrored} incoming transfers, recorded from the issuer export.')
+    if personal:
+        log.info(f'Skipped {personal} {account} transactions not involving our accounts.')
+
+
+def batched(iterable, size: int):
+    """
+    Split `iterable` into lists of `size` elements.
+    """
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+async def import_file(database, path, account: str, percentage: float = None, date_format: str = None, batch_size: int = None):
+    """
+    Import a bank export into the database.
+
+    Parameters
+    ----------
+    database: DB
+        Started database.
+    path: Path
+        Export file, its format is read from its extension, one of `READERS`.
+    account: Account of the database household the export belongs to.
+    percentage: Percentage of joint purchases taken care of by the first member, default to the account shares.
+    date_format: `strptime` format of csv dates, ISO dates by default.
+    batch_size: Number of bank transactions per database transaction, default to `Config.IMPORT_BATCH_SIZE`.
+
+    Returns
+    -------
+    Number of wire rows inserted, rows already imported are skipped.
+    """
+    path = Path(path)
+    reader = READERS.get(path.suffix.lower().lstrip('.'))
+    if reader is None:
+        log.error(f'Format of {path} not recognized.')
+        raise ValueError
+    household = database.loaded_household()
+    log.info(f'Importing {path} into {account} account.')
+    # Batches never split the wires of a bank transaction, which are deduplicated together.
+    batches = batched(reader(path, account, date_format), batch_size or Config.IMPORT_BATCH_SIZE)
+
+    def parse():
+        batch = next(batches, None)
+        return None if batch is None else list(to_wires(batch, household, account, percentage))
+
+    # The next batch is parsed in a thread while the current one is written.
+    count = 0
+    pending = asyncio.create_task(asyncio.to_thread(parse))
+    while (wires := await pending) is not None:
+        pending = asyncio.create_task(asyncio.to_thread(parse))
+        count += await database.import_wires(wires)
+    return count
@@ -1,4 +1,6 @@
 
+import asyncio
+import contextlib
 import datetime
 import glob
 import logging
@@ -7,6 +9,8 @@ from pathlib import Path
 import shutil
 import subprocess
 
+from . import trace
+from .cache import StatementCache
 from .utility import (
     Config,
     parse_date
@@ -16,14 +20,33 @@ log = logging.getLogger('latex')
 log.setLevel('INFO')
 
 
-def compile_latex(user, date):
+def statement_path(user, date, extension: str = 'pdf'):
     """
-    Compile LaTeX to generate pdf statement
+    Path of the statement of `user` ending at `date`.
     """
-    latex_path = Config.PATH / 'latex'
     target_path = Config.TARGET_PATH / user.capitalize()
     target_path.mkdir(parents=True, exist_ok=True)
-    file_name = parse_date(date).strftime('%Y_%m_%d.pdf')
+    return target_path / parse_date(date).strftime(f'%Y_%m_%d.{extension}')
+
+
+def compile_latex(user, date, cache: bool = True):
+    """
+    Compile LaTeX to generate pdf statement
+
+    Parameters
+    ----------
+    cache: bool
+        If True, reuse the pdf of identical tex sources from the `StatementCache`.
+    """
+    latex_path = Config.PATH / 'latex'
+    dest = statement_path(user, date)
+    target_path, file_name = dest.parent, dest.name
+    if cache:
+        cache = StatementCache()
+        key = cache.key(*(latex_path / name for name in ['main.tex', 'macro.tex', 'array.tex']))
+        if cache.get(key, dest):
+            clean_latex(latex_path)
+            return
 
     with subprocess.Popen(
         ["pdflatex", "main.tex"], stdout=subprocess.PIPE, universal_newlines=True, cwd=latex_path
@@ -39,12 +62,70 @@ def compile_latex(user, date):
                 for output in process.stdout.readlines():
                     log.debug(output.strip())
                 break
-    dest = target_path / file_name
+    # Failed builds may leave a partial pdf, which is neither published nor cached.
+    if return_code or not (latex_path / 'main.pdf').exists():
+        tail = ''
+        if (latex_path / 'main.log').exists():
+            output = (latex_path / 'main.log').read_text(errors='replace')
+            tail = '\n'.join(output.splitlines()[-Config.LATEX_LOG_TAIL:])
+        log.error(f'pdflatex failed for {user} statement on {date}:\n{tail}')
+        raise subprocess.CalledProcessError(return_code, 'pdflatex', tail)
     process = subprocess.run(["mv", "main.pdf", str(dest)], cwd=latex_path, check=True)
     log.info(f'New statements {file_name} in {target_path}')
+    if cache:
+        cache.put(key, dest)
     clean_latex(latex_path)
 
 
+async def compile_latex_async(user, date, build_path, semaphore: asyncio.Semaphore = None, cache: bool = True):
+    """
+    Compile LaTeX in `build_path` to generate pdf statement without blocking the event loop.
+
+    Parameters
+    ----------
+    build_path: Path
+        Folder holding `macro.tex` and `array.tex`, private to this statement.
+    semaphore: asyncio.Semaphore
+        Bound on the number of concurrent `pdflatex` processes.
+    cache: bool
+        If True, reuse the pdf of identical tex sources from the `StatementCache`.
+    """
+    build_path = Path(build_path)
+    shutil.copy(Config.PATH / 'latex' / 'main.tex', build_path / 'main.tex')
+    dest = statement_path(user, date)
+    if cache:
+        with trace.span('statement.cache'):
+            cache = StatementCache()
+            key = cache.key(*(build_path / name for name in ['main.tex', 'macro.tex', 'array.tex']))
+            hit = cache.get(key, dest)
+        if hit:
+            return
+
+    async with semaphore or contextlib.nullcontext():
+        with trace.span('statement.pdflatex'):
+            process = await asyncio.create_subprocess_exec(
+                "pdflatex", "-interaction=nonstopmode", "main.tex",
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT, cwd=build_path
+            )
+            output, _ = await process.communicate()
+    output = output.decode(errors='replace')
+    for line in output.splitlines():
+        log.debug(line.strip())
+    log.info(f'Latex return code {process.returncode} for {user}.')
+    if process.returncode or not (build_path / 'main.pdf').exists():
+        # The log holds the error, the console output is truncated by pdflatex.
+        if (build_path / 'main.log').exists():
+            output = (build_path / 'main.log').read_text(errors='replace')
+        tail = '\n'.join(output.splitlines()[-Config.LATEX_LOG_TAIL:])
+        log.error(f'pdflatex failed for {user} statement on {date}:\n{tail}')
+        raise subprocess.CalledProcessError(process.returncode, 'pdflatex', tail)
+    with trace.span('statement.move'):
+        shutil.move(build_path / 'main.pdf', dest)
+        if cache:
+            cache.put(key, dest)
+    log.info(f'New statements {dest.name} in {dest.parent}')
+
+
 def clean_latex(main_path):
     """Cleat latex auxilliary files"""
 
@@ -0,0 +1,309 @@
+import datetime
+import json
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+
+from .utility import (
+    Config,
+    Money,
+    parse_date
+)
+
+log = logging.getLogger('ledger')
+log.setLevel('INFO')
+
+COLUMNS = {
+    'id': np.int64,
+    'account': np.int8,
+    'date': np.int32,
+    'object': np.int16,
+    'operation': np.int32,
+    'debit': np.int64,
+    'credit': np.int64,
+}
+EPOCH = datetime.date(1970, 1, 1).toordinal()
+
+
+class Ledger:
+    """
+    Local columnar copy of the `wire` rows of a household, refreshed incrementally from the `wire.id` high-water mark.
+
+    Each column is an append-only binary file, memory-mapped on load. Dates are stored
+    as ordinals, accounts as ids, indices in the household account names, objects and
+    operations as indices in vocabularies, missing values as -1.
+    Queries mirror the `DB` ones, and are answered without round trips to the database.
+    """
+    def __init__(self, path=None):
+        """
+        Parameters
+        ----------
+        path: Path
+            Ledger folder, default to `Config.LEDGER_PATH`, or `.ledger` inside `Config.PATH`.
+        """
+        self.path = Path(path or Config.LEDGER_PATH or Config.PATH / '.ledger')
+        self.load()
+
+    def load(self):
+        """
+        Memory-map the columns written so far.
+        """
+        meta = self.path / 'meta.json'
+        if meta.exists():
+            with open(meta) as f:
+                meta = json.load(f)
+        else:
+            meta = {'count': 0, 'high_water': 0, 'operations': []}
+        self.count = meta['count']
+        self.high_water = meta['high_water']
+        # Ledgers written before households are reloaded, see `refresh`.
+        self.household = meta.get('household')
+        self.accounts = meta.get('accounts', [])
+        self.objects = meta.get('objects', [])
+        self.operations = meta['operations']
+        self.object_codes = {object: code for code, object in enumerate(self.objects)}
+        self.codes = {operation: code for code, operation in enumerate(self.operations)}
+        self.columns = {}
+        for name, dtype in COLUMNS.items():
+            if self.count:
+                self.columns[name] = np.memmap(self.path / f'{name}.bin', dtype=dtype, mode='r', shape=(self.count,))
+            else:
+                self.columns[name] = np.empty(0, dtype=dtype)
+        # Per account date-sorted views, built on first query.
+        self.indexes = {}
+
+    def clear(self):
+        """
+        Delete the local copy.
+        """
+        log.info(f'Clearing ledger {self.path}.')
+        (self.path / 'meta.json').unlink(missing_ok=True)
+        for name in COLUMNS:
+            (self.path / f'{name}.bin').unlink(missing_ok=True)
+        self.load()
+
+    @staticmethod
+    def encode(values, vocabulary, codes):
+        """
+        Get the codes of `values` in `vocabulary`, extended with the new values, -1 for None.
+        """
+        encoded = []
+        for value in values:
+            if value is None:
+                encoded.append(-1)
+                continue
+            if value not in codes:
+                codes[value] = len(vocabulary)
+                vocabulary.append(value)
+            encoded.append(codes[value])
+        return encoded
+
+    def append(self, records):
+        """
+        Append `wire` records of the ledger household, in `id` order, to the column files.
+        """
+        columns = {
+            'id': [record['id'] for record in records],
+            'account': [record['account'] for record in records],
+            'date': [record['date'].toordinal() for record in records],
+            'object': self.encode([record['object'] for record in records], self.objects, self.object_codes),
+            'operation': self.encode([record['operation'] for record in records], self.operations, self.codes),
+            'debit': [record['debit'] or 0 for record in records],
+            'credit': [record['credit'] or 0 for record in records],
+        }
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        for name, dtype in COLUMNS.items():
+            path = self.path / f'{name}.bin'
+            with open(path, 'r+b' if path.exists() else 'wb') as f:
+                # Drop rows left by an interrupted append, `meta.json` is the source of truth.
+                f.truncate(self.count * np.dtype(dtype).itemsize)
+                f.seek(0, os.SEEK_END)
+                np.asarray(columns[name], dtype=dtype).tofile(f)
+        meta = {
+            'count': self.count + len(records),
+            'high_water': columns['id'][-1],
+            'household': self.household,
+            'accounts': self.accounts,
+            'objects': self.objects,
+            'operations': self.operations,
+        }
+        with open(self.path / 'meta.json.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(self.path / 'meta.json.tmp', self.path / 'meta.json')
+        self.load()
+
+    async def refresh(self, database, page_size: int = None):
+        """
+        Fetch the wires of the database household recorded since the last refresh.
+
+        The ledger is checked against the `balance` table within the same snapshot,
+        and reloaded from scratch if they disagree, e.g. when a wire with a lower id
+        committed after the last refresh, or when the database was reset.
+
+        Parameters
+        ----------
+        database: DB
+            Started database, bound to the household of the ledger if any.
+        page_size: Number of wires fetched per round trip, default to `Config.LEDGER_PAGE_SIZE`.
+
+        Returns
+        -------
+        Number of wires fetched.
+        """
+        page_size = page_size or Config.LEDGER_PAGE_SIZE
+        household = database.loaded_household()
+        if self.count and self.household != household.name:
+            log.info(f'Ledger {self.path} does not hold household {household.name}, reloading it.')
+            self.clear()
+        count = self.count
+        for _ in range(2):
+            self.household, self.accounts = household.name, household.names
+            async with database.transaction(isolation='repeatable_read') as connection:
+                while records := await connection.fetch('''
+                    SELECT id, account, date, object, operation, debit, credit FROM wire
+                    WHERE household = $1 AND id > $2
+                    ORDER BY id
+                    LIMIT $3
+                ''', household.id, self.high_water, page_size):
+                    self.append(records)
+                balances = await connection.fetch('''
+                    SELECT account, debit, credit FROM balance
+                    WHERE household = $1
+                ''', household.id)
+            if self.consistent(balances):
+                break
+            log.warning('Ledger does not match the balance table, reloading it.')
+            self.clear()
+            count = 0
+        else:
+            log.error('Ledger does not match the balance table after reloading.')
+        log.info(f'Fetched {self.count - count} wires into the ledger.')
+        return self.count - count
+
+    def consistent(self, balances):
+        """
+        Compare debit and credit totals per account with `balance` records.
+        """
+        for record in balances:
+            rows = self.columns['account'] == record['account']
+            debit = int(self.columns['debit'][rows].sum())
+            credit = int(self.columns['credit'][rows].sum())
+            if (debit, credit) != (record['debit'], record['credit']):
+                log.debug(f'Account {record["account"]} ledger totals {debit}, {credit} differ from balance.')
+                return False
+        return True
+
+    async def check(self, database):
+        """
+        Check the ledger against the `balance` table.
+        """
+        return self.consistent(await database.fetch('''
+            SELECT account, debit, credit FROM balance
+            WHERE household = $1
+        ''', database.household_id))
+
+    def index(self, user: str):
+        """
+        Get `user` rows sorted by date, their dates, and the running balance before each of them.
+        """
+        if user not in self.indexes:
+            if user not in self.accounts:
+                log.error(f'Account {user} not recognized in ledger of household {self.household}.')
+                raise ValueError
+            rows = np.flatnonzero(self.columns['account'] == self.accounts.index(user))
+            rows = rows[np.argsort(self.columns['date'][rows], kind='stable')]
+            amounts = self.columns['credit'][rows] - self.columns['debit'][rows]
+            self.indexes[user] = (
+                rows,
+                # Same dtype as the searched ordinals, searchsorted would cast the whole array otherwise.
+                self.columns['date'][rows].astype(np.int64),
+                np.concatenate(([0], np.cumsum(amounts))),
+            )
+        return self.indexes[user]
+
+    def select(self, user: str, start_date, stop_date):
+        """
+        Get `user` rows with dates in [start_date, stop_date), sorted by date.
+        """
+        rows, dates, _ = self.index(user)
+        start, stop = np.searchsorted(dates, [parse_date(start_date).toordinal(), parse_date(stop_date).toordinal()])
+        return rows[start:stop]
+
+    def get_date_balance(self, user: str, date):
+        """
+        Get balance for `user` at specified date, see `DB.get_date_balance`.
+        """
+        _, dates, balances = self.index(user)
+        return Money(balances[np.searchsorted(dates, parse_date(date).toordinal())])
+
+    def wire_total(self, user: str, start_date='2022-07-01', stop_date='2050-01-01'):
+        """
+        Get the sum of `credit - debit` over `user` wires between two dates.
+        """
+        _, dates, balances = self.index(user)
+        start, stop = np.searchsorted(dates, [parse_date(start_date).toordinal(), parse_date(stop_date).toordinal()])
+        return Money(balances[stop] - balances[start])
+
+    def totals(self, rows, keys):
+        """
+        Sum debit and credit of `rows` per key.
+        """
+        keys, inverse = np.unique(keys, return_inverse=True)
+        debit = np.bincount(inverse, self.columns['debit'][rows], len(keys)).astype(np.int64)
+        credit = np.bincount(inverse, self.columns['credit'][rows], len(keys)).astype(np.int64)
+        return keys, debit.tolist(), credit.tolist()
+
+    def wire_monthly_totals(self, user: str, start_date='2022-07-01', stop_date='2050-01-01'):
+        """
+        Get `user` debit and credit totals per month, amounts in cents.
+        """
+        rows = self.select(user, start_date, stop_date)
+        months = (self.columns['date'][rows] - EPOCH).astype('datetime64[D]').astype('datetime64[M]')
+        months, debits, credits = self.totals(rows, months)
+        return [
+            {'month': month, 'debit': debit, 'credit': credit}
+            for month, debit, credit in zip(months.astype('datetime64[D]').tolist(), debits, credits)
+        ]
+
+    def wire_object_totals(self, user: str, start_date='2022-07-01', stop_date='2050-01-01'):
+        """
+        Get `user` debit and credit totals per wire object, amounts in cents.
+        """
+        rows = self.select(user, start_date, stop_date)
+        objects, debits, credits = self.totals(rows, self.columns['object'][rows])
+        return [
+            {'object': self.objects[object] if object >= 0 else None, 'debit': debit, 'credit': credit}
+            for object, debit, credit in zip(objects.tolist(), debits, credits)
+        ]
+
+    def load_wire(self, user: str, start_date='2022-07-01', stop_date='2050-01-01'):
+        """
+        Get `user` wire history as a list of records, see `DB.load_wire`.
+        """
+        rows = self.select(user, start_date, stop_date)
+        columns = {name: self.columns[name][rows].tolist() for name in COLUMNS}
+        return [
+            {
+                'id': id,
+                'account': user,
+                'date': datetime.date.fromordinal(date),
+                'object': self.objects[object] if object >= 0 else None,
+                'operation': self.operations[operation] if operation >= 0 else None,
+                'debit': debit,
+                'credit': credit,
+            }
+            for id, date, object, operation, debit, credit in zip(
+                columns['id'], columns['date'], columns['object'],
+                columns['operation'], columns['debit'], columns['credit'],
+            )
+        ]
+
+    async def iter_wire(self, user: str, start_date='2022-07-01', stop_date='2050-01-01', prefetch: int = None):
+        """
+        Iterate over `user` wire history, drop-in replacement of `DB.iter_wire`.
+        """
+        for record in self.load_wire(user, start_date, stop_date):
+            yield record
@@ -1,13 +1,55 @@
 
 import datetime
 import logging
+from typing import TYPE_CHECKING, NamedTuple
 
-from .db import DB
+import numpy as np
+
+from . import trace
+from .utility import Money
+
+if TYPE_CHECKING:
+    from .db import DB
 
 log = logging.getLogger('db')
 log.setLevel('DEBUG')
 
 
+class Schedule(NamedTuple):
+    """
+    Amortization schedule, one entry per period.
+
+    `capital` is the remaining capital at the end of the period, after early repayment.
+    """
+    period: np.ndarray
+    payment: np.ndarray
+    interest: np.ndarray
+    principal: np.ndarray
+    repayment: np.ndarray
+    capital: np.ndarray
+
+    def cents(self):
+        """
+        Round amounts to integer cents, see `Money.to_cents`.
+
+        Payments and capital are rounded, principal and interest are derived
+        from them so that the schedule adds up exactly.
+        """
+        payment = Money.to_cents(self.payment)
+        repayment = Money.to_cents(self.repayment)
+        capital = Money.to_cents(self.capital)
+        start = Money.to_cents(self.capital[:1] + self.principal[:1] + self.repayment[:1])
+        principal = np.concatenate((start, capital[:-1])) - capital - repayment
+        return Schedule(
+            period=self.period,
+            payment=payment,
+            interest=payment - principal,
+            principal=principal,
+            repayment=repayment,
+            capital=capital,
+        )
+
+
 class Loan:
     """
     Computer for loan payment
@@ -15,17 +57,17 @@ class Loan:
     Class Attributes
     ----------------
     annual_rate: float
-        Annual interest rate.
+        Default annual interest rate.
     percentage_cost: float
         Camca cost at 1.1 percent of total amount.
     length: int
-        Number of months to repay the credit.
+        Default number of months to repay the credit.
     """
     annual_rate = 2 / 100
     percentage_cost = 1.1 / 100
     length = 25 * 12
     
-    def __init__(self, amount, processing_cost, monthly_cost):
+    def __init__(self, amount, processing_cost, monthly_cost, annual_rate=None, length=None, deferral=0, capitalize=False):
         """
         Parameters
         ----------
@@ -35,16 +77,134 @@ class Loan:
             Amount in euros to process the applications
         monthly_cost: float
             Amount of the monthly insurance.
+        annual_rate: float
+            Annual interest rate, default to the class attribute.
+        length: int
+            Number of months to repay the credit, including deferral, default to the class attribute.
+        deferral: int
+            Number of months at the start of the loan during which no capital is repaid.
+        capitalize: bool
+            If True, interest is not paid during deferral but added to the capital.
         """
+        if annual_rate is not None:
+            self.annual_rate = annual_rate
+        if length is not None:
+            self.length = length
+        if not 0 <= deferral < self.length:
+            raise ValueError(f'Deferral {deferral} should be smaller than loan length {self.length}.')
+        self.amount = amount
+        self.deferral = deferral
+        self.capitalize = capitalize
         self.rate = self.annual_rate / 12
         self.upfront_cost = self.percentage_cost * amount
         self.processing_cost = processing_cost
         self.monthly_cost = monthly_cost
-        self.monthly_repay = self.period_repay(self.rate, self.length) * amount
+        capital = amount * (1 + self.rate) ** deferral if capitalize else amount
+        self.monthly_repay = self.period_repay(self.rate, self.length - deferral) * capital
 
     @staticmethod
     def period_repay(rate, num_periods):
-        return rate * (1 + rate) ** num_periods / ((1 + rate) ** num_periods - 1)
+        """
+        Payment per period to repay one unit of capital, broadcast over arrays.
+        """
+        rate = np.asarray(rate, dtype=float)
+        num_periods = np.asarray(num_periods, dtype=float)
+        growth = (1 + rate) ** num_periods
+        with np.errstate(divide='ignore', invalid='ignore'):
+            repay = np.where(rate == 0, 1 / num_periods, rate * growth / (growth - 1))
+        return repay[()]
+
+    @staticmethod
+    def amortize(capital, rate, payment, num_periods):
+        """
+        Closed-form schedule of `num_periods` constant payments on `capital`.
+
+        Returns
+        -------
+        payment, interest, principal, capital: np.ndarray
+            The last payment is adjusted so that the capital never goes below zero.
+        """
+        growth = (1 + rate) ** np.arange(num_periods + 1)
+        if rate:
+            remaining = capital * growth - payment * (growth - 1) / rate
+        else:
+            remaining = capital - payment * np.arange(num_periods + 1)
+        remaining = np.maximum(remaining, 0)
+        interest = rate * remaining[:-1]
+        principal = remaining[:-1] - remaining[1:]
+        return interest + principal, interest, principal, remaining[1:]
+
+    def schedule(self, repayments=None, shorten=False):
+        """
+        Compute the full amortization schedule.
+
+        Parameters
+        ----------
+        repayments: dict
+            Early repayments as {period: amount}, applied right after the payment of `period`.
+            A repayment larger than the remaining capital repays the loan in full.
+        shorten: bool
+            If True, early repayments keep the payment and shorten the loan,
+            otherwise they keep the length and lower the payment.
+
+        Returns
+        -------
+        Schedule of numpy arrays.
+        """
+        rate = self.rate
+        capital = float(self.amount)
+        blocks = []
+
+        if self.deferral:
+            periods = np.arange(1, self.deferral + 1)
+            if self.capitalize:
+                remaining = capital * (1 + rate) ** periods
+                interest = rate * np.concatenate(([capital], remaining[:-1]))
+                blocks.append((np.zeros(self.deferral), interest, -interest, remaining))
+                capital = remaining[-1]
+            else:
+                interest = np.full(self.deferral, rate * capital)
+                blocks.append((interest, interest, np.zeros(self.deferral), np.full(self.deferral, capital)))
+
+        start = self.deferral
+        payment = self.monthly_repay
+        num_periods = self.length - self.deferral
+        extras = np.zeros(self.length)
+        for period, amount in sorted((repayments or {}).items()):
+            if not start < period <= start + num_periods:
+                raise ValueError(f'Early repayment at period {period} is outside of the amortization period.')
+            block = self.amortize(capital, rate, payment, period - start)
+            blocks.append(block)
+            amount = min(amount, block[-1][-1])
+            capital = block[-1][-1] - amount
+            extras[period - 1] = amount
+            num_periods -= period - start
+            start = period
+            if capital <= 0:
+                num_periods = 0
+                break
+            if shorten:
+                with np.errstate(divide='ignore'):
+                    if rate:
+                        num_periods = -np.log1p(-rate * capital / payment) / np.log1p(rate)
+                    else:
+                        num_periods = capital / payment
+                num_periods = int(np.ceil(num_periods - 1e-9))
+            else:
+                payment = self.period_repay(rate, num_periods) * capital
+        if num_periods:
+            blocks.append(self.amortize(capital, rate, payment, num_periods))
+
+        payment, interest, principal, capital = (np.concatenate(arrays) for arrays in zip(*blocks))
+        extras = extras[:len(payment)]
+        return Schedule(
+            period=np.arange(1, len(payment) + 1),
+            payment=payment,
+            interest=interest,
+            principal=principal,
+            repayment=extras,
+            capital=capital - extras,
+        )
 
     @property
     def total_repay(self):
@@ -52,13 +212,56 @@ class Loan:
     
     @property
     def total_cost(self):
-        return (self.monthly_repay + self.monthly_cost) * self.length + self.upfront_cost + self.processing_cost
+        deferral_repay = 0 if self.capitalize else self.deferral * self.rate * self.amount
+        return (
+            self.monthly_repay * (self.length - self.deferral) + deferral_repay
+            + self.monthly_cost * self.length + self.upfront_cost + self.processing_cost
+        )
+
+
+def build_timeline(joint_loan: Loan, user_1_loan: Loan, user_2_loan: Loan, date=datetime.date(2022, 7, 6)):
+    """
+    Build the full `timeline` schedule at once.
+
+    Parameters
+    ----------
+    joint_loan, user_1_loan, user_2_loan: Loan Objects
+        Loans for the joint account and each individual share.
+    date: datetime.date
+        Date of the loan signature, mensualities fall on the same day of the following months.
+
+    Returns
+    -------
+    rows: list of tuples
+        (amount, user_1, user_2, date, month, requester) with amounts in cents.
+    """
+    def amounts(attribute):
+        return tuple(
+            Money.of(getattr(loan, attribute)).cents
+            for loan in (joint_loan, user_1_loan, user_2_loan)
+        )
+
+    rows = [
+        (*amounts('processing_cost'), date, 1, 'fee'),
+        (*amounts('upfront_cost'), date, 1, 'fee'),
+    ]
+    repay = amounts('monthly_repay')
+    cost = amounts('monthly_cost')
+    for i in range(joint_loan.length):
+        year, month = divmod(date.month + i, 12)
+        due_date = datetime.date(date.year + year, month + 1, date.day)
+        rows.append((*repay, due_date, i + 1, 'loan'))
+        rows.append((*cost, due_date, i + 1, 'insurance'))
+    return rows
 
 
-async def populate_timeline(database: DB):
+@trace.traced('populate_timeline')
+async def populate_timeline(database: 'DB'):
     """
     Populate `timeline` table in the specified database
 
+    The table is reset and filled within a single transaction.
+
     Parameters
     ----------
     database: DB Object
@@ -67,32 +270,7 @@ async def populate_timeline(database: DB):
     user_1_loan = Loan(60000, 600, 30)
     user_2_loan = Loan(40000, 400, 30)
 
-    amount = joint_loan.processing_cost
-    user_1 = user_1_loan.processing_cost
-    user_2 = user_2_loan.processing_cost
-    date = datetime.date(2022, 7, 6)
-    await database.write_mensuality(amount, user_1, user_2, date, 1, 'fee')
-
-    amount = joint_loan.upfront_cost
-    user_1 = user_1_loan.upfront_cost
-    user_2 = user_2_loan.upfront_cost
-    await database.write_mensuality(amount, user_1, user_2, date, 1, 'fee')
-
-    log.info('Loan upfront cost written.')
-
-    for i in range(joint_loan.length):
-        amount = joint_loan.monthly_repay
-        user_1 = user_1_loan.monthly_repay
-        user_2 = user_2_loan.monthly_repay
-
-        month = (7 + i) % 12 + 1
-        year = (7 + i) // 12 + 2022
-        date = datetime.date(year, month, 6)
-        await database.write_mensuality(amount, user_1, user_2, date, i + 1, 'loan')
-
-        amount = joint_loan.monthly_cost
-        user_1 = user_1_loan.monthly_cost
-        user_2 = user_2_loan.monthly_cost
-        await database.write_mensuality(amount, user_1, user_2, date, i + 1, 'insurance')
-    
+    with trace.span('build_timeline'):
+        rows = build_timeline(joint_loan, user_1_loan, user_2_loan)
+    await database.write_timeline(rows)
     log.info('Loan mensuality written.')
@@ -0,0 +1,278 @@
+import csv
+import datetime
+import html
+import io
+
+from .utility import Money
+
+
+class StatementBackend:
+    """
+    Interface of statement renderers.
+
+    A backend turns the opening balance, each wire record and the closing balance
+    into chunks of text, written one after the other to an output stream.
+    Amounts are given in cents.
+    """
+    extension = None
+
+    def __init__(self, user: str, start_date, stop_date):
+        self.user = user
+        self.start_date = start_date
+        self.stop_date = stop_date
+
+    def header(self, balance: int) -> str:
+        raise NotImplementedError
+
+    def footer(self, balance: int) -> str:
+        raise NotImplementedError
+
+    def line(self, date, operation: str, debit: str, credit: str) -> str:
+        raise NotImplementedError
+
+    @staticmethod
+    def escape(text: str) -> str:
+        return text
+
+    def operation(self, record) -> str:
+        return self.escape(f"{record['object']} : {record['operation']}")
+
+    def row(self, record) -> str:
+        return self.line(
+            record['date'],
+            self.operation(record),
+            Money.format(record['debit']) if record['debit'] else '',
+            Money.format(record['credit']) if record['credit'] else '',
+        )
+
+    def balance_row(self, date, balance: int) -> str:
+        if balance < 0:
+            return self.line(date, 'balance', Money.format(-balance), '')
+        return self.line(date, 'balance', '', Money.format(balance))
+
+
+class LatexBackend(StatementBackend):
+    """
+    Statement array as a `longtable`, to be input in `latex/main.tex`.
+    """
+    extension = 'tex'
+    special = str.maketrans({
+        char: '\\' + char for char in '&%$#_{}'
+    })
+
+    def header(self, balance):
+        tex = '\\begin{longtable}{|L{3cm}|L{5cm}|R{2cm}|R{2cm}|}\n'
+        tex += '\\hline\n'
+        tex += " {\\bf date} & {\\bf operation} & {\\bf debit} & {\\bf credit} \\\\\n"
+        tex += '\\hline\n'
+        tex += '\\endhead\n'
+        tex += '\\hline\n'
+        tex += '\\endfoot\n'
+        tex += '\\endlastfoot\n'
+        tex += self.balance_row(self.start_date, balance)
+        tex += '&&&\\\\\n'
+        return tex
+
+    def footer(self, balance):
+        tex = '&&&\\\\\n'
+        tex += '\\hline\n'
+        tex += self.balance_row(self.stop_date, balance)
+        tex += '\\hline\n'
+        tex += '\\end{longtable}'
+        return tex
+
+    def line(self, date, operation, debit, credit):
+        return f"{date} & {operation} & {debit} & {credit} \\\\\n"
+
+    @classmethod
+    def escape(cls, text):
+        return text.translate(cls.special)
+
+
+class CsvBackend(StatementBackend):
+    """
+    Statement as comma separated values, balances included as rows.
+    """
+    extension = 'csv'
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer, lineterminator='\n')
+
+    def header(self, balance):
+        return self.line('date', 'operation', 'debit', 'credit') + self.balance_row(self.start_date, balance)
+
+    def footer(self, balance):
+        return self.balance_row(self.stop_date, balance)
+
+    def line(self, date, operation, debit, credit):
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self.writer.writerow([date, operation, debit, credit])
+        return self.buffer.getvalue()
+
+
+class HtmlBackend(StatementBackend):
+    """
+    Self-contained html statement.
+    """
+    extension = 'html'
+    style = (
+        'body{font-family:sans-serif;margin:3em}'
+        'table{border-collapse:collapse}'
+        'th,td{border:1px solid #444;padding:.2em .6em}'
+        'td.amount{text-align:right}'
+    )
+
+    def header(self, balance):
+        title = f'{html.escape(self.user.capitalize())} statement'
+        return (
+            '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+            f'<title>{title}</title>\n<style>{self.style}</style>\n</head>\n<body>\n'
+            f'<h1>{title}</h1>\n'
+            f'<p>From {self.start_date} to {self.stop_date}</p>\n'
+            '<table>\n'
+            '<thead><tr><th>date</th><th>operation</th><th>debit</th><th>credit</th></tr></thead>\n'
+            '<tbody>\n'
+            + self.balance_row(self.start_date, balance)
+        )
+
+    def footer(self, balance):
+        return self.balance_row(self.stop_date, balance) + '</tbody>\n</table>\n</body>\n</html>\n'
+
+    def line(self, date, operation, debit, credit):
+        return (
+            f'<tr><td>{date}</td><td>{operation}</td>'
+            f'<td class="amount">{debit}</td><td class="amount">{credit}</td></tr>\n'
+        )
+
+    @staticmethod
+    def escape(text):
+        return html.escape(text)
+
+
+class PdfBackend(StatementBackend):
+    """
+    Pdf statement written in-process with the standard Helvetica fonts, without LaTeX.
+
+    Pages are emitted as soon as they are full, the document catalog and
+    cross-reference table are written by `footer`. The output is plain ascii,
+    write it to a stream opened with `newline=''`.
+    """
+    extension = 'pdf'
+    width, height = 595, 842
+    margin = 72
+    size = 9
+    leading = 13
+    columns = (72, 150, 450, 523)
+    max_operation = 44
+    # Helvetica glyph widths in thousandths of the font size, used to right-align amounts.
+    glyphs = {**dict.fromkeys('0123456789', 556), '.': 278, '-': 333}
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.offset = 0
+        self.offsets = {}
+        self.kids = []
+        self.content = []
+        self.y = self.height - self.margin
+        # Objects 1 to 4 are the catalog, the page tree and the fonts.
+        self.next_object = 5
+
+    @staticmethod
+    def escape(text):
+        text = text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+        return ''.join(
+            char if ord(char) < 128 else f'\\{ord(char) if ord(char) < 256 else 63:03o}'
+            for char in text
+        )
+
+    def operation(self, record):
+        operation = f"{record['object']} : {record['operation']}"
+        if len(operation) > self.max_operation:
+            operation = operation[:self.max_operation - 3] + '...'
+        return self.escape(operation)
+
+    def write_object(self, number: int, body: str) -> str:
+        chunk = f'{number} 0 obj\n{body}\nendobj\n'
+        self.offsets[number] = self.offset
+        self.offset += len(chunk)
+        return chunk
+
+    def text(self, x, text, font='F1', size=None):
+        self.content.append(f'BT /{font} {size or self.size} Tf {x:.2f} {self.y:.2f} Td ({text}) Tj ET')
+
+    def amount(self, right, amount):
+        width = sum(self.glyphs.get(char, 556) for char in amount) * self.size / 1000
+        self.text(right - width, amount)
+
+    def rule(self):
+        y = self.y + self.leading - self.size / 2 - 1
+        self.content.append(f'{self.columns[0]} {y:.2f} m {self.width - self.margin} {y:.2f} l S')
+
+    def column_titles(self):
+        for x, title in zip(self.columns[:2], ['date', 'operation']):
+            self.text(x, title, 'F2')
+        for right, title in zip(self.columns[2:], ['debit', 'credit']):
+            self.text(right - len(title) * self.size * 0.55, title, 'F2')
+        self.y -= self.leading
+        self.rule()
+
+    def flush_page(self) -> str:
+        content = '\n'.join(self.content)
+        stream, page = self.next_object, self.next_object + 1
+        self.next_object += 2
+        self.kids.append(page)
+        self.content = []
+        self.y = self.height - self.margin
+        return self.write_object(
+            stream, f'<< /Length {len(content)} >>\nstream\n{content}\nendstream'
+        ) + self.write_object(page, (
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.width} {self.height}] '
+            f'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {stream} 0 R >>'
+        ))
+
+    def header(self, balance):
+        chunk = '%PDF-1.4\n'
+        self.offset = len(chunk)
+        self.text(self.columns[0], f'{self.escape(self.user.capitalize())} statement', 'F2', 16)
+        self.y -= 2 * self.leading
+        self.text(self.columns[0], f'From {self.start_date} to {self.stop_date}', 'F1', 10)
+        self.y -= self.leading
+        self.text(self.columns[0], f'Generated on {datetime.date.today()}', 'F1', 10)
+        self.y -= 2 * self.leading
+        self.column_titles()
+        return chunk + self.balance_row(self.start_date, balance)
+
+    def line(self, date, operation, debit, credit):
+        chunk = ''
+        if self.y < self.margin:
+            chunk = self.flush_page()
+            self.column_titles()
+        self.text(self.columns[0], date)
+        self.text(self.columns[1], operation)
+        self.amount(self.columns[2], debit)
+        self.amount(self.columns[3], credit)
+        self.y -= self.leading
+        return chunk
+
+    def footer(self, balance):
+        self.rule()
+        chunk = self.balance_row(self.stop_date, balance)
+        chunk += self.flush_page()
+        chunk += self.write_object(3, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+        chunk += self.write_object(4, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>')
+        kids = ' '.join(f'{kid} 0 R' for kid in self.kids)
+        chunk += self.write_object(2, f'<< /Type /Pages /Kids [{kids}] /Count {len(self.kids)} >>')
+        chunk += self.write_object(1, '<< /Type /Catalog /Pages 2 0 R >>')
+        xref = self.offset
+        chunk += f'xref\n0 {self.next_object}\n0000000000 65535 f \n'
+        chunk += ''.join(f'{self.offsets[number]:010d} 00000 n \n' for number in range(1, self.next_object))
+        chunk += f'trailer\n<< /Size {self.next_object} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'
+        return chunk
+
+
+BACKENDS = {
+    backend.extension: backend for backend in [LatexBackend, CsvBackend, HtmlBackend, PdfBackend]
+}
@@ -1,9 +1,12 @@
 
+import io
 import logging
+from pathlib import Path
 
+from .render import BACKENDS
 from .utility import (
-    AmountConverter,
     Config,
+    Money,
     parse_date
 )
 
@@ -17,8 +20,6 @@ class TexHandler:
     """
     def __init__(self, user: str, start_date=None, stop_date=None):
         log.debug('Parsing statement arguments.')
-        if user not in Config.DB_USERS:
-            raise ValueError(f'User {user} not recognized.')
         self.user = user
         if start_date is None:
             start_date = '2022-01-01'
@@ -37,6 +38,56 @@ class TexHandler:
         macros += '\\newcommand{\\stopdate}{' + self.stop_date.strftime('%Y-%m-%d') + '}\n'
         return macros
 
+    def backend(self, backend: str = 'tex'):
+        """
+        Instantiate the renderer registered for `backend` in `render.BACKENDS`.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f'Backend {backend} not recognized.')
+        return BACKENDS[backend](self.user, self.start_date, self.stop_date)
+
+    def render(self, wire_records, stream, balance=0, backend: str = 'tex'):
+        """
+        Write statement to `stream` row by row.
+
+        Parameters
+        ----------
+        wire_records: iterable of asyncpg.Record
+            User record loaded from wire table.
+        stream: file-like object
+            Output with a `write` method.
+        balance: Money or float
+            Amount of money credited to the user
+        backend: str
+            Output format, one of `render.BACKENDS`.
+
+        Returns
+        -------
+        balance: int
+            Closing balance in cents.
+        """
+        renderer = self.backend(backend)
+        balance = Money.of(balance).cents
+        stream.write(renderer.header(balance))
+        for record in wire_records:
+            stream.write(renderer.row(record))
+            balance += record['credit'] - record['debit']
+        stream.write(renderer.footer(balance))
+        return balance
+
+    async def render_async(self, wire_records, stream, balance=0, backend: str = 'tex'):
+        """
+        Write statement to `stream` from an async iterator of records, see `render`.
+        """
+        renderer = self.backend(backend)
+        balance = Money.of(balance).cents
+        stream.write(renderer.header(balance))
+        async for record in wire_records:
+            stream.write(renderer.row(record))
+            balance += record['credit'] - record['debit']
+        stream.write(renderer.footer(balance))
+        return balance
+
     def record_to_latex(self, wire_records, balance=0):
         """
         Generate core array for statement
@@ -45,56 +96,110 @@ class TexHandler:
         ----------
         records: list of asyncpg.Record
             User record loaded from wire table.
-        balance: float
+        balance: Money or float
             Amount of money credited to the user
         """
         log.info('Generating tex main array.')
-        tex = '\\begin{tabular}{|L{3cm}|L{5cm}|R{2cm}|R{2cm}|}\n'
-        tex += '\\hline\n'
-        tex += " {\\bf date} & {\\bf operation} & {\\bf debit} & {\\bf credit} \\\\\n"
-        tex += '\\hline\n'
-        if balance < 0:
-            tex += f" {self.start_date.strftime('%Y-%m-%d')} & balance & {-balance} & \\\\\n"
-        else:
-            tex += f" {self.start_date.strftime('%Y-%m-%d')} & balance & & {balance} \\\\\n"
-        tex += '&&&\\\\\n'
-        for record in wire_records:
-            debit = AmountConverter.from_db(record['debit'])
-            credit = AmountConverter.from_db(record['credit'])
-            if not debit:
-                tex += f"{record['date']} & {record['object']} : {record['operation']} & & {credit} \\\\\n"
-            elif not credit:
-                tex += f"{record['date']} & {record['object']} : {record['operation']} & {debit} & \\\\\n"
-            else:
-                tex += f"{record['date']} & {record['object']} : {record['operation']} & {debit} & {credit} \\\\\n"
-            balance += credit - debit
-
-        tex += '&&&\\\\\n'
-        tex += '\\hline\n'
-        balance = AmountConverter.from_db(AmountConverter.to_db(balance))
-        if balance < 0:
-            tex += f" {self.stop_date.strftime('%Y-%m-%d')} & balance & {-balance} & \\\\\n"
-        else:
-            tex += f" {self.stop_date.strftime('%Y-%m-%d')} & balance & & {balance} \\\\\n"
-        tex += '\\hline\n'
-        tex += '\\end{tabular}'
-        return tex
+        stream = io.StringIO()
+        self.render(wire_records, stream, balance)
+        return stream.getvalue()
 
-    def generate_tex_file(self, records, balance):
+    def generate_tex_file(self, records, balance, path=None):
         """
-        Generate tex file inside `latex` folder.
+        Generate tex file inside `path` folder.
 
         Parameters
         ----------
         records: list of asyncpg.Record
             User record loaded from wire table.
-        balance: float
+        balance: Money or float
             Amount of money credited to the user
+        path: Path
+            Folder to write the tex files in, default to the `latex` folder.
         """
+        if path is None:
+            path = Config.PATH / 'latex'
+        path = Path(path)
         tex = self.generate_macros()
-        with open(Config.PATH / 'latex' / 'macro.tex', 'w') as f:
+        with open(path / 'macro.tex', 'w') as f:
             f.write(tex)
-        tex = self.record_to_latex(records, balance)
-        with open(Config.PATH / 'latex' / 'array.tex', 'w') as f:
+        log.info('Generating tex main array.')
+        with open(path / 'array.tex', 'w') as f:
+            self.render(records, f, balance)
+        log.info('Generated tex main array.')
+
+    async def stream_tex_file(self, records, balance, path=None):
+        """
+        Generate tex file inside `path` folder, writing records as they come.
+
+        Parameters
+        ----------
+        records: async iterator of asyncpg.Record
+            User record streamed from wire table, e.g. with `DB.iter_wire`.
+        balance: Money or float
+            Amount of money credited to the user
+        path: Path
+            Folder to write the tex files in, default to the `latex` folder.
+        """
+        if path is None:
+            path = Config.PATH / 'latex'
+        path = Path(path)
+        tex = self.generate_macros()
+        with open(path / 'macro.tex', 'w') as f:
             f.write(tex)
+        log.info('Streaming tex main array.')
+        with open(path / 'array.tex', 'w') as f:
+            await self.render_async(records, f, balance)
         log.info('Generated tex main array.')
+
+
+async def stream_tex_periods(user: str, records, balance, periods, path, backend: str = 'tex'):
+    """
+    Generate tex files for consecutive statements in a single pass over `records`.
+
+    With another `backend` than `tex`, each build folder holds the final
+    `statement.<extension>` file instead of the tex sources.
+
+    Parameters
+    ----------
+    user: str
+        Account of the statements.
+    records: async iterator of asyncpg.Record
+        User record streamed from wire table in date order, from the first period start.
+    balance: Money or float
+        Amount of money credited to the user at the first period start.
+    periods: list of (start, stop) dates
+        Consecutive periods, e.g. from `split_periods`.
+    path: Path
+        Folder in which a sub folder is created for each statement.
+    backend: str
+        Output format, one of `render.BACKENDS`.
+
+    Yields
+    ------
+    stop_date, build_path: as soon as the statement tex files are written.
+    """
+    path = Path(path)
+    balance = Money.of(balance).cents
+    records = aiter(records)
+    record = await anext(records, None)
+    for start_date, stop_date in periods:
+        handler = TexHandler(user, start_date, stop_date)
+        renderer = handler.backend(backend)
+        build_path = path / stop_date.strftime('%Y_%m_%d')
+        build_path.mkdir(parents=True, exist_ok=True)
+        if backend == 'tex':
+            with open(build_path / 'macro.tex', 'w') as f:
+                f.write(handler.generate_macros())
+            file_name = 'array.tex'
+        else:
+            file_name = f'statement.{renderer.extension}'
+        with open(build_path / file_name, 'w', newline='') as f:
+            f.write(renderer.header(balance))
+            while record is not None and record['date'] < stop_date:
+                f.write(renderer.row(record))
+                balance += record['credit'] - record['debit']
+                record = await anext(records, None)
+            f.write(renderer.footer(balance))
+        log.info(f'Generated {user} statement until {stop_date}.')
+        yield stop_date, build_path
@@ -0,0 +1,78 @@
+from concurrent.futures import ProcessPoolExecutor
+import logging
+from typing import NamedTuple
+
+import numpy as np
+
+from .loan import Loan
+
+log = logging.getLogger('sweep')
+log.setLevel('INFO')
+
+
+class SweepResult(NamedTuple):
+    """
+    Sweep outputs, indexed by (amount, annual_rate, length, monthly_cost, percentage).
+    """
+    monthly_repay: np.ndarray
+    total_cost: np.ndarray
+    user_1_cost: np.ndarray
+    user_2_cost: np.ndarray
+
+
+def run_sweep(amounts, annual_rates, lengths, monthly_costs, percentages, processing_cost=0, workers=None):
+    """
+    Simulate loans over the cartesian product of the parameter grids.
+
+    Parameters
+    ----------
+    amounts: array-like
+        Amounts borrowed (in euros).
+    annual_rates: array-like
+        Annual interest rates.
+    lengths: array-like
+        Number of months to repay the credit.
+    monthly_costs: array-like
+        Amounts of the monthly insurance.
+    percentages: array-like
+        Percentage of the loan taken care of by user_1, as `Config.LOAN_PERCENTAGE`.
+    processing_cost: float
+        Amount in euros to process the applications.
+    workers: int
+        If set, split the grid along `amounts` across a pool of `workers` processes.
+
+    Returns
+    -------
+    SweepResult of arrays of shape (len(amounts), len(annual_rates), len(lengths), len(monthly_costs), len(percentages)).
+    """
+    amounts = np.atleast_1d(np.asarray(amounts, dtype=float))
+    grids = [np.atleast_1d(np.asarray(grid, dtype=float)) for grid in (annual_rates, lengths, monthly_costs, percentages)]
+    if workers is None or workers < 2 or len(amounts) < 2:
+        return _sweep(amounts, *grids, processing_cost)
+
+    chunks = np.array_split(amounts, min(workers, len(amounts)))
+    log.info(f'Sweeping {amounts.size * np.prod([grid.size for grid in grids])} scenarios on {len(chunks)} processes.')
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(
+            _sweep, chunks, *([grid] * len(chunks) for grid in grids), [processing_cost] * len(chunks)
+        ))
+    return SweepResult(*(np.concatenate(arrays) for arrays in zip(*results)))
+
+
+def _sweep(amounts, annual_rates, lengths, monthly_costs, percentages, processing_cost):
+    amount, rate, length, monthly_cost, percentage = np.ix_(
+        amounts, annual_rates, lengths, monthly_costs, percentages
+    )
+    monthly_repay = Loan.period_repay(rate / 12, length) * amount
+    total_cost = (
+        (monthly_repay + monthly_cost) * length
+        + Loan.percentage_cost * amount + processing_cost
+    )
+    user_1_cost = total_cost * percentage / 100
+    shape = total_cost.shape[:-1] + (len(percentages),)
+    return SweepResult(
+        monthly_repay=np.broadcast_to(monthly_repay, shape),
+        total_cost=np.broadcast_to(total_cost, shape),
+        user_1_cost=user_1_cost,
+        user_2_cost=total_cost - user_1_cost,
+    )
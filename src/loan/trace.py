@@ -0,0 +1,224 @@
+"""
+Opt-in instrumentation of database calls and pipeline stages.
+
+Spans are only recorded within `tracing()`, outside of it `span` returns a shared
+no-op context manager and instrumented methods check a single global.
+"""
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import time
+
+log = logging.getLogger('trace')
+log.setLevel('INFO')
+
+# Tracer recording spans, None when tracing is disabled.
+active = None
+# Names of the spans the current task is in, innermost last.
+stack = contextvars.ContextVar('stack', default=())
+NULL_SPAN = contextlib.nullcontext()
+
+
+class Stat:
+    """
+    Calls, round trips, rows and latencies recorded for one span name.
+    """
+    __slots__ = ('calls', 'round_trips', 'rows', 'durations')
+
+    def __init__(self):
+        self.calls = 0
+        self.round_trips = 0
+        self.rows = 0
+        self.durations = []
+
+    def quantile(self, q: float):
+        if not self.durations:
+            return 0.
+        durations = sorted(self.durations)
+        return durations[min(int(q * len(durations)), len(durations) - 1)]
+
+    def summary(self):
+        return {
+            'calls': self.calls,
+            'round_trips': self.round_trips,
+            'rows': self.rows,
+            'total': sum(self.durations),
+            'p50': self.quantile(.5),
+            'p99': self.quantile(.99),
+        }
+
+
+class Tracer:
+    """
+    Aggregate spans per name.
+
+    Round trips and rows are added to every enclosing span, e.g. a `DB.wire` span
+    counts the round trips of the `DB.record_transaction` calls it makes.
+    """
+    def __init__(self):
+        self.stats = {}
+
+    def stat(self, name: str):
+        if name not in self.stats:
+            self.stats[name] = Stat()
+        return self.stats[name]
+
+    @contextlib.contextmanager
+    def span(self, name: str):
+        self.stat(name).calls += 1
+        token = stack.set(stack.get() + (name,))
+        tic = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stats[name].durations.append(time.perf_counter() - tic)
+            stack.reset(token)
+
+    def record(self, round_trips: int = 1, rows: int = 0):
+        for name in stack.get():
+            stat = self.stats[name]
+            stat.round_trips += round_trips
+            stat.rows += rows
+
+    def summary(self):
+        """
+        Get statistics per span name, durations in seconds.
+        """
+        return {name: stat.summary() for name, stat in sorted(self.stats.items())}
+
+    def prometheus(self):
+        """
+        Format statistics in the Prometheus text exposition format.
+        """
+        lines = []
+        summary = self.summary()
+        for metric, key, kind in [
+            ('loan_calls_total', 'calls', 'counter'),
+            ('loan_round_trips_total', 'round_trips', 'counter'),
+            ('loan_rows_total', 'rows', 'counter'),
+        ]:
+            lines.append(f'# TYPE {metric} {kind}')
+            lines += [f'{metric}{{span="{name}"}} {stat[key]}' for name, stat in summary.items()]
+        lines.append('# TYPE loan_latency_seconds summary')
+        for name, stat in summary.items():
+            lines.append(f'loan_latency_seconds{{span="{name}",quantile="0.5"}} {stat["p50"]}')
+            lines.append(f'loan_latency_seconds{{span="{name}",quantile="0.99"}} {stat["p99"]}')
+            lines.append(f'loan_latency_seconds_sum{{span="{name}"}} {stat["total"]}')
+            lines.append(f'loan_latency_seconds_count{{span="{name}"}} {stat["calls"]}')
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path):
+        """
+        Write statistics to `path`, in Prometheus format if it ends with `.prom`, in JSON otherwise.
+        """
+        path = str(path)
+        with open(path, 'w') as f:
+            if path.endswith('.prom'):
+                f.write(self.prometheus())
+            else:
+                json.dump(self.summary(), f, indent=2)
+        log.info(f'Trace written to {path}.')
+
+
+@contextlib.contextmanager
+def tracing():
+    """
+    Record spans until exit.
+    """
+    global active
+    previous, active = active, Tracer()
+    try:
+        yield active
+    finally:
+        active = previous
+
+
+def span(name: str):
+    """
+    Time the enclosed block as span `name`, if tracing.
+    """
+    if active is None:
+        return NULL_SPAN
+    return active.span(name)
+
+
+def record(round_trips: int = 1, rows: int = 0):
+    """
+    Add database round trips and rows returned to the current spans, if tracing.
+    """
+    if active is not None:
+        active.record(round_trips, rows)
+
+
+async def iterate(name: str, iterator, page_size: int = None):
+    """
+    Time an async iterator as span `name`, excluding the time spent by the consumer.
+
+    Items are counted as rows, and for database cursors, a round trip every `page_size` rows.
+    """
+    if active is None:
+        async for item in iterator:
+            yield item
+        return
+    tracer = active
+    # The generator may be closed from another task, the enclosing spans are read once.
+    names = stack.get() + (name,)
+    tracer.stat(name).calls += 1
+    elapsed = 0.
+    rows = 0
+    try:
+        iterator = aiter(iterator)
+        while True:
+            tic = time.perf_counter()
+            try:
+                item = await anext(iterator)
+            except StopAsyncIteration:
+                break
+            finally:
+                elapsed += time.perf_counter() - tic
+            rows += 1
+            yield item
+    finally:
+        tracer.stats[name].durations.append(elapsed)
+        round_trips = 1 + rows // page_size if page_size else 0
+        for enclosing in names:
+            stat = tracer.stats[enclosing]
+            stat.round_trips += round_trips
+            stat.rows += rows
+
+
+def instrument(cls):
+    """
+    Class decorator recording each public coroutine method call as a `ClassName.method` span.
+    """
+    for attribute, method in list(vars(cls).items()):
+        if attribute.startswith('_'):
+            continue
+        function = method.__func__ if isinstance(method, (classmethod, staticmethod)) else method
+        if not inspect.iscoroutinefunction(function):
+            continue
+        wrapper = traced(f'{cls.__name__}.{attribute}')(function)
+        if isinstance(method, classmethod):
+            wrapper = classmethod(wrapper)
+        elif isinstance(method, staticmethod):
+            wrapper = staticmethod(wrapper)
+        setattr(cls, attribute, wrapper)
+    return cls
+
+
+def traced(name: str):
+    """
+    Decorator recording each call of a coroutine function as span `name`.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            if active is None:
+                return await function(*args, **kwargs)
+            with active.span(name):
+                return await function(*args, **kwargs)
+        return wrapper
+    return decorator
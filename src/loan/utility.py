@@ -1,15 +1,31 @@
 
+import calendar
 import datetime
+import decimal
+import functools
+import numbers
+from fractions import Fraction
 from pathlib import Path
 
 
 class Config:
     DB_NAME = 'loan'
+    POOL_MIN_SIZE = 1
+    POOL_MAX_SIZE = 10
+    STATEMENT_CACHE_SIZE = 100
+    # Ledger tables are partitioned by household: custom plans are costed without run-time
+    # partition pruning and re-planned on every execution, generic plans are planned once.
+    PLAN_CACHE_MODE = 'force_generic_plan'
+    CURSOR_PREFETCH = 1000
+    # Household `DB` is bound to by default, and the accounts it was migrated with, in account id order.
+    HOUSEHOLD = 'default'
     DB_USERS = [
         'joint',
         'user_1',
         'user_2', 
     ]
+    # Joint account paying the loan timeline, split between its two members.
+    LOAN_ACCOUNT = 'joint'
     REQUESTERS = [
         'fee',
         'insurance',
@@ -25,10 +41,39 @@ class Config:
         'user_1',
         'user_2'
     ]
+    PERIODS = {
+        'monthly': 1,
+        'quarterly': 3,
+        'yearly': 12,
+    }
     PROPERTY_PERCENTAGE = 42
     LOAN_PERCENTAGE = 48.55
     PATH = Path.home() / 'code' / 'loan'
     TARGET_PATH = Path.home() / 'Documents' / 'loan_statements'
+    # Lines of the pdflatex log reported when a statement fails to compile.
+    LATEX_LOG_TAIL = 20
+    CACHE_PATH = None
+    CACHE_MAX_SIZE = 500 * 2 ** 20
+    CACHE_MAX_AGE = 365
+    LEDGER_PATH = None
+    LEDGER_PAGE_SIZE = 100_000
+    IMPORT_BATCH_SIZE = 20_000
+    IMPORT_COLUMNS = {
+        'date': 'date',
+        'amount': 'amount',
+        'label': 'label',
+        'object': 'object',
+    }
+    IMPORT_MAPPING = {}
+    IMPORT_DEFAULT = 'bank'
+    # Group commit of `DB.buffered` writes: wire rows per flush, seconds before a flush, pending calls.
+    WRITE_BUFFER_SIZE = 1000
+    WRITE_BUFFER_DELAY = 0.005
+    WRITE_BUFFER_CAPACITY = 10_000
+    # Longest sleep of `DB.serve_mensualities` between due mensualities, in seconds, against clock changes.
+    TIMELINE_MAX_SLEEP = 3600
+    # Recurring transactions projected by `forecast`, as `forecast.Rule` tuples.
+    FORECAST_RULES = []
 
 
 def get_most_recent_path(dirpath):
@@ -52,11 +97,192 @@ def parse_date(date):
             return datetime.datetime.strptime(date, '%Y-%m-%d').date()
 
 
-class AmountConverter:
+def split_periods(start_date, stop_date, period: str = 'monthly'):
+    """
+    Split [start_date, stop_date) into consecutive periods.
+
+    Parameters
+    ----------
+    period: One of `Config.PERIODS`, periods start on the same day of month as `start_date`,
+        or on the last day of shorter months.
+
+    Returns
+    -------
+    List of (start, stop) dates, the last period stops at `stop_date`.
+    """
+    if period not in Config.PERIODS:
+        raise ValueError(f'Period {period} not recognized.')
+    step = Config.PERIODS[period]
+    start_date = parse_date(start_date)
+    stop_date = parse_date(stop_date)
+    periods = []
+    start = start_date
+    i = 0
+    while start < stop_date:
+        i += step
+        year, month = divmod(start_date.month - 1 + i, 12)
+        year, month = start_date.year + year, month + 1
+        day = min(start_date.day, calendar.monthrange(year, month)[1])
+        stop = min(datetime.date(year, month, day), stop_date)
+        periods.append((start, stop))
+        start = stop
+    return periods
+
+
+@functools.total_ordering
+class Money:
+    """
+    Immutable amount of money, stored as an integer number of cents.
+
+    Plain numbers are read as euros, e.g. `Money.of(12.3) == Money(1230)`.
+    Comparisons with numbers are exact, e.g. `Money(150) == 1.5` but `Money(150) != 1.504`.
+    """
+    __slots__ = ('cents',)
+
+    def __init__(self, cents: int = 0):
+        object.__setattr__(self, 'cents', int(cents))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Money is immutable.')
+
+    @classmethod
+    def of(cls, amount):
+        """
+        Convert `amount` in euros to Money, Money is returned as is.
+        """
+        if isinstance(amount, Money):
+            return amount
+        return cls(round(amount * 100))
+
+    @classmethod
+    def parse(cls, text: str):
+        """
+        Read an amount in euros as written in bank exports, e.g. '-1 234,56', without going through floats.
+        """
+        text = text.strip().replace(' ', '').replace('\xa0', '')
+        if ',' in text:
+            if '.' in text and text.rindex('.') > text.rindex(','):
+                text = text.replace(',', '')
+            else:
+                text = text.replace('.', '').replace(',', '.')
+        euros, _, cents = text.partition('.')
+        if len(cents) > 2:
+            raise ValueError(f'Amount {text} is not in cents.')
+        sign = -1 if euros.startswith('-') else 1
+        return cls(sign * (int(euros.lstrip('+-') or '0') * 100 + int(cents.ljust(2, '0'))))
+
+    @property
+    def euros(self):
+        return self.cents / 100
+
+    def split(self, percentage: float):
+        """
+        Split in two parts, the first one being `percentage` percent, which sum exactly to the amount.
+        """
+        first = Money(round(self.cents * percentage / 100))
+        return first, self - first
+
+    def allocate(self, weights):
+        """
+        Split in parts proportional to `weights`, which sum exactly to the amount.
+
+        Parts are rounded towards zero, left over cents go to the largest remainders.
+        """
+        total = sum(weights)
+        if total <= 0:
+            raise ValueError(f'Weights {weights} should sum to a positive number.')
+        sign = -1 if self.cents < 0 else 1
+        exact = [abs(self.cents) * weight / total for weight in weights]
+        parts = [int(part) for part in exact]
+        left = abs(self.cents) - sum(parts)
+        for i in sorted(range(len(parts)), key=lambda i: parts[i] - exact[i])[:left]:
+            parts[i] += 1
+        return [Money(sign * part) for part in parts]
+
+    def __add__(self, other):
+        return Money(self.cents + Money.of(other).cents)
+
+    def __radd__(self, other):
+        return Money(Money.of(other).cents + self.cents)
+
+    def __sub__(self, other):
+        return Money(self.cents - Money.of(other).cents)
+
+    def __rsub__(self, other):
+        return Money(Money.of(other).cents - self.cents)
+
+    def __mul__(self, factor):
+        return Money(round(self.cents * factor))
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Money(-self.cents)
+
+    def __abs__(self):
+        return Money(abs(self.cents))
+
+    @staticmethod
+    def exact(amount):
+        """
+        Get `amount` as an exact Fraction of euros, None if it is not a number.
+        """
+        if isinstance(amount, Money):
+            return Fraction(amount.cents, 100)
+        if isinstance(amount, (numbers.Rational, float, decimal.Decimal)) and not isinstance(amount, bool):
+            return Fraction(amount)
+        return None
+
+    def __eq__(self, other):
+        other = Money.exact(other)
+        if other is None:
+            return NotImplemented
+        return Fraction(self.cents, 100) == other
+
+    def __lt__(self, other):
+        other = Money.exact(other)
+        if other is None:
+            return NotImplemented
+        return Fraction(self.cents, 100) < other
+
+    # Money equals the numbers of the same value in euros, and hashes alike.
+    def __hash__(self):
+        return hash(Fraction(self.cents, 100))
+
+    def __bool__(self):
+        return bool(self.cents)
+
+    def __float__(self):
+        return self.euros
+
+    def __str__(self):
+        return self.format(self.cents)
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+    @staticmethod
+    def format(cents: int):
+        """
+        Format an amount in cents with two decimals, without going through floats.
+        """
+        sign = '-' if cents < 0 else ''
+        euros, cents = divmod(abs(cents), 100)
+        return f'{sign}{euros}.{cents:02d}'
+
     @staticmethod
-    def to_db(amount):
-        return round(amount * 100)
+    def to_cents(amounts):
+        """
+        Convert an array of amounts in euros to an array of integer cents.
+        """
+        # NumPy is only needed for bulk conversions.
+        import numpy as np
+        return np.rint(np.asarray(amounts, dtype=float) * 100).astype(np.int64)
 
     @staticmethod
-    def from_db(amount):
-        return amount / 100
\ No newline at end of file
+    def from_cents(cents):
+        """
+        Convert an array of integer cents to an array of amounts in euros.
+        """
+        import numpy as np
+        return np.asarray(cents, dtype=np.int64) / 100
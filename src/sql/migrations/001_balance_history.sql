@@ -0,0 +1,20 @@
+-- Monthly balance checkpoints: `balance` is the sum of `credit - debit`
+-- over all wires of `account` dated strictly before `date`.
+CREATE TABLE IF NOT EXISTS balance_history (
+    account users,
+    date DATE,
+    balance BIGINT,
+    PRIMARY KEY (account, date)
+);
+
+INSERT INTO balance_history(account, date, balance)
+SELECT account, month, COALESCE(SUM(total) OVER (
+    PARTITION BY account ORDER BY month
+    ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+), 0)
+FROM (
+    SELECT account, date_trunc('month', date)::date AS month, SUM(credit - debit) AS total
+    FROM wire
+    GROUP BY account, month
+) AS monthly
+ON CONFLICT (account, date) DO NOTHING;
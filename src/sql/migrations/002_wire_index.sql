@@ -0,0 +1,2 @@
+-- Serve per-account, date-ranged scans of `wire` from an index.
+CREATE INDEX IF NOT EXISTS wire_account_date_idx ON wire (account, date, id);
@@ -0,0 +1,4 @@
+-- Keys of the bank transactions already imported, so that importing an export twice is a no-op.
+CREATE TABLE IF NOT EXISTS wire_import (
+    key BIGINT PRIMARY KEY
+);
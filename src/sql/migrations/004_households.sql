@@ -0,0 +1,55 @@
+-- Multi-household ledger: accounts are ids within a household instead of the `users` enum.
+-- `household_wire` and `household_balance` are hash partitioned by household, queries filtering
+-- on one household only scan its partition.
+CREATE TABLE IF NOT EXISTS household (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR UNIQUE NOT NULL
+);
+
+-- Joint accounts list their `members` accounts and the `shares` they take in joint purchases.
+CREATE TABLE IF NOT EXISTS household_account (
+    household INT REFERENCES household (id),
+    id SMALLINT,
+    name VARCHAR NOT NULL,
+    members SMALLINT[],
+    shares REAL[],
+    PRIMARY KEY (household, id),
+    UNIQUE (household, name)
+);
+
+CREATE TABLE IF NOT EXISTS household_wire (
+    household INT NOT NULL,
+    id BIGINT GENERATED ALWAYS AS IDENTITY,
+    account SMALLINT NOT NULL,
+    date DATE NOT NULL,
+    object VARCHAR,
+    operation VARCHAR,
+    debit BIGINT NOT NULL,
+    credit BIGINT NOT NULL,
+    PRIMARY KEY (household, id)
+) PARTITION BY HASH (household);
+
+CREATE TABLE IF NOT EXISTS household_balance (
+    household INT NOT NULL,
+    account SMALLINT NOT NULL,
+    date DATE,
+    debit BIGINT NOT NULL DEFAULT 0,
+    credit BIGINT NOT NULL DEFAULT 0,
+    balance BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (household, account)
+) PARTITION BY HASH (household);
+
+DO $$
+BEGIN
+    FOR i IN 0..15 LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS household_wire_%s PARTITION OF household_wire FOR VALUES WITH (MODULUS 16, REMAINDER %s)', i, i
+        );
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS household_balance_%s PARTITION OF household_balance FOR VALUES WITH (MODULUS 16, REMAINDER %s)', i, i
+        );
+    END LOOP;
+END
+$$;
+
+CREATE INDEX IF NOT EXISTS household_wire_account_date_idx ON household_wire (household, account, date, id);
@@ -0,0 +1,15 @@
+-- Serve due mensuality lookups from the unfilled rows only, filled rows are most of the schedule.
+CREATE INDEX IF NOT EXISTS timeline_due_idx ON timeline (date, id) WHERE NOT fill;
+
+-- Wake `DB.serve_mensualities` when the timeline is rewritten, notifications are sent on commit.
+CREATE OR REPLACE FUNCTION notify_timeline() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('timeline', TG_OP);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS timeline_notify ON timeline;
+CREATE TRIGGER timeline_notify
+    AFTER INSERT OR UPDATE OF date OR DELETE OR TRUNCATE ON timeline
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_timeline();
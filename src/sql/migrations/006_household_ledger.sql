@@ -0,0 +1,89 @@
+-- Move the ledger keyed by the `users` enum onto household and account ids.
+-- The enum accounts become the accounts of the `default` household (`Config.HOUSEHOLD`),
+-- with their index in `Config.DB_USERS` as id, `household_wire` and `household_balance`
+-- become `wire` and `balance`, and `balance_history`, `wire_import` and `timeline` are keyed by household.
+INSERT INTO household(name) VALUES ('default') ON CONFLICT (name) DO NOTHING;
+
+INSERT INTO household_account(household, id, name, members, shares)
+SELECT h.id, a.id, a.name, a.members, a.shares
+FROM household AS h, (VALUES
+    (0, 'joint', '{1, 2}'::smallint[], '{50, 50}'::real[]),
+    (1, 'user_1', NULL, NULL),
+    (2, 'user_2', NULL, NULL)
+) AS a(id, name, members, shares)
+WHERE h.name = 'default'
+ON CONFLICT DO NOTHING;
+
+-- Wire ids are kept, `Ledger` refreshes from them.
+INSERT INTO household_wire(household, id, account, date, object, operation, debit, credit)
+OVERRIDING SYSTEM VALUE
+SELECT h.id, w.id, array_position(enum_range(NULL::users), w.account) - 1, w.date, w.object, w.operation, w.debit, w.credit
+FROM wire AS w, household AS h
+WHERE h.name = 'default';
+
+SELECT setval(pg_get_serial_sequence('household_wire', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM household_wire;
+
+INSERT INTO household_balance(household, account, date, debit, credit, balance)
+SELECT h.id, array_position(enum_range(NULL::users), b.account) - 1, b.date, b.debit, b.credit, b.balance
+FROM balance AS b, household AS h
+WHERE h.name = 'default';
+
+CREATE TEMPORARY TABLE history ON COMMIT DROP AS
+SELECT h.id AS household, array_position(enum_range(NULL::users), c.account) - 1 AS account, c.date, c.balance
+FROM balance_history AS c, household AS h
+WHERE h.name = 'default';
+
+DROP TABLE wire, balance, balance_history;
+DROP TYPE users;
+DROP TYPE stackholders;
+
+ALTER TABLE household_wire RENAME TO wire;
+ALTER TABLE household_balance RENAME TO balance;
+ALTER INDEX household_wire_pkey RENAME TO wire_pkey;
+ALTER INDEX household_balance_pkey RENAME TO balance_pkey;
+ALTER INDEX household_wire_account_date_idx RENAME TO wire_account_date_idx;
+ALTER SEQUENCE household_wire_id_seq RENAME TO wire_id_seq;
+
+-- Monthly balance checkpoints, see `001_balance_history.sql`.
+CREATE TABLE balance_history (
+    household INT NOT NULL,
+    account SMALLINT NOT NULL,
+    date DATE NOT NULL,
+    balance BIGINT NOT NULL,
+    PRIMARY KEY (household, account, date)
+) PARTITION BY HASH (household);
+
+DO $$
+BEGIN
+    FOR i IN 0..15 LOOP
+        EXECUTE format('ALTER TABLE household_wire_%s RENAME TO wire_%s', i, i);
+        EXECUTE format('ALTER INDEX household_wire_%s_pkey RENAME TO wire_%s_pkey', i, i);
+        EXECUTE format(
+            'ALTER INDEX household_wire_%s_household_account_date_id_idx RENAME TO wire_%s_household_account_date_id_idx', i, i
+        );
+        EXECUTE format('ALTER TABLE household_balance_%s RENAME TO balance_%s', i, i);
+        EXECUTE format('ALTER INDEX household_balance_%s_pkey RENAME TO balance_%s_pkey', i, i);
+        EXECUTE format(
+            'CREATE TABLE balance_history_%s PARTITION OF balance_history FOR VALUES WITH (MODULUS 16, REMAINDER %s)', i, i
+        );
+    END LOOP;
+END
+$$;
+
+INSERT INTO balance_history(household, account, date, balance)
+SELECT household, account, date, balance FROM history;
+
+-- Imported bank transactions are deduplicated per household.
+ALTER TABLE wire_import ADD COLUMN household INT;
+UPDATE wire_import SET household = (SELECT id FROM household WHERE name = 'default');
+ALTER TABLE wire_import
+    ALTER COLUMN household SET NOT NULL,
+    DROP CONSTRAINT wire_import_pkey,
+    ADD PRIMARY KEY (household, key);
+
+-- The loan timeline of each household is paid from its `Config.LOAN_ACCOUNT` joint account.
+ALTER TABLE timeline ADD COLUMN household INT;
+UPDATE timeline SET household = (SELECT id FROM household WHERE name = 'default');
+ALTER TABLE timeline ALTER COLUMN household SET NOT NULL;
+DROP INDEX timeline_due_idx;
+CREATE INDEX timeline_due_idx ON timeline (household, date, id) WHERE NOT fill;
@@ -0,0 +1,29 @@
+import pytest
+
+from loan.household import Account, Household
+
+
+@pytest.fixture
+def household():
+    """
+    The `default` household, as created by migration `006_household_ledger.sql`.
+    """
+    return Household(None, 1, 'default', [
+        Account(0, 'joint', (1, 2), (50, 50)),
+        Account(1, 'user_1'),
+        Account(2, 'user_2'),
+    ])
+
+
+@pytest.fixture
+def home():
+    """
+    Household of three members sharing a joint account unevenly, and two of them a second one.
+    """
+    return Household(None, 2, 'home', [
+        Account(0, 'alice'),
+        Account(1, 'bob'),
+        Account(2, 'carol'),
+        Account(3, 'joint', (0, 1, 2), (50, 30, 20)),
+        Account(4, 'kids', (0, 1), (1, 1)),
+    ])
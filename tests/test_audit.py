@@ -0,0 +1,160 @@
+import asyncio
+import struct
+
+import numpy as np
+import pytest
+
+from loan.audit import (
+    check_balance,
+    check_balance_history,
+    check_joint_split,
+    check_nulls,
+    check_timeline_amounts,
+    check_timeline_wires,
+    copy_columns,
+)
+from loan.utility import Config
+
+
+class CopyConnection:
+    """
+    Connection whose binary COPY outputs the given rows, None values being NULL.
+    """
+    def __init__(self, rows, formats):
+        self.rows = rows
+        self.formats = formats
+
+    async def copy_from_query(self, sql, *args, output, format):
+        output.write(b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0))
+        for row in self.rows:
+            output.write(struct.pack('>h', len(row)))
+            for value, format in zip(row, self.formats):
+                if value is None:
+                    output.write(struct.pack('>i', -1))
+                else:
+                    output.write(struct.pack('>i', struct.calcsize(format)) + struct.pack(f'>{format}', value))
+        output.write(struct.pack('>h', -1))
+
+
+def copy(rows, formats, columns):
+    return asyncio.run(copy_columns(CopyConnection(rows, formats), 'SELECT', columns=columns))
+
+
+def test_copy_columns():
+    columns = copy([(1, -5), (2, 2 ** 40)], 'iq', {'id': 'i4', 'amount': 'i8'})
+    assert columns['id'].tolist() == [1, 2]
+    assert columns['amount'].tolist() == [-5, 2 ** 40]
+    assert columns['amount'].dtype == np.int64
+    assert copy([], 'iq', {'id': 'i4', 'amount': 'i8'})['id'].tolist() == []
+
+
+@pytest.mark.parametrize('rows, formats', [
+    ([(1, None), (2, 3)], 'iq'),
+    ([(1, 2), (None, 3)], 'iq'),
+    ([(1, 2), (3, 4)], 'ii'),
+])
+def test_copy_columns_rejects_nulls_and_widths(rows, formats):
+    with pytest.raises(ValueError):
+        copy(rows, formats, {'id': 'i4', 'amount': 'i8'})
+
+
+def wires(household, *rows):
+    """
+    Wire columns of (account, date, object, requester, debit, credit) rows.
+    """
+    requesters = [None] + Config.REQUESTERS
+    return {
+        'id': np.arange(1, len(rows) + 1),
+        'account': np.array([row[0] for row in rows], dtype=np.int64),
+        'date': np.array([row[1] for row in rows], dtype=np.int64),
+        'object': np.array([household.objects.index(row[2]) for row in rows], dtype=np.int64),
+        'operation': np.array([requesters.index(row[3]) for row in rows], dtype=np.int64),
+        'request': np.array([requesters.index(row[3]) - 1 for row in rows], dtype=np.int64),
+        'debit': np.array([row[4] for row in rows], dtype=np.int64),
+        'credit': np.array([row[5] for row in rows], dtype=np.int64),
+    }
+
+
+def timeline(*rows, nulls=None):
+    """
+    Timeline columns of (amount, user_1, user_2, date, fill) loan rows.
+    """
+    return {
+        'id': np.arange(1, len(rows) + 1),
+        **{column: np.array([row[i] for row in rows], dtype=np.int64) for i, column in enumerate(['amount', 'user_1', 'user_2', 'date'])},
+        'fill': np.array([row[4] for row in rows], dtype=bool),
+        'request': np.full(len(rows), Config.REQUESTERS.index('loan')),
+        'nulls': np.array(nulls or [0] * len(rows), dtype=np.int64),
+    }
+
+
+@pytest.fixture
+def purchase(household):
+    # A joint purchase of 10.01 on day 10, and a wire of 20 from user_1 on day 40.
+    return wires(
+        household,
+        (0, 10, 'furniture', None, 1001, 0),
+        (1, 10, 'furniture', None, 501, 0),
+        (2, 10, 'furniture', None, 500, 0),
+        (0, 40, 'user_1', None, 0, 2000),
+        (1, 40, 'joint', None, 0, 2000),
+    )
+
+
+def test_check_balance(household, purchase):
+    balance = {
+        'account': np.array([0, 1, 2]),
+        'debit': np.array([1001, 501, 500]),
+        'credit': np.array([2000, 2000, 0]),
+        'balance': np.array([999, 1499, -500]),
+    }
+    assert check_balance(purchase, balance, household) == []
+    balance['balance'][2] = 0
+    discrepancies = check_balance(purchase, balance, household)
+    assert len(discrepancies) == 1 and 'user_2 balance' in discrepancies[0].message
+    balance['balance'][2] = -500
+    balance['credit'][1], balance['balance'][1] = 0, -501
+    discrepancies = check_balance(purchase, balance, household)
+    assert len(discrepancies) == 1 and 'differ from wire totals' in discrepancies[0].message
+
+
+def test_check_balance_history(household, purchase):
+    history = {
+        'account': np.array([0, 0, 1]),
+        'date': np.array([10, 41, 31]),
+        'balance': np.array([0, 999, -501]),
+    }
+    assert check_balance_history(purchase, history, household) == []
+    history['balance'][0] = -1001
+    assert len(check_balance_history(purchase, history, household)) == 1
+
+
+def test_check_joint_split(household, purchase):
+    assert check_joint_split(purchase, household) == []
+    purchase['debit'][2] = 499
+    discrepancies = check_joint_split(purchase, household)
+    assert len(discrepancies) == 1
+    assert discrepancies[0].ids == [1, 2, 3]
+
+
+def test_check_timeline_amounts_and_nulls():
+    rows = timeline((1000, 500, 500, 10, True), (1000, 600, 300, 40, False), nulls=[0, 2])
+    assert check_timeline_amounts(rows)[0].ids == [2]
+    assert check_nulls({'timeline': rows})[0].ids == [2]
+
+
+def test_check_timeline_wires(household):
+    rows = timeline((1000, 600, 400, 10, True), (1000, 500, 500, 40, True), (1000, 500, 500, 70, False))
+    recorded = wires(
+        household,
+        (0, 10, 'bank', 'loan', 1000, 0),
+        (1, 10, 'bank', 'loan', 600, 0),
+        (2, 10, 'bank', 'loan', 400, 0),
+        (0, 40, 'bank', 'loan', 1000, 0),
+        (1, 40, 'bank', 'loan', 500, 0),
+    )
+    discrepancies = check_timeline_wires(recorded, rows, household)
+    assert len(discrepancies) == 1
+    assert discrepancies[0].ids == [2]
+    rows['fill'][1] = False
+    assert check_timeline_wires(recorded, rows, household) == []
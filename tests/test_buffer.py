@@ -0,0 +1,63 @@
+import asyncio
+import contextlib
+import contextvars
+
+import pytest
+
+from loan.buffer import WriteBuffer
+
+
+class Database:
+    """
+    Stand-in of `DB` whose `write_wires` waits for `release`.
+    """
+    def __init__(self):
+        self.connection = contextvars.ContextVar('connection', default=None)
+        self.release = asyncio.Event()
+        self.committed = []
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        yield None
+
+    async def write_wires(self, connection, wires):
+        await self.release.wait()
+        self.committed += wires
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 5))
+
+
+def test_submissions_are_committed():
+    async def main():
+        database = Database()
+        database.release.set()
+        buffer = WriteBuffer(database, size=10, delay=0.01, capacity=10)
+        await asyncio.gather(*(buffer.submit([i]) for i in range(5)))
+        await buffer.close()
+        assert sorted(database.committed) == list(range(5))
+        with pytest.raises(RuntimeError):
+            await buffer.submit([5])
+
+    run(main())
+
+
+def test_cancelled_buffer_fails_pending_submissions():
+    async def main():
+        database = Database()
+        buffer = WriteBuffer(database, size=1, delay=0, capacity=1)
+        flushing = asyncio.create_task(buffer.submit([1]))
+        await asyncio.sleep(0.01)
+        queued = asyncio.create_task(buffer.submit([2]))
+        await asyncio.sleep(0.01)
+        # The queue is full, this submission waits for room in it.
+        waiting = asyncio.create_task(buffer.submit([3]))
+        await asyncio.sleep(0.01)
+        buffer.task.cancel()
+        for task in [flushing, queued, waiting]:
+            with pytest.raises(RuntimeError):
+                await task
+        assert buffer.closed and database.committed == []
+
+    run(main())
@@ -0,0 +1,21 @@
+import importlib
+
+import pytest
+
+import loan
+
+
+@pytest.mark.parametrize('name, module', [
+    ('run_audit', 'audit'),
+    ('project_forecast', 'forecast'),
+    ('run_sweep', 'sweep'),
+])
+def test_exports_survive_submodule_imports(name, module):
+    importlib.import_module(f'loan.{module}')
+    assert callable(getattr(loan, name))
+    assert getattr(loan, name) is getattr(getattr(loan, module), name)
+
+
+def test_exports_are_defined():
+    for name, module in loan.EXPORTS.items():
+        assert getattr(loan, name) is getattr(importlib.import_module(f'loan.{module}'), name)
@@ -0,0 +1,63 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from loan import Rule
+from loan.forecast import monthly_dates, project
+
+
+def timeline(*rows):
+    return {
+        'date': np.array([row[0] for row in rows], dtype='datetime64[D]'),
+        **{column: np.array([row[i + 1] for row in rows], dtype=np.int64) for i, column in enumerate(['amount', 'user_1', 'user_2'])},
+    }
+
+
+def test_monthly_dates_keep_end_of_month_day():
+    dates = monthly_dates('2023-01-31', '2023-06-01')
+    assert dates.tolist() == [datetime.date(2023, 1, 31), datetime.date(2023, 2, 28), datetime.date(2023, 3, 31),
+                              datetime.date(2023, 4, 30), datetime.date(2023, 5, 31)]
+    assert monthly_dates('2023-01-15', '2024-01-01', 3).tolist() == [
+        datetime.date(2023, 1, 15), datetime.date(2023, 4, 15), datetime.date(2023, 7, 15), datetime.date(2023, 10, 15)
+    ]
+
+
+def test_project_books_timeline_to_loan_accounts(household):
+    forecast = project(
+        household, {'joint': 1500, 'user_1': 1000}, timeline(('2023-01-10', 1000, 600, 400)),
+        start='2023-01-01', stop='2023-01-20', frequency='daily',
+    )
+    assert forecast.accounts == ['joint', 'user_1', 'user_2']
+    assert forecast.balances[:, 8].tolist() == [1500, 1000, 0]
+    assert forecast.balances[:, 9].tolist() == [500, 400, -400]
+    assert forecast.negative == {'joint': None, 'user_1': None, 'user_2': datetime.date(2023, 1, 10)}
+
+
+def test_project_past_timeline_rows_fall_on_start(household):
+    forecast = project(household, {}, timeline(('2022-12-01', 100, 50, 50)), start='2023-01-01', stop='2023-01-03', frequency='daily')
+    assert forecast.balances[:, 0].tolist() == [-100, -50, -50]
+
+
+def test_project_rules_monthly(home):
+    rules = [
+        Rule('wire', 'alice', 'joint', 10, '2023-01-31'),
+        Rule('purchase', 'joint', 'bank', 1, '2023-02-01', stop='2023-03-01'),
+    ]
+    forecast = project(home, {}, timeline(), rules, start='2023-01-01', stop='2023-04-01')
+    assert forecast.dates.tolist() == [datetime.date(2023, 1, 31), datetime.date(2023, 2, 28), datetime.date(2023, 3, 31)]
+    alice, bob, carol, joint, kids = forecast.balances
+    assert joint.tolist() == [1000, 1900, 2900]
+    assert alice.tolist() == [1000, 1950, 2950]
+    assert bob.tolist() == [0, -30, -30]
+    assert carol.tolist() == [0, -20, -20]
+    assert kids.tolist() == [0, 0, 0]
+
+
+def test_project_rejects_unknown_rules(household):
+    with pytest.raises(ValueError):
+        project(household, {}, timeline(), [Rule('gift', 'user_1', 'joint', 1, '2023-01-01')], start='2023-01-01')
+    with pytest.raises(ValueError):
+        project(household, {}, timeline(), [Rule('wire', 'joint', 'joint', 1, '2023-01-01')], start='2023-01-01')
+    with pytest.raises(ValueError):
+        project(household, {}, timeline(), start='2023-01-01', frequency='weekly')
@@ -0,0 +1,72 @@
+import pytest
+
+from loan import DB
+from loan.utility import Money
+
+
+def test_names_and_objects(household, home):
+    assert household.names == ['joint', 'user_1', 'user_2']
+    assert home.names == ['alice', 'bob', 'carol', 'joint', 'kids']
+    assert home.objects[-4:] == ['alice', 'bob', 'carol', 'kids']
+    assert 'bank' in home.objects
+
+
+def test_split_wire(household):
+    assert household.split_wire('user_1', 'joint', 10) == [(0, Money(1000), 'user_1'), (1, Money(1000), 'joint')]
+    assert household.split_wire('joint', 'user_2', 10) == [(0, Money(-1000), 'user_2'), (2, Money(-1000), 'joint')]
+    assert household.split_wire('user_2', 'user_1', 10) == [(1, Money(-1000), 'user_2'), (2, Money(1000), 'user_1')]
+
+
+def test_split_wire_not_recognized(home):
+    assert home.split_wire('joint', 'kids', 10) == []
+    assert home.split_wire('carol', 'kids', 10) == []
+    with pytest.raises(ValueError):
+        home.split_wire('dave', 'joint', 10)
+
+
+def test_split_purchase_with_shares(home):
+    transactions = home.split_purchase('joint', 10.01, 'bank')
+    assert [account for account, _, _ in transactions] == [0, 1, 2, 3]
+    amounts = dict((account, amount) for account, amount, _ in transactions)
+    assert amounts[3] == Money(-1001)
+    # The left over cent goes to the largest remainder.
+    assert [amounts[0], amounts[1], amounts[2]] == [Money(-501), Money(-300), Money(-200)]
+    assert {object for _, _, object in transactions} == {'bank'}
+
+    custom = dict((account, amount) for account, amount, _ in home.split_purchase('joint', 9, 'bank', shares={'bob': 2, 'carol': 1}))
+    assert custom == {1: Money(-600), 2: Money(-300), 3: Money(-900)}
+
+
+def test_split_purchase_percentage(household, home):
+    transactions = household.split_purchase('joint', 30.01, 'furniture', percentage=70)
+    assert transactions == [(0, Money(-3001), 'furniture'), (1, Money(-2101), 'furniture'), (2, Money(-900), 'furniture')]
+    assert home.split_purchase('kids', 1, 'bank', percentage=25)[0] == (0, Money(-25), 'bank')
+    with pytest.raises(ValueError):
+        home.split_purchase('joint', 1, 'bank', percentage=25)
+
+
+def test_split_purchase_requires_joint_account(home):
+    with pytest.raises(ValueError):
+        home.split_purchase('alice', 1, 'bank')
+
+
+def test_loan_accounts(household, home):
+    assert household.loan_accounts() == [0, 1, 2]
+    with pytest.raises(ValueError):
+        home.loan_accounts()
+
+
+def test_wire_rows_reject_unknown_objects(household):
+    database = DB()
+    database.household = household
+    rows = database.wire_rows(household.split_purchase('joint', 5, 'bank'), '2023-01-01', 'purchase')
+    assert [row[1] for row in rows] == [0, 1, 2]
+    assert rows[0][5:] == (500, 0)
+    assert database.wire_rows([(1, 3, None)], '2023-01-01')[0][3] is None
+    with pytest.raises(ValueError):
+        database.wire_rows(household.split_purchase('joint', 5, 'bankk'), '2023-01-01')
+
+
+def test_wire_rows_require_a_household():
+    with pytest.raises(ValueError):
+        DB().wire_rows([(1, 3, 'bank')])
@@ -0,0 +1,42 @@
+import os
+import subprocess
+
+import pytest
+
+from loan.latex import compile_latex, statement_path
+from loan.utility import Config
+
+
+@pytest.fixture
+def latex(tmp_path, monkeypatch):
+    """
+    LaTeX folder compiled by a stand-in `pdflatex`, exiting with `$PDFLATEX_STATUS` after writing a pdf.
+    """
+    bin_path = tmp_path / 'bin'
+    bin_path.mkdir()
+    pdflatex = bin_path / 'pdflatex'
+    pdflatex.write_text('#!/bin/sh\necho pdf > main.pdf\necho "! Emergency stop." > main.log\nexit $PDFLATEX_STATUS\n')
+    pdflatex.chmod(0o755)
+    monkeypatch.setenv('PATH', f'{bin_path}{os.pathsep}{os.environ["PATH"]}')
+    (tmp_path / 'latex').mkdir()
+    for name in ['main.tex', 'macro.tex', 'array.tex']:
+        (tmp_path / 'latex' / name).write_text(name)
+    monkeypatch.setattr(Config, 'PATH', tmp_path)
+    monkeypatch.setattr(Config, 'TARGET_PATH', tmp_path / 'statements')
+    monkeypatch.setattr(Config, 'CACHE_PATH', tmp_path / 'cache')
+    return monkeypatch
+
+
+def test_compile_latex_publishes_successful_builds(latex):
+    latex.setenv('PDFLATEX_STATUS', '0')
+    compile_latex('user_1', '2023-01-01')
+    assert statement_path('user_1', '2023-01-01').read_text() == 'pdf\n'
+
+
+def test_compile_latex_does_not_publish_failed_builds(latex):
+    latex.setenv('PDFLATEX_STATUS', '1')
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        compile_latex('user_1', '2023-01-01')
+    assert 'Emergency stop' in error.value.output
+    assert not statement_path('user_1', '2023-01-01').exists()
+    assert not list(Config.CACHE_PATH.glob('**/*.pdf'))
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from loan import Loan
+from loan.utility import Money
+
+
+def assert_repaid(schedule, amount):
+    assert schedule.capital[-1] == pytest.approx(0, abs=1e-6)
+    assert schedule.principal.sum() + schedule.repayment.sum() == pytest.approx(amount)
+    np.testing.assert_allclose(schedule.payment, schedule.interest + schedule.principal)
+
+
+def test_schedule_constant_payment():
+    loan = Loan(100000, 1000, 30, annual_rate=0.03, length=240)
+    schedule = loan.schedule()
+    assert len(schedule.period) == 240
+    np.testing.assert_allclose(schedule.payment, loan.monthly_repay)
+    assert schedule.interest[0] == pytest.approx(100000 * 0.03 / 12)
+    assert_repaid(schedule, 100000)
+
+
+def test_schedule_zero_rate():
+    schedule = Loan(1200, 0, 0, annual_rate=0, length=12).schedule()
+    np.testing.assert_allclose(schedule.payment, 100)
+    np.testing.assert_allclose(schedule.interest, 0)
+    assert_repaid(schedule, 1200)
+
+
+def test_early_repayment_lowers_payment():
+    loan = Loan(100000, 0, 0, annual_rate=0.02, length=120)
+    schedule = loan.schedule({12: 20000})
+    assert len(schedule.period) == 120
+    assert schedule.repayment[11] == 20000
+    assert schedule.payment[12] < schedule.payment[11]
+    assert_repaid(schedule, 100000)
+
+
+def test_early_repayment_shortens_loan():
+    loan = Loan(100000, 0, 0, annual_rate=0.02, length=120)
+    schedule = loan.schedule({12: 20000}, shorten=True)
+    assert len(schedule.period) < 120
+    np.testing.assert_allclose(schedule.payment[:-1], loan.monthly_repay)
+    assert_repaid(schedule, 100000)
+
+
+def test_early_repayment_in_full():
+    schedule = Loan(10000, 0, 0, annual_rate=0.02, length=60).schedule({6: 1e9})
+    assert len(schedule.period) == 6
+    assert_repaid(schedule, 10000)
+
+
+def test_early_repayment_outside_amortization():
+    loan = Loan(10000, 0, 0, length=60, deferral=6)
+    with pytest.raises(ValueError):
+        loan.schedule({3: 100})
+    with pytest.raises(ValueError):
+        loan.schedule({61: 100})
+
+
+def test_deferral_pays_interest_only():
+    loan = Loan(12000, 0, 0, annual_rate=0.06, length=24, deferral=6)
+    schedule = loan.schedule()
+    np.testing.assert_allclose(schedule.payment[:6], 12000 * 0.005)
+    np.testing.assert_allclose(schedule.principal[:6], 0)
+    assert_repaid(schedule, 12000)
+
+
+def test_capitalized_deferral():
+    loan = Loan(12000, 0, 0, annual_rate=0.06, length=24, deferral=6, capitalize=True)
+    schedule = loan.schedule()
+    np.testing.assert_allclose(schedule.payment[:6], 0)
+    assert schedule.capital[5] == pytest.approx(12000 * 1.005 ** 6)
+    assert schedule.capital[-1] == pytest.approx(0, abs=1e-6)
+    with pytest.raises(ValueError):
+        Loan(12000, 0, 0, length=24, deferral=24)
+
+
+def test_schedule_cents_add_up():
+    loan = Loan(100000.37, 0, 0, annual_rate=0.021, length=97)
+    schedule = loan.schedule({40: 1234.56}).cents()
+    assert schedule.principal.sum() + schedule.repayment.sum() == Money.of(100000.37).cents
+    assert (schedule.interest + schedule.principal == schedule.payment).all()
@@ -0,0 +1,63 @@
+import csv
+import datetime
+import io
+
+import pytest
+
+from loan import TexHandler
+from loan.render import BACKENDS
+
+RECORDS = [
+    {'date': datetime.date(2023, 1, 5), 'object': 'joint', 'operation': 'wire', 'debit': 0, 'credit': 10000},
+    {'date': datetime.date(2023, 2, 1), 'object': 'furniture', 'operation': 'R&D_100%', 'debit': 1234, 'credit': 0},
+]
+
+
+def render(backend, balance=0):
+    stream = io.StringIO()
+    closing = TexHandler('user_1', '2023-01-01', '2023-03-01').render(RECORDS, stream, balance, backend)
+    return closing, stream.getvalue()
+
+
+@pytest.mark.parametrize('backend', sorted(BACKENDS))
+def test_backends_close_on_balance(backend):
+    closing, output = render(backend, balance=1.5)
+    assert closing == 150 + 10000 - 1234
+    assert '89.16' in output and '12.34' in output
+
+
+def test_latex_escapes_operations():
+    _, output = render('tex')
+    assert 'furniture : R\\&D\\_100\\%' in output
+    assert output.rstrip().endswith('\\end{longtable}')
+
+
+def test_csv_rows():
+    _, output = render('csv', balance=-2)
+    rows = list(csv.reader(io.StringIO(output)))
+    assert rows[0] == ['date', 'operation', 'debit', 'credit']
+    assert rows[1] == ['2023-01-01', 'balance', '2.00', '']
+    assert rows[3] == ['2023-02-01', 'furniture : R&D_100%', '12.34', '']
+    assert rows[-1] == ['2023-03-01', 'balance', '', '85.66']
+
+
+def test_html_escapes_operations():
+    _, output = render('html')
+    assert 'R&amp;D_100%' in output
+    assert output.endswith('</html>\n')
+
+
+def test_pdf_cross_reference_table():
+    _, output = render('pdf')
+    assert output.startswith('%PDF-')
+    offset = int(output.rsplit('startxref\n', 1)[1].split()[0])
+    assert output[offset:].startswith('xref')
+    lines = output[offset:].split('\n')
+    count = int(lines[1].split()[1])
+    for number, entry in enumerate(lines[3:count + 2], 1):
+        assert output[int(entry[:10]):].startswith(f'{number} 0 obj')
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        render('docx')
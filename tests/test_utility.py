@@ -0,0 +1,114 @@
+import datetime
+import decimal
+
+import pytest
+
+from loan.utility import Money, split_periods
+
+
+def test_money_of_reads_euros():
+    assert Money.of(12.3).cents == 1230
+    assert Money.of(5).cents == 500
+    assert Money.of(Money(7)) == Money(7)
+
+
+@pytest.mark.parametrize('text, cents', [
+    ('-1 234,56', -123456),
+    ('1,234.56', 123456),
+    ('12', 1200),
+    ('0,5', 50),
+    ('+3.07', 307),
+])
+def test_money_parse(text, cents):
+    assert Money.parse(text).cents == cents
+
+
+def test_money_parse_rejects_fractions_of_cents():
+    with pytest.raises(ValueError):
+        Money.parse('1.234')
+
+
+def test_money_format():
+    assert str(Money(-5)) == '-0.05'
+    assert str(Money(123456)) == '1234.56'
+
+
+def test_money_arithmetic():
+    assert Money(150) + 1 == Money(250)
+    assert 1 + Money(150) == Money(250)
+    assert Money(150) - 0.5 == Money(100)
+    assert 2 - Money(150) == Money(50)
+    assert Money(150) * 3 == Money(450)
+    assert -Money(150) == Money(-150)
+    assert abs(Money(-150)) == Money(150)
+    assert not Money(0)
+
+
+def test_money_split_and_allocate_sum_exactly():
+    first, second = Money(1001).split(50)
+    assert first + second == Money(1001)
+    parts = Money(-1000).allocate([1, 1, 1])
+    assert sum(parts, Money(0)) == Money(-1000)
+    assert sorted(part.cents for part in parts) == [-334, -333, -333]
+    with pytest.raises(ValueError):
+        Money(100).allocate([0, 0])
+
+
+def test_money_comparisons_are_exact():
+    assert Money(150) == 1.5
+    assert Money(150) == decimal.Decimal('1.50')
+    assert Money(150) != 1.504
+    assert Money(100) < 1.004
+    assert not Money(100) >= 1.004
+    assert Money(100) == 1
+    assert Money(150) != '1.50'
+    with pytest.raises(TypeError):
+        Money(150) < '2'
+
+
+def test_money_is_hashable_like_equal_numbers():
+    assert hash(Money(150)) == hash(1.5)
+    assert hash(Money(100)) == hash(1)
+    assert {Money(150): 'a'}[Money.of(1.5)] == 'a'
+    assert len({Money(150), Money(150), Money(151)}) == 2
+
+
+def test_money_is_immutable_and_not_an_int():
+    money = Money(150)
+    with pytest.raises(AttributeError):
+        money.cents = 1
+    with pytest.raises(TypeError):
+        int(money)
+    assert float(money) == 1.5
+
+
+def test_split_periods_keeps_end_of_month_day():
+    periods = split_periods('2023-01-31', '2023-07-01')
+    assert [stop.day for _, stop in periods] == [28, 31, 30, 31, 30, 1]
+    assert periods[0][0] == datetime.date(2023, 1, 31)
+    assert all(stop == start for (_, stop), (start, _) in zip(periods, periods[1:]))
+
+
+@pytest.mark.parametrize('day', [29, 30, 31])
+def test_split_periods_days_past_28(day):
+    periods = split_periods(datetime.date(2024, 1, day), '2024-05-01')
+    stops = [stop for _, stop in periods[:-1]]
+    assert stops == [
+        datetime.date(2024, 2, 29),
+        datetime.date(2024, 3, day),
+        datetime.date(2024, 4, min(day, 30)),
+    ]
+
+
+def test_split_periods_quarterly_stops_at_stop_date():
+    periods = split_periods('2023-11-30', '2024-06-01', 'quarterly')
+    assert periods == [
+        (datetime.date(2023, 11, 30), datetime.date(2024, 2, 29)),
+        (datetime.date(2024, 2, 29), datetime.date(2024, 5, 30)),
+        (datetime.date(2024, 5, 30), datetime.date(2024, 6, 1)),
+    ]
+
+
+def test_split_periods_rejects_unknown_period():
+    with pytest.raises(ValueError):
+        split_periods('2023-01-01', '2024-01-01', 'weekly')